@@ -136,5 +136,71 @@ CREATE SCHEMA IF NOT EXISTS staging;
 CREATE TABLE IF NOT EXISTS staging.etl_metadata (
     table_name VARCHAR(64) PRIMARY KEY,
     load_time TIMESTAMP,
-    row_count INT
+    row_count INT,
+    high_water_timestamp TIMESTAMP,
+    high_water_key VARCHAR(64)
+);
+
+-- Incremental-load high-water marks (added for existing deployments)
+ALTER TABLE staging.etl_metadata
+    ADD COLUMN IF NOT EXISTS high_water_timestamp TIMESTAMP,
+    ADD COLUMN IF NOT EXISTS high_water_key VARCHAR(64);
+
+-- Load ledger (staging objects already loaded, keyed by S3 key + ETag + size)
+CREATE TABLE IF NOT EXISTS staging.etl_load_ledger (
+    s3_key VARCHAR(1024) NOT NULL,
+    etag VARCHAR(128) NOT NULL,
+    size_bytes BIGINT NOT NULL,
+    target_table VARCHAR(64) NOT NULL,
+    row_count INT NOT NULL,
+    loaded_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (s3_key, etag, size_bytes)
+);
+
+-- Load timestamps read by the warehouse loader (phase_4_python_etl/warehouse_loader.py)
+ALTER TABLE staging.staging_customers ADD COLUMN IF NOT EXISTS loaded_at TIMESTAMP NOT NULL DEFAULT NOW();
+ALTER TABLE staging.staging_dealers ADD COLUMN IF NOT EXISTS loaded_at TIMESTAMP NOT NULL DEFAULT NOW();
+ALTER TABLE staging.staging_vehicles ADD COLUMN IF NOT EXISTS loaded_at TIMESTAMP NOT NULL DEFAULT NOW();
+ALTER TABLE staging.staging_sales ADD COLUMN IF NOT EXISTS loaded_at TIMESTAMP NOT NULL DEFAULT NOW();
+ALTER TABLE staging.staging_inventory ADD COLUMN IF NOT EXISTS loaded_at TIMESTAMP NOT NULL DEFAULT NOW();
+ALTER TABLE staging.staging_payments ADD COLUMN IF NOT EXISTS loaded_at TIMESTAMP NOT NULL DEFAULT NOW();
+ALTER TABLE staging.staging_suppliers ADD COLUMN IF NOT EXISTS loaded_at TIMESTAMP NOT NULL DEFAULT NOW();
+ALTER TABLE staging.staging_procurement ADD COLUMN IF NOT EXISTS loaded_at TIMESTAMP NOT NULL DEFAULT NOW();
+ALTER TABLE staging.staging_interactions ADD COLUMN IF NOT EXISTS loaded_at TIMESTAMP NOT NULL DEFAULT NOW();
+ALTER TABLE staging.staging_telemetry ADD COLUMN IF NOT EXISTS loaded_at TIMESTAMP NOT NULL DEFAULT NOW();
+CREATE INDEX IF NOT EXISTS idx_staging_customers_loaded_at ON staging.staging_customers (loaded_at);
+CREATE INDEX IF NOT EXISTS idx_staging_dealers_loaded_at ON staging.staging_dealers (loaded_at);
+CREATE INDEX IF NOT EXISTS idx_staging_vehicles_loaded_at ON staging.staging_vehicles (loaded_at);
+CREATE INDEX IF NOT EXISTS idx_staging_sales_loaded_at ON staging.staging_sales (loaded_at);
+CREATE INDEX IF NOT EXISTS idx_staging_inventory_loaded_at ON staging.staging_inventory (loaded_at);
+CREATE INDEX IF NOT EXISTS idx_staging_payments_loaded_at ON staging.staging_payments (loaded_at);
+CREATE INDEX IF NOT EXISTS idx_staging_suppliers_loaded_at ON staging.staging_suppliers (loaded_at);
+CREATE INDEX IF NOT EXISTS idx_staging_procurement_loaded_at ON staging.staging_procurement (loaded_at);
+CREATE INDEX IF NOT EXISTS idx_staging_interactions_loaded_at ON staging.staging_interactions (loaded_at);
+CREATE INDEX IF NOT EXISTS idx_staging_telemetry_loaded_at ON staging.staging_telemetry (loaded_at);
+-- Quarantined rows (phase_4_python_etl/quarantine.py): dirty rows and rows of
+-- rejected files, with the rule they failed, the source object, and the run
+CREATE TABLE IF NOT EXISTS staging.etl_quarantine (
+    quarantine_id BIGSERIAL PRIMARY KEY,
+    run_id VARCHAR(256) NOT NULL,
+    source_key VARCHAR(1024),
+    target_table VARCHAR(64) NOT NULL,
+    rule VARCHAR(128) NOT NULL,
+    detail TEXT,
+    record JSONB NOT NULL,
+    quarantined_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    replayed_at TIMESTAMP,
+    replay_run_id VARCHAR(256)
+);
+CREATE INDEX IF NOT EXISTS idx_etl_quarantine_pending ON staging.etl_quarantine (target_table, rule) WHERE replayed_at IS NULL;
+CREATE INDEX IF NOT EXISTS idx_etl_quarantine_run ON staging.etl_quarantine (run_id);
+CREATE INDEX IF NOT EXISTS idx_etl_quarantine_source ON staging.etl_quarantine (source_key);
+-- Per-table column profiles (phase_4_python_etl/profiling.py): mergeable
+-- distinct-count and quantile sketches, folded in after every ETL run
+CREATE TABLE IF NOT EXISTS staging.etl_table_profiles (
+    table_name VARCHAR(64) PRIMARY KEY,
+    row_count BIGINT NOT NULL,
+    runs INT NOT NULL,
+    profile JSONB NOT NULL,
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW()
 );
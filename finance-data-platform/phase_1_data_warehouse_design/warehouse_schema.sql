@@ -17,9 +17,9 @@ SET search_path TO warehouse, analytics, metadata;
 -- DIMENSIONS
 -- ----------------------------------------------------------------
 
--- Date dimension
+-- Date dimension (date_key is the date as yyyymmdd, e.g. 20260224)
 CREATE TABLE IF NOT EXISTS warehouse.dim_date (
-    date_key BIGSERIAL PRIMARY KEY,
+    date_key BIGINT PRIMARY KEY,
     date_actual DATE NOT NULL UNIQUE,
     year SMALLINT NOT NULL,
     quarter SMALLINT NOT NULL CHECK (quarter BETWEEN 1 AND 4),
@@ -52,6 +52,7 @@ CREATE TABLE IF NOT EXISTS warehouse.dim_customer (
     expiry_date DATE,
     is_current BOOLEAN NOT NULL DEFAULT TRUE,
     created_at TIMESTAMP,
+    attribute_hash CHAR(32),
     CONSTRAINT uq_dim_customer_scd UNIQUE (customer_id, effective_date),
     CONSTRAINT ck_dim_customer_dates CHECK (expiry_date IS NULL OR expiry_date >= effective_date)
 );
@@ -97,6 +98,7 @@ CREATE TABLE IF NOT EXISTS warehouse.dim_vehicle (
     expiry_date DATE,
     is_current BOOLEAN NOT NULL DEFAULT TRUE,
     created_at TIMESTAMP,
+    attribute_hash CHAR(32),
     CONSTRAINT uq_dim_vehicle_scd UNIQUE (vin, effective_date),
     CONSTRAINT ck_dim_vehicle_year CHECK (year IS NULL OR year BETWEEN 1980 AND 2100),
     CONSTRAINT ck_dim_vehicle_dates CHECK (expiry_date IS NULL OR expiry_date >= effective_date)
@@ -218,6 +220,11 @@ CREATE TABLE IF NOT EXISTS warehouse.fact_telemetry (
     CONSTRAINT ck_fact_telemetry_temp CHECK (engine_temperature IS NULL OR engine_temperature BETWEEN -50 AND 250)
 );
 
+-- SCD2 change detection (added for existing deployments): md5 of the
+-- tracked attributes, written by phase_4_python_etl/warehouse_loader.py
+ALTER TABLE warehouse.dim_customer ADD COLUMN IF NOT EXISTS attribute_hash CHAR(32);
+ALTER TABLE warehouse.dim_vehicle ADD COLUMN IF NOT EXISTS attribute_hash CHAR(32);
+
 -- ----------------------------------------------------------------
 -- INDEXES (ERD RELATION + PERFORMANCE)
 -- ----------------------------------------------------------------
@@ -0,0 +1,172 @@
+"""Vectorized categorical rule validation for the Phase 4 ETL."""
+
+from __future__ import annotations
+
+from collections import Counter
+from typing import Any, Iterable
+
+import numpy as np
+import pandas as pd
+
+TOP_OFFENDERS = 5
+# Checked columns whose distinct values cover at most this share of the rows
+# are returned as pandas Categoricals so they stay compact through the load.
+CATEGORICAL_MAX_UNIQUE_RATIO = 0.5
+
+
+def factorize_column(values: pd.Series) -> tuple[np.ndarray, pd.Index]:
+    """Return integer codes (-1 for null) and the distinct values of a column."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(), values.cat.categories
+    codes, uniques = pd.factorize(values)
+    return codes, pd.Index(uniques)
+
+
+def offender_value(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        value = value.item()
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+class CategoricalReport:
+    """Per-rule violation counts and offending values, mergeable across chunks."""
+
+    def __init__(self) -> None:
+        self.dirty_records = 0
+        self.violations: dict[str, int] = {}
+        self.offenders: dict[str, Counter] = {}
+        # Per-group reports, filled when validate_categoricals gets ``row_groups``.
+        self.groups: list[CategoricalReport] = []
+
+    def add_rule(self, column: str, violation_count: int, offenders: Counter) -> None:
+        self.violations[column] = self.violations.get(column, 0) + violation_count
+        self.offenders.setdefault(column, Counter()).update(offenders)
+
+    def merge(self, other: "CategoricalReport") -> "CategoricalReport":
+        self.dirty_records += other.dirty_records
+        for column, violation_count in other.violations.items():
+            self.add_rule(column, violation_count, other.offenders.get(column, Counter()))
+        return self
+
+    @property
+    def total_violations(self) -> int:
+        return int(sum(self.violations.values()))
+
+    def to_metrics(self, top_n: int = TOP_OFFENDERS) -> dict[str, Any]:
+        return {
+            "dirty_records": int(self.dirty_records),
+            "total_violations": self.total_violations,
+            "rules": {
+                column: {
+                    "violations": int(violation_count),
+                    "top_offenders": [
+                        {"value": value, "count": int(count)}
+                        for value, count in self.offenders[column].most_common(top_n)
+                    ],
+                }
+                for column, violation_count in self.violations.items()
+            },
+        }
+
+
+def group_offenders(
+    report_groups: list[CategoricalReport],
+    column: str,
+    codes: np.ndarray,
+    groups: np.ndarray,
+    uniques: pd.Index,
+    invalid_uniques: np.ndarray,
+) -> None:
+    """Add one rule's violations to each group's report, from the counted rows' codes and group ids."""
+    invalid_positions = np.flatnonzero(invalid_uniques)
+    # Slot of each invalid unique; the last slot collects nulls (code -1).
+    slot = np.full(len(uniques) + 1, -1)
+    slot[invalid_positions] = np.arange(len(invalid_positions))
+    slot[-1] = len(invalid_positions)
+    row_slots = slot[codes]
+    violating = row_slots >= 0
+    slot_count = len(invalid_positions) + 1
+    counts = np.bincount(
+        groups[violating] * slot_count + row_slots[violating],
+        minlength=len(report_groups) * slot_count,
+    ).reshape(len(report_groups), slot_count)
+
+    for group, group_report in enumerate(report_groups):
+        offenders = Counter({
+            offender_value(uniques[position]): int(counts[group, index])
+            for index, position in enumerate(invalid_positions)
+            if counts[group, index]
+        })
+        if counts[group, -1]:
+            offenders[None] = int(counts[group, -1])
+        group_report.add_rule(column, int(sum(offenders.values())), offenders)
+
+
+def validate_categoricals(
+    checks: Iterable[tuple[str, pd.Series, tuple]],
+    row_count: int,
+    counted_rows: np.ndarray | None = None,
+    row_groups: np.ndarray | None = None,
+    group_count: int = 0,
+    rule_rows: dict[str, np.ndarray] | None = None,
+) -> tuple[np.ndarray, CategoricalReport, dict[str, pd.Categorical]]:
+    """Evaluate ``(column, values, allowed_values)`` rules in one pass per column.
+
+    Each checked column is factorized once; the allowed set is tested against
+    its distinct values only and mapped back to rows through the codes, and
+    violation counts come from a single ``bincount``. Null values violate a
+    rule, as they do with ``Series.isin``.
+
+    ``counted_rows`` restricts the counts in the report to rows that will be
+    kept (the dirty mask still covers every row). ``row_groups`` assigns each
+    row to one of ``group_count`` groups (its source file in a coalesced
+    batch); the report then also holds one report per group in ``groups``.
+    When ``rule_rows`` is given, each rule's own invalid-row mask is stored in
+    it under the column name.
+    Returns the combined dirty mask, the report, and Categorical versions of
+    the low-cardinality columns.
+    """
+    dirty_rows = np.zeros(row_count, dtype=bool)
+    report = CategoricalReport()
+    categoricals: dict[str, pd.Categorical] = {}
+    if row_groups is not None:
+        report.groups = [CategoricalReport() for _ in range(group_count)]
+        counted_groups = row_groups if counted_rows is None else row_groups[counted_rows]
+
+    for column, values, allowed_values in checks:
+        codes, uniques = factorize_column(values)
+        invalid_uniques = ~uniques.isin(allowed_values)
+        is_null = codes < 0
+        invalid_rows = is_null.copy()
+        if len(uniques):
+            invalid_rows |= invalid_uniques[codes]
+        dirty_rows |= invalid_rows
+        if rule_rows is not None:
+            rule_rows[column] = invalid_rows
+
+        counted_codes = codes if counted_rows is None else codes[counted_rows]
+        value_counts = np.bincount(counted_codes[counted_codes >= 0], minlength=len(uniques))
+        null_count = int((counted_codes < 0).sum())
+        offenders = Counter({
+            offender_value(uniques[position]): int(value_counts[position])
+            for position in np.flatnonzero(invalid_uniques & (value_counts > 0))
+        })
+        if null_count:
+            offenders[None] = null_count
+        report.add_rule(column, int(sum(offenders.values())), offenders)
+        if row_groups is not None:
+            group_offenders(report.groups, column, counted_codes, counted_groups, uniques, invalid_uniques)
+
+        # An all-null column stays as it is rather than becoming a Categorical without categories.
+        if not isinstance(values.dtype, pd.CategoricalDtype) and 0 < len(uniques) <= row_count * CATEGORICAL_MAX_UNIQUE_RATIO:
+            categoricals[column] = pd.Categorical.from_codes(codes, categories=uniques)
+
+    counted_dirty = dirty_rows if counted_rows is None else dirty_rows[counted_rows]
+    report.dirty_records = int(counted_dirty.sum())
+    if row_groups is not None:
+        group_dirty = np.bincount(counted_groups[counted_dirty], minlength=group_count)
+        for group_report, dirty_count in zip(report.groups, group_dirty):
+            group_report.dirty_records = int(dirty_count)
+    return dirty_rows, report, categoricals
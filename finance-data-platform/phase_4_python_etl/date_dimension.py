@@ -0,0 +1,109 @@
+"""Calendar rows for warehouse.dim_date, keyed by yyyymmdd."""
+
+from __future__ import annotations
+
+import datetime as dt
+from io import StringIO
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+DIM_DATE_COLUMNS = ("date_key", "date_actual", "year", "quarter", "month", "day", "day_of_week", "is_weekend")
+
+# True when every dim_date row carries its yyyymmdd key, so facts can compute
+# the key instead of joining; false for tables keyed by the old BIGSERIAL.
+DETERMINISTIC_KEYS_SQL = """
+    SELECT NOT EXISTS (
+        SELECT 1 FROM warehouse.dim_date
+        WHERE date_key <> to_char(date_actual, 'YYYYMMDD')::bigint
+    )
+"""
+
+CALENDAR_EXTENT_SQL = "SELECT min(date_actual), max(date_actual), count(*) FROM warehouse.dim_date"
+
+
+def date_key_sql(expression: str) -> str:
+    """SQL for the yyyymmdd key of a date expression."""
+    return f"to_char(({expression})::date, 'YYYYMMDD')::bigint"
+
+
+def date_keys(values: Any) -> pd.Series:
+    """yyyymmdd keys for a column of dates or timestamps, computed column-wise; nulls stay null.
+
+    Text is parsed as ISO 8601, so dates and timestamps can share a column.
+    """
+    dates = pd.to_datetime(pd.Series(values), errors="coerce", format="ISO8601")
+    keys = dates.dt.year * 10000 + dates.dt.month * 100 + dates.dt.day
+    return keys.astype("Int64")
+
+
+def calendar_frame(start: dt.date, end: dt.date) -> pd.DataFrame:
+    """One dim_date row per day from ``start`` to ``end`` inclusive."""
+    days = pd.date_range(start, end, freq="D")
+    day_of_week = days.dayofweek.to_numpy() + 1
+    return pd.DataFrame({
+        "date_key": date_keys(days).to_numpy(dtype=np.int64),
+        "date_actual": days.strftime("%Y-%m-%d"),
+        "year": days.year,
+        "quarter": days.quarter,
+        "month": days.month,
+        "day": days.day,
+        "day_of_week": day_of_week,
+        "is_weekend": np.where(day_of_week >= 6, "t", "f"),
+    }, columns=list(DIM_DATE_COLUMNS))
+
+
+def missing_ranges(start: dt.date, end: dt.date, extent: tuple[Any, Any, int]) -> list[tuple[dt.date, dt.date]]:
+    """Date ranges to generate so that dim_date covers ``start``..``end``.
+
+    A gap-free calendar only needs the days outside its current min..max. A
+    table with gaps (dates added one by one by older loads) gets the whole
+    range, and rows that already exist are skipped on insert.
+    """
+    first, last, row_count = extent
+    if first is None:
+        return [(start, end)]
+    if row_count != (last - first).days + 1:
+        return [(min(start, first), max(end, last))]
+    ranges = []
+    if start < first:
+        ranges.append((start, first - dt.timedelta(days=1)))
+    if end > last:
+        ranges.append((last + dt.timedelta(days=1), end))
+    return ranges
+
+
+def extend_calendar(conn: Any, start: dt.date, end: dt.date) -> int:
+    """Make dim_date cover ``start``..``end`` with one COPY and one INSERT; returns the rows added.
+
+    Does not commit.
+    """
+    with conn.cursor() as cur:
+        cur.execute(CALENDAR_EXTENT_SQL)
+        ranges = missing_ranges(start, end, cur.fetchone())
+        if not ranges:
+            return 0
+        frame = pd.concat([calendar_frame(first, last) for first, last in ranges], ignore_index=True)
+        buffer = StringIO()
+        frame.to_csv(buffer, index=False, header=False)
+        buffer.seek(0)
+
+        columns = ", ".join(DIM_DATE_COLUMNS)
+        cur.execute("DROP TABLE IF EXISTS pg_temp.wh_calendar")
+        cur.execute("CREATE TEMP TABLE wh_calendar (LIKE warehouse.dim_date INCLUDING DEFAULTS) ON COMMIT DROP")
+        cur.copy_expert(f"COPY wh_calendar ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+        cur.execute(
+            f"""
+            INSERT INTO warehouse.dim_date ({columns})
+            SELECT {columns} FROM wh_calendar
+            ON CONFLICT (date_actual) DO NOTHING
+            """
+        )
+        return cur.rowcount
+
+
+def has_deterministic_keys(conn: Any) -> bool:
+    with conn.cursor() as cur:
+        cur.execute(DETERMINISTIC_KEYS_SQL)
+        return bool(cur.fetchone()[0])
@@ -0,0 +1,228 @@
+"""Memory-lean dtypes for extracted staging frames, planned from the staging column types."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Mapping
+
+import numpy as np
+import pandas as pd
+
+from phase_4_python_etl.categorical_validation import CATEGORICAL_MAX_UNIQUE_RATIO
+
+TEXT_TYPES = frozenset({"character varying", "character", "text"})
+DATE_TYPES = frozenset({"date", "timestamp without time zone", "timestamp with time zone"})
+
+# Fixed formats tried, in order, on the first non-null values of a date
+# column. All are ISO 8601, so they parse exactly as the ISO8601 fallback would.
+DATE_FORMATS = (
+    "%Y-%m-%d",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%d %H:%M:%S.%f",
+    "%Y-%m-%dT%H:%M:%S.%f",
+)
+DATE_SAMPLE_ROWS = 100
+
+# A text column found to be mostly distinct in a frame of at least this many
+# rows (ids, emails, names) is not factorized again for that table.
+PLAN_MIN_ROWS = 10_000
+
+
+@dataclass
+class DtypeReport:
+    """Memory of the columns a plan changed, before and after, with their new dtypes."""
+
+    bytes_before: int = 0
+    bytes_after: int = 0
+    columns: dict[str, str] = field(default_factory=dict)
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.bytes_before - self.bytes_after
+
+    def add(self, column: str, before: pd.Series, after: pd.Series) -> None:
+        self.bytes_before += int(before.memory_usage(index=False, deep=True))
+        self.bytes_after += int(after.memory_usage(index=False, deep=True))
+        self.columns[column] = str(after.dtype)
+
+    def merge(self, other: "DtypeReport") -> "DtypeReport":
+        self.bytes_before += other.bytes_before
+        self.bytes_after += other.bytes_after
+        self.columns.update(other.columns)
+        return self
+
+    def to_metrics(self) -> dict[str, Any]:
+        return {
+            "bytes_before": self.bytes_before,
+            "bytes_after": self.bytes_after,
+            "bytes_saved": self.bytes_saved,
+            "columns": dict(sorted(self.columns.items())),
+        }
+
+
+# ----------------------------
+# COLUMN CONVERSIONS
+# ----------------------------
+def downcast_numbers(values: pd.Series) -> pd.Series | None:
+    """The smallest dtype that holds every value of a numeric column exactly, or None to keep it.
+
+    Integers take the narrowest integer type for their range. Floats become
+    float32 only when every value survives the round trip, as integral values
+    and halves do; prices with cents stay float64.
+    """
+    kind = values.dtype.kind
+    if kind in "iu":
+        narrow = pd.to_numeric(values, downcast="integer" if kind == "i" else "unsigned")
+        return narrow if narrow.dtype.itemsize < values.dtype.itemsize else None
+    if values.dtype == np.float64:
+        array = values.to_numpy()
+        narrow = array.astype(np.float32)
+        with np.errstate(over="ignore"):
+            exact = np.array_equal(narrow.astype(np.float64), array, equal_nan=True)
+        return pd.Series(narrow, index=values.index, name=values.name) if exact else None
+    return None
+
+
+def categorize(values: pd.Series) -> tuple[pd.Series | None, bool]:
+    """A Categorical of an object column with few distinct values, or None; also whether it was mostly distinct.
+
+    An all-null column has no categories and is left as it is.
+    """
+    codes, uniques = pd.factorize(values)
+    if len(uniques) == 0:
+        return None, False
+    if len(uniques) > CATEGORICAL_MAX_UNIQUE_RATIO * len(values):
+        return None, True
+    categorical = pd.Categorical.from_codes(codes, pd.Index(uniques, dtype=object))
+    return pd.Series(categorical, index=values.index, name=values.name), False
+
+
+def infer_date_format(values: pd.Series) -> str | None:
+    """The first of DATE_FORMATS that parses every sampled non-null value, or None."""
+    sample = values.iloc[:DATE_SAMPLE_ROWS * 10].dropna().iloc[:DATE_SAMPLE_ROWS]
+    if sample.empty or not all(isinstance(value, str) for value in sample):
+        return None
+    for date_format in DATE_FORMATS:
+        if pd.to_datetime(sample, format=date_format, errors="coerce").notna().all():
+            return date_format
+    return None
+
+
+def parse_dates(values: pd.Series, date_format: str) -> pd.Series | None:
+    """``values`` parsed with one fixed format, or None unless every non-null value parses."""
+    parsed = pd.to_datetime(values, format=date_format, errors="coerce")
+    return parsed if parsed.notna().sum() == values.notna().sum() else None
+
+
+def datetime_nanos(values: pd.Series) -> np.ndarray:
+    """Nanoseconds since the epoch of each value of a datetime column (UTC for tz-aware ones); NaT becomes the int64 minimum."""
+    return values.dt.as_unit("ns").array.asi8
+
+
+def timestamp_nanos(values: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+    """``datetime_nanos`` of each ISO 8601 string in ``values``, with a mask of the values that parsed."""
+    nanos = np.zeros(len(values), dtype=np.int64)
+    parsed = np.zeros(len(values), dtype=bool)
+    is_text = np.fromiter((isinstance(value, str) for value in values), dtype=bool, count=len(values))
+    if not is_text.any():
+        return nanos, parsed
+    try:
+        # As UTC, so offsets compare as instants and naive text matches naive datetime columns.
+        stamps = pd.to_datetime(values[is_text], format="ISO8601", errors="coerce", utc=True)
+    except (TypeError, ValueError):
+        # Values that cannot be read as one column stay text.
+        return nanos, parsed
+    valid = stamps.notna().to_numpy()
+    positions = np.flatnonzero(is_text)[valid]
+    nanos[positions] = datetime_nanos(stamps[valid])
+    parsed[positions] = True
+    return nanos, parsed
+
+
+# ----------------------------
+# PLANNER
+# ----------------------------
+class DtypePlanner:
+    """Per-table dtype decisions for extracted frames, learned from the frames seen so far.
+
+    Every change is lossless, so a planned frame validates, transforms, and
+    loads exactly like the raw one:
+    - integer and float columns are downcast when every value fits;
+    - object columns of text staging columns become Categoricals when at most
+      half their values are distinct;
+    - object or string columns of date and timestamp staging columns are
+      parsed with the fixed format their first values match, and only when
+      every value parses; otherwise the type coercion step flags the bad
+      values as before.
+    Arrow-backed string columns are already compact and stay as they are.
+    """
+
+    def __init__(self) -> None:
+        self.mostly_distinct: set[tuple[str, str]] = set()
+        self.date_formats: dict[tuple[str, str], str] = {}
+
+    def date_columns(self, table_key: str) -> tuple[str, ...]:
+        """Columns of ``table_key`` planned as dates, whose text cells should hash as timestamps."""
+        # A snapshot: coalesced files are planned on reader threads.
+        return tuple(column for table, column in list(self.date_formats) if table == table_key)
+
+    def apply(self, df: pd.DataFrame, table_key: str, column_types: Mapping[str, str]) -> tuple[pd.DataFrame, DtypeReport]:
+        """Replace the planned columns of ``df`` in place and report the memory they took before and after."""
+        report = DtypeReport()
+        for column in df.columns:
+            values = df[column]
+            planned = self.plan_column(table_key, column, column_types.get(column), values)
+            if planned is None:
+                continue
+            report.add(column, values, planned)
+            df[column] = planned
+        return df, report
+
+    def plan_column(self, table_key: str, column: str, data_type: str | None, values: pd.Series) -> pd.Series | None:
+        if pd.api.types.is_bool_dtype(values):
+            return None
+        if values.dtype.kind in "iuf":
+            return downcast_numbers(values)
+        if data_type in DATE_TYPES and (values.dtype == object or isinstance(values.dtype, pd.StringDtype)):
+            return self.plan_dates(table_key, column, values)
+        if data_type in TEXT_TYPES and values.dtype == object and (table_key, column) not in self.mostly_distinct:
+            categorical, mostly_distinct = categorize(values)
+            if mostly_distinct and len(values) >= PLAN_MIN_ROWS:
+                self.mostly_distinct.add((table_key, column))
+            return categorical
+        return None
+
+    def plan_dates(self, table_key: str, column: str, values: pd.Series) -> pd.Series | None:
+        key = (table_key, column)
+        date_format = self.date_formats.get(key)
+        parsed = parse_dates(values, date_format) if date_format else None
+        if parsed is None:
+            # First values for this column, or a frame written in another format.
+            inferred = infer_date_format(values)
+            if inferred is None or inferred == date_format:
+                return None
+            self.date_formats[key] = inferred
+            parsed = parse_dates(values, inferred)
+        return parsed
+
+
+def concat_frames(frames: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """``pd.concat`` that keeps a column categorical when it is categorical in every frame.
+
+    Plain concatenation turns Categoricals with different categories into
+    object columns; here their categories are unioned instead.
+    """
+    frames = list(frames)
+    shared = [
+        column
+        for column in frames[0].columns
+        if all(column in frame.columns and isinstance(frame[column].dtype, pd.CategoricalDtype) for frame in frames)
+    ] if frames else []
+    if len(frames) > 1 and shared:
+        frames = [frame.copy(deep=False) for frame in frames]
+        for column in shared:
+            categories = pd.api.types.union_categoricals([frame[column] for frame in frames]).categories
+            for frame in frames:
+                frame[column] = frame[column].cat.set_categories(categories)
+    return pd.concat(frames, ignore_index=True)
@@ -2,24 +2,65 @@
 
 from __future__ import annotations
 
+import argparse
 import json
+import multiprocessing
 import os
 import re
 import sys
-from io import BytesIO
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from io import StringIO
 from pathlib import Path
 from time import perf_counter
 
 import boto3
+import numpy as np
 import pandas as pd
 import psycopg2
+from psycopg2 import errors as pg_errors
+from psycopg2.extensions import quote_ident
 from psycopg2.extras import execute_values
+from psycopg2.pool import ThreadedConnectionPool
 
 CURRENT_DIR = Path(__file__).resolve().parent
 PROJECT_ROOT = CURRENT_DIR.parent
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
+from phase_4_python_etl.categorical_validation import CategoricalReport, validate_categoricals
+from phase_4_python_etl.dtype_planning import DtypePlanner, DtypeReport, concat_frames, datetime_nanos, timestamp_nanos
+from phase_4_python_etl.file_readers import PARSE_ENGINES, READERS, RowFilter, find_reader, get_reader, supported_extensions
+from phase_4_python_etl.load_ledger import (
+    ensure_ledger_table,
+    fetch_loaded_keys,
+    normalize_etag,
+    record_loaded_objects,
+    split_unchanged,
+)
+from phase_4_python_etl.prefetch import Prefetcher
+from phase_4_python_etl.quality_rules import DEFAULT_RULES_PATH, RuleReport, evaluate_rules, load_rules
+from phase_4_python_etl.profiling import TableProfile, ensure_profile_table, load_profiles, profile_drift, save_profiles
+from phase_4_python_etl.quarantine import (
+    FILE_VALIDATION_RULE,
+    QUARANTINE_COLUMNS,
+    QUARANTINE_TABLE,
+    RULE_COLUMN,
+    ensure_quarantine_table,
+    export_run,
+    fetch_pending,
+    mark_replayed,
+    new_run_id,
+    quarantine_frame,
+    rejected_rows,
+    rule_labels,
+    update_rules,
+)
+from phase_4_python_etl.schema_cache import StagingSchemaCache
+from phase_4_python_etl.stage_metrics import StageMetrics, bytes_consumed
 from phase_8_monitoring_logging.logging.logging_config import configure_pipeline_logger, log_quality_metrics
 
 
@@ -51,9 +92,62 @@ WAREHOUSE_CONN = os.getenv(
 )
 INCREMENTAL = os.getenv('INCREMENTAL', 'false').lower() == 'true'
 CURRENT_RUN_STAGING_KEYS = os.getenv('CURRENT_RUN_STAGING_KEYS', '')
+# 1 keeps the original single-connection loop; >1 enables the worker-pool engine.
+ETL_WORKERS = max(1, int(os.getenv('ETL_WORKERS', '1')))
+# 'copy' streams rows through COPY into a temp table; 'execute_values' is the original path.
+ETL_LOAD_MODE = os.getenv('ETL_LOAD_MODE', 'copy').lower()
+COPY_BATCH_ROWS = int(os.getenv('COPY_BATCH_ROWS', '50000'))
+LOAD_MODES = ('copy', 'execute_values')
+if ETL_LOAD_MODE not in LOAD_MODES:
+    raise ValueError(f"ETL_LOAD_MODE must be one of {LOAD_MODES}, got {ETL_LOAD_MODE!r}")
+# Rows per chunk for the streaming CSV/JSON path; 0 reads each file whole.
+ETL_CHUNK_ROWS = max(0, int(os.getenv('ETL_CHUNK_ROWS', '0')))
+# 'pandas' keeps the original CSV/JSON parsers; 'arrow' parses with pyarrow into Arrow-backed string columns.
+ETL_PARSE_ENGINE = os.getenv('ETL_PARSE_ENGINE', 'pandas').lower()
+if ETL_PARSE_ENGINE not in PARSE_ENGINES:
+    raise ValueError(f"ETL_PARSE_ENGINE must be one of {PARSE_ENGINES}, got {ETL_PARSE_ENGINE!r}")
+# Staging objects downloaded ahead of the file being processed by the serial engine; 0 disables read-ahead.
+ETL_PREFETCH_DEPTH = max(0, int(os.getenv('ETL_PREFETCH_DEPTH', '2')))
+# Ceiling for prefetched bodies held in memory; objects above the spill size go to ETL_PREFETCH_SPILL_DIR.
+ETL_PREFETCH_MEMORY_MB = max(1, int(os.getenv('ETL_PREFETCH_MEMORY_MB', '256')))
+ETL_PREFETCH_SPILL_MB = max(1, int(os.getenv('ETL_PREFETCH_SPILL_MB', '64')))
+ETL_PREFETCH_SPILL_DIR = os.getenv('ETL_PREFETCH_SPILL_DIR', '')
+# When loaded rows are committed: 'file' commits each file on its own, 'rows' once at least
+# ETL_COMMIT_ROWS rows are pending, 'table' once per table group. Files are isolated by savepoints.
+ETL_COMMIT_POLICY = os.getenv('ETL_COMMIT_POLICY', 'file').lower()
+ETL_COMMIT_ROWS = max(1, int(os.getenv('ETL_COMMIT_ROWS', '100000')))
+COMMIT_POLICIES = ('file', 'rows', 'table')
+if ETL_COMMIT_POLICY not in COMMIT_POLICIES:
+    raise ValueError(f"ETL_COMMIT_POLICY must be one of {COMMIT_POLICIES}, got {ETL_COMMIT_POLICY!r}")
+# Rows per coalesced batch of small files for one table; 0 loads every file on its own.
+ETL_COALESCE_ROWS = max(0, int(os.getenv('ETL_COALESCE_ROWS', '0')))
+# Only objects up to this size (from the listing or head_object) are coalesced.
+ETL_COALESCE_MAX_BYTES = max(0, int(os.getenv('ETL_COALESCE_MAX_BYTES', str(4 * 1024 * 1024))))
+ETL_COALESCE_READERS = max(1, int(os.getenv('ETL_COALESCE_READERS', '8')))
+# Optional JSON file that lets later runs reuse the staging catalog until its DDL changes.
+SCHEMA_CACHE_PATH = os.getenv('SCHEMA_CACHE_PATH', '')
+# Keep dirty rows and the rows of files that fail validation in
+# staging.etl_quarantine, labelled with the rule they failed, instead of only
+# counting them. ETL_QUARANTINE_PATH (a local directory or s3://bucket/prefix)
+# also receives each run's quarantined rows as zstd Parquet.
+ETL_QUARANTINE = os.getenv('ETL_QUARANTINE', 'false').lower() == 'true'
+ETL_QUARANTINE_PATH = os.getenv('ETL_QUARANTINE_PATH', '')
+ETL_QUARANTINE_REPLAY_ROWS = max(1, int(os.getenv('ETL_QUARANTINE_REPLAY_ROWS', '50000')))
+# Per-column sketches (distinct counts, quantiles, min/max, null ratio) built
+# in the quality pass and kept per table in staging.etl_table_profiles.
+ETL_PROFILE = os.getenv('ETL_PROFILE', 'true').lower() == 'true'
+# Declarative row rules (quality_rules.py); an empty value turns them off.
+ETL_QUALITY_RULES = os.getenv('ETL_QUALITY_RULES', str(DEFAULT_RULES_PATH))
+# Downcast numbers, categorize repetitive text columns, and parse dates with a
+# fixed format as each frame is extracted (dtype_planning.py).
+ETL_DTYPE_PLAN = os.getenv('ETL_DTYPE_PLAN', 'true').lower() == 'true'
+RUN_ID = new_run_id()
 
 s3 = boto3.client('s3')
 
+SCHEMA_CACHE = StagingSchemaCache(SCHEMA_CACHE_PATH or None)
+DTYPE_PLANNER = DtypePlanner()
+
 QUALITY_RULES = {
     'stg_customers': {'required_columns': ['customer_id', 'email'], 'critical_columns': ['customer_id']},
     'stg_dealers': {'required_columns': ['dealer_id'], 'critical_columns': ['dealer_id']},
@@ -67,14 +161,14 @@ QUALITY_RULES = {
     'stg_telemetry': {'required_columns': ['telemetry_id', 'timestamp'], 'critical_columns': ['telemetry_id', 'timestamp']},
 }
 
+# Range, regex, enum, compare, and unique rules per table, compiled from the
+# ETL_QUALITY_RULES spec at import so a bad spec fails before any file is read.
+ROW_QUALITY_RULES = load_rules(ETL_QUALITY_RULES) if ETL_QUALITY_RULES else {}
+
 
 def detect_file_type(key):
-    extension_map = {
-        '.csv': 'CSV',
-        '.json': 'JSON',
-        '.xlsx': 'Excel',
-    }
-    return extension_map.get(Path(key).suffix.lower(), 'Unknown')
+    reader = READERS.get(Path(key).suffix.lower())
+    return reader.file_type if reader is not None else 'Unknown'
 
 
 # ----------------------------
@@ -124,208 +218,550 @@ def parse_current_run_staging_keys():
         LOGGER.warning('CURRENT_RUN_STAGING_KEYS must be a list. Falling back to full staging scan.')
         return []
 
-    return [key for key in parsed if isinstance(key, str) and key.endswith(('.csv', '.json', '.xlsx'))]
+    return [key for key in parsed if isinstance(key, str) and key.lower().endswith(supported_extensions())]
+
 
+def list_staging_objects():
+    """Return {key: (etag, size) or None} for the staged files, in processing order.
 
-def list_staging_files():
+    A full bucket scan gets each object's ETag and size from the listing; keys
+    handed over by the current DAG run map to None until ``resolve_object_versions``.
+    """
     current_run_keys = parse_current_run_staging_keys()
     if current_run_keys:
         LOGGER.info("Using %s staged file(s) from the current DAG run.", len(current_run_keys))
-        return current_run_keys
+        return OrderedDict((key, None) for key in current_run_keys)
 
     paginator = s3.get_paginator('list_objects_v2')
-    files = []
+    objects = OrderedDict()
 
     for page in paginator.paginate(Bucket=STAGING_BUCKET):
-        files.extend([obj['Key'] for obj in page.get('Contents', [])])
+        for obj in page.get('Contents', []):
+            if obj['Key'].lower().endswith(supported_extensions()):
+                objects[obj['Key']] = (normalize_etag(obj.get('ETag')), int(obj.get('Size', 0)))
+
+    LOGGER.info("Found %s valid staging file(s).", len(objects))
+    return objects
+
+
+def resolve_object_versions(objects):
+    """Fill in missing (etag, size) pairs with one HEAD request per key."""
+    versions = {}
+    for key, version in objects.items():
+        if version is None:
+            try:
+                head = s3.head_object(Bucket=STAGING_BUCKET, Key=key)
+            except Exception as exc:
+                # Extraction reports the real error; the key just bypasses the ledger.
+                LOGGER.warning("Could not read staging object version | file_name=%s | error=%s", key, exc)
+                continue
+            version = (normalize_etag(head.get('ETag')), int(head.get('ContentLength', 0)))
+        versions[key] = version
+    return versions
 
-    valid = [f for f in files if f.endswith(('.csv', '.json', '.xlsx'))]
 
-    LOGGER.info("Found %s valid staging file(s).", len(valid))
-    return valid
+def skip_loaded_objects(files, object_versions):
+    """Drop keys whose current version is already in the load ledger (one batched query)."""
+    conn = psycopg2.connect(WAREHOUSE_CONN)
+    try:
+        ensure_ledger_table(conn)
+        loaded_keys = fetch_loaded_keys(conn, object_versions)
+    finally:
+        conn.close()
+
+    to_load, unchanged = split_unchanged(files, loaded_keys)
+    for key in unchanged:
+        LOGGER.info("Skipping unchanged staging object | file_name=%s | etag=%s", key, object_versions[key][0])
+    return to_load, unchanged
 
 
 # ----------------------------
 # EXTRACT
 # ----------------------------
-def extract_file(key):
-    obj = s3.get_object(Bucket=STAGING_BUCKET, Key=key)
+def open_staging_object(key):
+    return s3.get_object(Bucket=STAGING_BUCKET, Key=key)['Body']
 
-    if key.endswith('.csv'):
-        return pd.read_csv(obj['Body'])
 
-    if key.endswith('.json'):
-        return pd.json_normalize(json.load(obj['Body']))
+def extract_file(key, columns=None, row_filter=None, body=None):
+    """Read one staged object whole through its registered reader.
 
-    if key.endswith('.xlsx'):
-        return pd.read_excel(BytesIO(obj['Body'].read()))
+    ``columns`` and ``row_filter`` are pushed down by readers that support
+    them (Parquet); the others return every column and row. ``body`` is an
+    already downloaded copy of the object (see ``new_prefetcher``).
+    """
+    reader = get_reader(key, ETL_PARSE_ENGINE)
+    return reader.read(open_staging_object(key) if body is None else body, columns, row_filter)
 
-    raise ValueError(f"Unsupported file format: {key}")
 
+def is_streamable(key):
+    reader = find_reader(key, ETL_PARSE_ENGINE)
+    return ETL_CHUNK_ROWS > 0 and reader is not None and reader.iter_chunks is not None
 
-def normalize_column_aliases(df, table_key):
-    column_aliases = {
-        'stg_customers': {
-            'created_date': 'created_at',
-            'zip': 'zip_code',
-        },
-        'stg_interactions': {
-            'type': 'interaction_type',
-            'timestamp': 'interaction_date',
-            'created_date': 'interaction_date',
-            'subject': 'notes',
-        },
-        'stg_payments': {
-            'transaction_id': 'payment_id',
-            'transaction_date': 'payment_date',
-            'payment_amount': 'amount',
-            'payment_status': 'status',
-        },
-        'stg_suppliers': {
-            'contact_person': 'contact_name',
-            'email': 'contact_email',
-            'phone': 'contact_phone',
-            'zip': 'zip_code',
-            'created_date': 'created_at',
-        },
-        'stg_procurement': {
-            'po_id': 'procurement_id',
-            'vendor_id': 'supplier_id',
-            'po_date': 'procurement_date',
-            'amount': 'cost',
-            'procurement_status': 'status',
-        },
-        'stg_telemetry': {
-            'device_id': 'telemetry_id',
-            'reading_type': 'sensor_type',
-            'reading_value': 'sensor_value',
-        },
+
+def iter_file_chunks(key, chunk_rows, columns=None, row_filter=None, body=None):
+    reader = get_reader(key, ETL_PARSE_ENGINE)
+    if reader.iter_chunks is None:
+        raise ValueError(f"Unsupported streaming file format: {key}")
+
+    yield from reader.iter_chunks(open_staging_object(key) if body is None else body, chunk_rows, columns, row_filter)
+
+
+def new_prefetcher(files, object_versions=None, groups=1):
+    """Start reading ahead the mapped keys in ``files``, or return None when prefetch is disabled.
+
+    ``groups`` prefetchers running at once split ETL_PREFETCH_MEMORY_MB evenly.
+    """
+    if ETL_PREFETCH_DEPTH == 0:
+        return None
+    keys = []
+    for key in files:
+        try:
+            resolve_table_key(key)
+        except ValueError:
+            continue
+        keys.append(key)
+    return Prefetcher(
+        keys,
+        open_staging_object,
+        depth=ETL_PREFETCH_DEPTH,
+        memory_limit_bytes=ETL_PREFETCH_MEMORY_MB * 1024 * 1024 // max(1, groups),
+        spill_threshold_bytes=ETL_PREFETCH_SPILL_MB * 1024 * 1024,
+        spill_dir=ETL_PREFETCH_SPILL_DIR,
+        sizes={key: version[1] for key, version in (object_versions or {}).items()},
+    )
+
+
+COLUMN_ALIASES = {
+    'stg_customers': {
+        'created_date': 'created_at',
+        'zip': 'zip_code',
+    },
+    'stg_interactions': {
+        'type': 'interaction_type',
+        'timestamp': 'interaction_date',
+        'created_date': 'interaction_date',
+        'subject': 'notes',
+    },
+    'stg_payments': {
+        'transaction_id': 'payment_id',
+        'transaction_date': 'payment_date',
+        'payment_amount': 'amount',
+        'payment_status': 'status',
+    },
+    'stg_suppliers': {
+        'contact_person': 'contact_name',
+        'email': 'contact_email',
+        'phone': 'contact_phone',
+        'zip': 'zip_code',
+        'created_date': 'created_at',
+    },
+    'stg_procurement': {
+        'po_id': 'procurement_id',
+        'vendor_id': 'supplier_id',
+        'po_date': 'procurement_date',
+        'amount': 'cost',
+        'procurement_status': 'status',
+    },
+    'stg_telemetry': {
+        'device_id': 'telemetry_id',
+        'reading_type': 'sensor_type',
+        'reading_value': 'sensor_value',
+    },
+}
+
+STATUS_MAPS = {
+    'stg_payments': {
+        'completed': 'Paid',
+        'paid': 'Paid',
+        'pending': 'Pending',
+        'failed': 'Failed',
+        'cancelled': 'Failed',
+        'canceled': 'Failed',
+        'refunded': 'Refunded',
+    },
+    'stg_procurement': {
+        'ordered': 'Ordered',
+        'received': 'Received',
+        'returned': 'Returned',
+        'pending': 'Ordered',
+        'completed': 'Received',
+    },
+}
+
+# Categorical field validation - 16 business rule constraints
+CATEGORICAL_RULES = {
+    'gender': ['M', 'F', 'Other'],
+    'status': ['Active', 'Inactive', 'Pending', 'Closed'],
+    'province': ['AB', 'BC', 'MB', 'NB', 'NL', 'NS', 'NT', 'NU', 'ON', 'PE', 'QC', 'SK', 'YT'],
+    'engine_type': ['Gasoline', 'Diesel', 'Electric', 'Hybrid', 'Plug-in Hybrid'],
+    'transmission': ['Manual', 'Automatic', 'CVT'],
+    'vehicle_status': ['Available', 'Sold', 'Reserved', 'Damaged'],
+    'sale_channel': ['Dealership', 'Online', 'Auction', 'Private'],
+    'sale_status': ['Completed', 'Pending', 'Cancelled'],
+    'stock_status': ['In Stock', 'Out of Stock', 'Coming Soon'],
+    'interaction_type': ['Phone', 'Email', 'Chat', 'In-Person'],
+    'interaction_channel': ['Sales', 'Support', 'Marketing'],
+    'outcome': ['Won', 'Lost', 'Pending', 'Cancelled'],
+    'payment_method': ['Credit Card', 'Debit Card', 'Check', 'Bank Transfer'],
+    'payment_status': ['Paid', 'Pending', 'Failed', 'Refunded'],
+    'procurement_status': ['Ordered', 'Received', 'Returned'],
+}
+
+TABLE_CATEGORICAL_OVERRIDES = {
+    'stg_payments': {'status': ['Paid', 'Pending', 'Failed', 'Refunded']},
+    'stg_procurement': {'status': ['Ordered', 'Received', 'Returned']},
+}
+
+DATETIME_COLUMNS = ('date_of_birth', 'sale_date')
+NUMERIC_COLUMN_MARKERS = ('price', 'amount')
+
+
+@dataclass(frozen=True)
+class TransformPlan:
+    """Column decisions for one (table_key, input column set), made once and reused.
+
+    The alias fields describe ``normalize_column_aliases`` for the input
+    columns; the remaining fields describe ``transform`` for the columns that
+    exist after aliasing, so no rule dictionary or substring scan is rebuilt
+    per file.
+    """
+
+    table_key: str
+    rename_map: dict
+    derive_first_name: bool
+    derive_last_name: bool
+    status_map: dict | None
+    normalized_columns: tuple
+    email_column: bool
+    datetime_columns: tuple
+    numeric_columns: tuple
+    categorical_checks: tuple
+    quality_rules: tuple
+
+
+@lru_cache(maxsize=512)
+def compile_transform_plan(table_key, columns):
+    aliases = COLUMN_ALIASES.get(table_key, {})
+    rename_map = {
+        source_name: target_name
+        for source_name, target_name in aliases.items()
+        if source_name in columns and target_name not in columns
     }
+    normalized_columns = tuple(rename_map.get(column, column) for column in columns)
+
+    has_name = table_key == 'stg_customers' and 'name' in normalized_columns
+    derive_first_name = has_name and 'first_name' not in normalized_columns
+    derive_last_name = has_name and 'last_name' not in normalized_columns
+    if derive_first_name:
+        normalized_columns += ('first_name',)
+    if derive_last_name:
+        normalized_columns += ('last_name',)
+
+    status_map = STATUS_MAPS.get(table_key) if 'status' in normalized_columns else None
+
+    rules = {**CATEGORICAL_RULES, **TABLE_CATEGORICAL_OVERRIDES.get(table_key, {})}
+    categorical_checks = tuple(
+        (column, tuple(allowed_values))
+        for column, allowed_values in rules.items()
+        if column in normalized_columns
+    )
+
+    return TransformPlan(
+        table_key=table_key,
+        rename_map=rename_map,
+        derive_first_name=derive_first_name,
+        derive_last_name=derive_last_name,
+        status_map=status_map,
+        normalized_columns=normalized_columns,
+        email_column='email' in normalized_columns,
+        datetime_columns=tuple(column for column in DATETIME_COLUMNS if column in normalized_columns),
+        numeric_columns=tuple(
+            column
+            for column in normalized_columns
+            if isinstance(column, str) and any(marker in column for marker in NUMERIC_COLUMN_MARKERS)
+        ),
+        categorical_checks=categorical_checks,
+        quality_rules=tuple(
+            rule
+            for rule in ROW_QUALITY_RULES.get(table_key, ())
+            if all(column in normalized_columns for column in rule.referenced_columns)
+        ),
+    )
 
-    aliases = column_aliases.get(table_key, {})
-    if not aliases:
-        return df
-
-    rename_map = {}
-    for source_name, target_name in aliases.items():
-        if source_name in df.columns and target_name not in df.columns:
-            rename_map[source_name] = target_name
-
-    if rename_map:
-        df = df.rename(columns=rename_map)
-
-    if table_key == 'stg_customers' and 'name' in df.columns:
-        if 'first_name' not in df.columns:
-            df['first_name'] = df['name'].astype(str).str.split().str[0]
-        if 'last_name' not in df.columns:
-            df['last_name'] = df['name'].astype(str).str.split().str[1:].str.join(' ')
-
-    if table_key == 'stg_payments' and 'status' in df.columns:
-        payment_status_map = {
-            'completed': 'Paid',
-            'paid': 'Paid',
-            'pending': 'Pending',
-            'failed': 'Failed',
-            'cancelled': 'Failed',
-            'canceled': 'Failed',
-            'refunded': 'Refunded',
-        }
-        normalized = df['status'].astype(str).str.strip().str.lower().map(payment_status_map)
-        df['status'] = normalized.fillna(df['status'])
 
-    if table_key == 'stg_procurement' and 'status' in df.columns:
-        procurement_status_map = {
-            'ordered': 'Ordered',
-            'received': 'Received',
-            'returned': 'Returned',
-            'pending': 'Ordered',
-            'completed': 'Received',
-        }
-        normalized = df['status'].astype(str).str.strip().str.lower().map(procurement_status_map)
+def get_transform_plan(df, table_key):
+    return compile_transform_plan(table_key, tuple(df.columns))
+
+
+def projection_columns(table_key, column_types):
+    """File columns worth reading for a table: its staging columns plus the aliases and name source that feed them."""
+    if not column_types:
+        return None
+    columns = set(column_types)
+    columns.update(source for source, target in COLUMN_ALIASES.get(table_key, {}).items() if target in column_types)
+    for rule in ROW_QUALITY_RULES.get(table_key, ()):
+        columns.update(rule.referenced_columns)
+    if table_key == 'stg_customers':
+        columns.add('name')
+    return frozenset(columns)
+
+
+def is_arrow_string(values):
+    return isinstance(values.dtype, pd.StringDtype) and values.dtype.storage == 'pyarrow'
+
+
+def as_text(values):
+    """String view of a column; Arrow-backed strings are used as-is so nulls stay null."""
+    return values if is_arrow_string(values) else values.astype(str)
+
+
+def normalize_column_aliases(df, table_key):
+    plan = get_transform_plan(df, table_key)
+
+    if plan.rename_map:
+        df = df.rename(columns=plan.rename_map)
+
+    if plan.derive_first_name:
+        df['first_name'] = as_text(df['name']).str.split().str[0]
+    if plan.derive_last_name:
+        df['last_name'] = as_text(df['name']).str.split().str[1:].str.join(' ')
+
+    if plan.status_map is not None:
+        normalized = as_text(df['status']).str.strip().str.lower().map(plan.status_map)
         df['status'] = normalized.fillna(df['status'])
 
     return df
 
 
+def plan_dtypes(df, table_key, column_types):
+    """Give a normalized frame its planned dtypes in place; returns it with a ``DtypeReport``.
+
+    Runs right after extraction, before anything else holds the raw columns,
+    so the object arrays they replace are freed at once. With ETL_DTYPE_PLAN
+    off the frame is returned unchanged with an empty report.
+    """
+    if not ETL_DTYPE_PLAN:
+        return df, DtypeReport()
+    return DTYPE_PLANNER.apply(df, table_key, column_types)
+
+
+def planned_date_columns(table_key):
+    return DTYPE_PLANNER.date_columns(table_key) if ETL_DTYPE_PLAN else ()
+
+
 # ----------------------------
 # TRANSFORM
 # ----------------------------
-def transform(df, table_key):
-    df = df.drop_duplicates()
+def transform(
+    df,
+    table_key,
+    categorical_report=None,
+    duplicate_rows=None,
+    row_groups=None,
+    group_reports=None,
+    rule_report=None,
+    group_rule_reports=None,
+    quarantine=None,
+):
+    """Clean one normalized frame; categorical rule violations are merged into ``categorical_report`` when given.
+
+    ``duplicate_rows`` is the mask from the quality check on the same frame;
+    when it is passed the rows are not hashed again for ``drop_duplicates()``.
+    For a coalesced batch, ``row_groups`` (a Series on the frame's index) holds
+    each row's file position, and the violations of file ``i`` are merged into
+    ``group_reports[i]``. Quality rule violations go to ``rule_report`` and
+    ``group_rule_reports`` the same way; a ``rule_report`` kept across the
+    chunks of one file also carries the keys its unique rules have seen.
+    ``quarantine`` overrides ETL_QUARANTINE for the rule labels.
+    """
+    if duplicate_rows is None:
+        df = df.drop_duplicates()
+    elif duplicate_rows.any():
+        df = df[~duplicate_rows]
     df = df.dropna(how='all')
     df = normalize_column_aliases(df, table_key)
+    groups = None if row_groups is None else row_groups.reindex(df.index).to_numpy()
+    df, report, rules_report = apply_transform_plan(
+        df,
+        get_transform_plan(df, table_key),
+        groups,
+        len(group_reports or ()),
+        None if rule_report is None else rule_report.seen,
+        quarantine,
+    )
+    if categorical_report is not None:
+        categorical_report.merge(report)
+    for group_report, report_group in zip(group_reports or (), report.groups):
+        group_report.merge(report_group)
+    if rule_report is not None:
+        rule_report.merge(rules_report)
+    for group_report, report_group in zip(group_rule_reports or (), rules_report.groups):
+        group_report.merge(report_group)
+    return df
+
+
+def apply_transform_plan(df, plan, row_groups=None, group_count=0, rule_seen=None, quarantine=None):
+    """Apply a compiled plan in one pass, then write every changed column once.
+
+    Per column: trim string-dtype values, lowercase email, and parse the
+    planned datetime and numeric columns. All categorical rules are then
+    evaluated together by ``validate_categoricals``, and the plan's quality
+    rules by ``evaluate_rules``, on the parsed values. Both feed one
+    ``is_dirty`` mask and per-rule reports counted over the rows that are
+    kept; with ETL_QUARANTINE (or ``quarantine``) each dirty row is also
+    labelled with the first rule it fails. Low-cardinality rule columns are
+    written back as Categoricals. Rows without an '@' in email are dropped
+    only after all columns are computed, which gives the same result as
+    filtering first. ``rule_seen`` holds the keys unique rules saw in earlier
+    chunks of the file.
+
+    Returns the transformed frame, its ``CategoricalReport``, and its
+    ``RuleReport`` (each with one report per group when ``row_groups`` is
+    given).
+    """
+    if quarantine is None:
+        quarantine = ETL_QUARANTINE
+    updates = {}
+    keep_rows = None
+    datetime_columns = set(plan.datetime_columns)
+    numeric_columns = set(plan.numeric_columns)
+
+    for column in plan.normalized_columns:
+        values = df[column]
+        changed = False
+
+        # Trim whitespace (Arrow-backed strings are stripped in place, keeping nulls)
+        if isinstance(values.dtype, pd.StringDtype):
+            values = as_text(values).str.strip()
+            changed = True
+
+        # Normalize email
+        if column == 'email' and plan.email_column:
+            values = values.str.lower()
+            keep_rows = values.str.contains('@', na=False).to_numpy(dtype=bool)
+            changed = True
+
+        if column in datetime_columns:
+            values = pd.to_datetime(values, errors='coerce')
+            changed = True
+        elif column in numeric_columns:
+            values = pd.to_numeric(values, errors='coerce')
+            changed = True
+
+        if changed:
+            updates[column] = values
+
+    checks = [
+        (column, updates.get(column, df[column]), allowed_values)
+        for column, allowed_values in plan.categorical_checks
+    ]
+    rule_rows = {} if quarantine else None
+    dirty_rows, report, categoricals = validate_categoricals(
+        checks,
+        len(df),
+        counted_rows=keep_rows,
+        row_groups=row_groups,
+        group_count=group_count,
+        rule_rows=rule_rows,
+    )
+    quality_rule_rows = {} if quarantine else None
+    rule_dirty_rows, rules_report = evaluate_rules(
+        plan.quality_rules,
+        lambda column: updates.get(column, df[column]),
+        len(df),
+        counted_rows=keep_rows,
+        row_groups=row_groups,
+        group_count=group_count,
+        seen=rule_seen,
+        rule_rows=quality_rule_rows,
+    )
+    dirty_rows |= rule_dirty_rows
+    if rule_rows is not None:
+        updates[RULE_COLUMN] = rule_labels(
+            len(df),
+            [(f'categorical:{column}', rows) for column, rows in rule_rows.items()]
+            + [(f'rule:{name}', rows) for name, rows in quality_rule_rows.items()],
+        )
+    for column, categorical in categoricals.items():
+        updates[column] = pd.Series(categorical, index=df.index)
+
+    # Add is_dirty flag for tracking data quality issues
+    if 'is_dirty' in df.columns:
+        updates['is_dirty'] = df['is_dirty'].mask(dirty_rows, True) if dirty_rows.any() else df['is_dirty']
+    else:
+        updates['is_dirty'] = dirty_rows
 
-    # Trim whitespace
-    for col in df.select_dtypes(include='string').columns:
-        df[col] = df[col].astype(str).str.strip()
+    df = df.assign(**updates)
+    if keep_rows is not None:
+        df = df[keep_rows]
+    return df, report, rules_report
 
-    # Normalize email
-    if 'email' in df.columns:
-        df['email'] = df['email'].str.lower()
-        df = df[df['email'].str.contains('@', na=False)]
 
-    if 'date_of_birth' in df.columns:
-        df['date_of_birth'] = pd.to_datetime(df['date_of_birth'], errors='coerce')
+def evaluate_data_quality(df, table_key, target_columns, profile=None):
+    """Return the quality metrics for one frame and its duplicate-row mask.
 
-    if 'sale_date' in df.columns:
-        df['sale_date'] = pd.to_datetime(df['sale_date'], errors='coerce')
+    Duplicates come from the same row hashes the streaming path uses, and the
+    mask is handed to ``transform()`` so rows are not hashed a second time.
+    A ``profile`` (see ``new_table_profile``) is filled from the same hashes.
+    """
+    accumulator = QualityAccumulator(quality_key_columns(table_key), profile, duplicate_check_columns(table_key, target_columns))
+    duplicate_rows = accumulator.add(df, planned_date_columns(table_key))
+    return accumulator.metrics(table_key, target_columns), duplicate_rows
 
-    # Numeric clean
-    for col in df.columns:
-        if 'price' in col or 'amount' in col:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
 
-    # Add is_dirty flag for tracking data quality issues
-    if 'is_dirty' not in df.columns:
-        df['is_dirty'] = False
-
-    # Categorical field validation - 16 business rule constraints
-    categorical_rules = {
-        'gender': ['M', 'F', 'Other'],
-        'status': ['Active', 'Inactive', 'Pending', 'Closed'],
-        'province': ['AB', 'BC', 'MB', 'NB', 'NL', 'NS', 'NT', 'NU', 'ON', 'PE', 'QC', 'SK', 'YT'],
-        'engine_type': ['Gasoline', 'Diesel', 'Electric', 'Hybrid', 'Plug-in Hybrid'],
-        'transmission': ['Manual', 'Automatic', 'CVT'],
-        'vehicle_status': ['Available', 'Sold', 'Reserved', 'Damaged'],
-        'sale_channel': ['Dealership', 'Online', 'Auction', 'Private'],
-        'sale_status': ['Completed', 'Pending', 'Cancelled'],
-        'stock_status': ['In Stock', 'Out of Stock', 'Coming Soon'],
-        'interaction_type': ['Phone', 'Email', 'Chat', 'In-Person'],
-        'interaction_channel': ['Sales', 'Support', 'Marketing'],
-        'outcome': ['Won', 'Lost', 'Pending', 'Cancelled'],
-        'payment_method': ['Credit Card', 'Debit Card', 'Check', 'Bank Transfer'],
-        'payment_status': ['Paid', 'Pending', 'Failed', 'Refunded'],
-        'procurement_status': ['Ordered', 'Received', 'Returned'],
-    }
+def quality_key_columns(table_key):
+    return tuple(QUALITY_RULES.get(table_key, {'critical_columns': []})['critical_columns'])
 
-    if table_key == 'stg_payments':
-        categorical_rules['status'] = ['Paid', 'Pending', 'Failed', 'Refunded']
-    elif table_key == 'stg_procurement':
-        categorical_rules['status'] = ['Ordered', 'Received', 'Returned']
 
-    for col, allowed_values in categorical_rules.items():
-        if col in df.columns:
-            invalid_rows = ~df[col].isin(allowed_values)
-            if invalid_rows.any():
-                df.loc[invalid_rows, 'is_dirty'] = True
+def duplicate_check_columns(table_key, target_columns):
+    """Columns that make up a row for the exact-duplicate check.
+
+    These are the columns a projected Parquet or Avro read keeps, so rows
+    that differ only in a column the load never reads are copies in every
+    file format, not just the ones read whole.
+    """
+    return projection_columns(table_key, target_columns)
 
-    return df
 
+# Text staging columns that still hold numbers worth a quantile sketch.
+PROFILE_NUMERIC_COLUMNS = ('sensor_value',)
 
-def evaluate_data_quality(df, table_key, target_columns):
+
+def new_table_profile(column_types):
+    """An empty TableProfile for a staging table, or None when ETL_PROFILE is off.
+
+    Numeric staging columns, and PROFILE_NUMERIC_COLUMNS, get quantile sketches.
+    """
+    if not ETL_PROFILE:
+        return None
+    return TableProfile(
+        column
+        for column, data_type in column_types.items()
+        if data_type in INTEGER_TYPES or data_type in DECIMAL_TYPES or column in PROFILE_NUMERIC_COLUMNS
+    )
+
+
+def profile_frame(df, column_types, date_columns=()):
+    """Profile ``df`` on its own, outside a quality pass."""
+    profile = new_table_profile(column_types)
+    if profile is not None:
+        frame_hashes(df, (), profile, date_columns)
+    return profile
+
+
+def build_quality_metrics(table_key, target_columns, row_count, null_value_counts, duplicate_records, duplicate_key_records=0):
     rules = QUALITY_RULES.get(table_key, {'required_columns': [], 'critical_columns': []})
-    duplicate_records = int(df.duplicated().sum())
-    null_value_counts = {column: int(df[column].isna().sum()) for column in df.columns}
+    columns = list(null_value_counts)
     total_null_values = int(sum(null_value_counts.values()))
     required_columns = rules['required_columns']
-    missing_required_columns = [column for column in required_columns if column not in df.columns]
+    missing_required_columns = [column for column in required_columns if column not in columns]
     critical_null_violations = {
         column: null_value_counts[column]
         for column in rules['critical_columns']
         if column in null_value_counts and null_value_counts[column] > 0
     }
-    shared_columns = sorted(set(df.columns) & set(target_columns))
-    unexpected_columns = sorted(set(df.columns) - set(target_columns))
+    shared_columns = sorted(set(columns) & set(target_columns))
+    unexpected_columns = sorted(set(columns) - set(target_columns))
     schema_validation = {
         'shared_columns': len(shared_columns),
         'missing_required_columns': missing_required_columns,
@@ -344,36 +780,451 @@ def evaluate_data_quality(df, table_key, target_columns):
         validation_errors.append('schema validation failed because no target columns matched the extracted file')
 
     return {
-        'row_count': int(len(df)),
+        'row_count': int(row_count),
         'total_null_values': total_null_values,
         'null_value_counts': null_value_counts,
         'duplicate_records': duplicate_records,
+        'duplicate_key_records': int(duplicate_key_records),
         'schema_validation': schema_validation,
         'validation_errors': validation_errors,
+        'categorical_violations': None,
+        'rule_violations': None,
     }
 
 
+ROW_HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+def hash_numbers(values):
+    # + 0.0 folds -0.0 into 0.0, which duplicated() also treats as equal.
+    return pd.util.hash_array(values.astype('float64').to_numpy() + 0.0)
+
+
+# First characters pd.to_numeric can accept; other strings skip the parse.
+NUMERIC_LEADING_CHARACTERS = frozenset('0123456789+-. \t\n\r\f\vinIN')
+
+
+def numeric_candidates(values):
+    return np.fromiter(
+        (not isinstance(value, str) or value[:1] in NUMERIC_LEADING_CHARACTERS for value in values),
+        dtype=bool,
+        count=len(values),
+    )
+
+
+def cell_hashes(values, is_date=False):
+    """Return a uint64 hash per cell of one column and its non-null mask.
+
+    Object and other non-numeric columns are factorized first, so each
+    distinct value is stringified and hashed once and mapped back to its rows
+    through the codes. Categoricals hash like the object column they replace,
+    and datetime columns hash their nanoseconds. In an ``is_date`` column (one
+    the dtype plan parses), text that the plan could not parse in this chunk
+    still hashes like the parsed timestamps.
+    """
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        return hash_numbers(values), values.notna().to_numpy()
+
+    if pd.api.types.is_datetime64_any_dtype(values):
+        # Timestamps hash as their nanoseconds, without formatting text per cell.
+        return pd.util.hash_array(datetime_nanos(values)), values.notna().to_numpy()
+
+    codes, uniques = pd.factorize(values)
+    uniques = pd.Series(uniques, dtype=object)
+    unique_hashes = pd.util.hash_array(uniques.astype(str).to_numpy(dtype=object))
+    parsed = np.zeros(len(uniques), dtype=bool)
+    if is_date and len(uniques):
+        nanos, parsed = timestamp_nanos(uniques)
+        unique_hashes[parsed] = pd.util.hash_array(nanos[parsed])
+    if (values.dtype == object or isinstance(values.dtype, pd.CategoricalDtype)) and len(uniques):
+        # A chunk that happens to hold only numbers parses as float64;
+        # hash numeric cells of mixed columns the same way.
+        candidates = numeric_candidates(uniques) & ~parsed
+        if candidates.any():
+            numbers = pd.to_numeric(uniques[candidates], errors='coerce')
+            is_number = numbers.notna().to_numpy()
+            positions = np.flatnonzero(candidates)[is_number]
+            unique_hashes[positions] = hash_numbers(numbers[is_number])
+    present = codes >= 0
+    if not len(uniques):
+        return np.zeros(len(values), dtype=np.uint64), present
+    return unique_hashes[codes], present
+
+
+@dataclass(frozen=True)
+class FrameHashes:
+    rows: np.ndarray
+    keys: np.ndarray | None
+    key_present: np.ndarray
+    null_value_counts: dict
+
+
+def frame_hashes(df, key_columns=(), profile=None, date_columns=(), row_columns=None):
+    """Hash every row, and every row's ``key_columns``, in one pass over the cells.
+
+    Each cell hash is salted with its column name and the salted hashes are
+    summed over non-null cells, so a null cell and an absent column hash
+    identically and column order does not matter. That makes hashes from
+    separately parsed chunks (whose JSON keys or inferred dtypes may differ)
+    comparable with each other. The key hash reuses the same cell hashes; it
+    is ``None`` when none of the key columns are present, and its mask marks
+    rows whose key columns are all non-null. Null counts per column, and the
+    column sketches of a ``profile``, fall out of the same pass. Text cells of
+    ``date_columns`` hash like timestamps (see ``cell_hashes``). When
+    ``row_columns`` is given, only those columns feed the row hash.
+    """
+    if profile is not None:
+        profile.add_rows(len(df))
+    combined = np.zeros(len(df), dtype=np.uint64)
+    key_hashes = None
+    key_present = np.ones(len(df), dtype=bool)
+    null_value_counts = {}
+    for column in df.columns:
+        hashes, present = cell_hashes(df[column], column in date_columns)
+        null_value_counts[column] = int(len(present) - present.sum())
+        if profile is not None:
+            profile.add_column(column, df[column], hashes, present)
+        is_key = column in key_columns
+        if is_key:
+            key_present &= present
+        if not present.any():
+            continue
+        salt = pd.util.hash_array(np.array([str(column)], dtype=object))[0]
+        salted = np.where(present, (hashes ^ salt) * ROW_HASH_MULTIPLIER, np.uint64(0))
+        if row_columns is None or column in row_columns:
+            combined += salted
+        if is_key:
+            key_hashes = salted if key_hashes is None else key_hashes + salted
+    if key_hashes is None and any(column in df.columns for column in key_columns):
+        key_hashes = np.zeros(len(df), dtype=np.uint64)
+    return FrameHashes(combined, key_hashes, key_present, null_value_counts)
+
+
+class SeenHashes:
+    """Sorted set of uint64 hashes used to spot repeats across chunks (8 bytes per value)."""
+
+    def __init__(self):
+        self._hashes = np.empty(0, dtype=np.uint64)
+
+    def add(self, hashes):
+        """Record ``hashes`` and return True for each one seen earlier in this or a previous call."""
+        duplicated = pd.Series(hashes).duplicated().to_numpy()
+        if len(self._hashes):
+            positions = np.searchsorted(self._hashes, hashes).clip(max=len(self._hashes) - 1)
+            duplicated |= self._hashes[positions] == hashes
+        # Only the new hashes are sorted; merging them in is one linear copy.
+        new = np.sort(hashes[~duplicated])
+        self._hashes = np.insert(self._hashes, np.searchsorted(self._hashes, new), new)
+        return duplicated
+
+
+class QualityAccumulator:
+    """Merge quality statistics across chunks of one file.
+
+    ``metrics()`` returns the same payload ``evaluate_data_quality`` would
+    produce for the concatenated file: null counts account for columns that
+    only appear in some chunks, and duplicates are detected across chunk
+    boundaries with sorted arrays of row hashes over ``row_columns`` (every
+    column when None). Repeated ``key_columns`` values (the table's critical
+    columns) are counted separately as ``duplicate_key_records``. Each chunk is
+    also added to ``profile``, if given.
+    """
+
+    def __init__(self, key_columns=(), profile=None, row_columns=None):
+        self.key_columns = tuple(key_columns)
+        self.profile = profile
+        self.row_columns = row_columns
+        self.row_count = 0
+        self.null_value_counts = {}
+        self.duplicate_records = 0
+        self.duplicate_key_records = 0
+        self._seen_rows = SeenHashes()
+        self._seen_keys = SeenHashes()
+
+    def add(self, df, date_columns=()):
+        """Add one chunk and return its mask of rows that repeat an earlier row."""
+        hashes = frame_hashes(df, self.key_columns, self.profile, date_columns, self.row_columns)
+        chunk_nulls = hashes.null_value_counts
+        for column in self.null_value_counts:
+            if column not in chunk_nulls:
+                self.null_value_counts[column] += len(df)
+        for column, null_count in chunk_nulls.items():
+            if column in self.null_value_counts:
+                self.null_value_counts[column] += null_count
+            else:
+                self.null_value_counts[column] = self.row_count + null_count
+        self.row_count += len(df)
+
+        duplicated = self._seen_rows.add(hashes.rows)
+        self.duplicate_records += int(duplicated.sum())
+        if hashes.keys is not None:
+            self.duplicate_key_records += int(self._seen_keys.add(hashes.keys[hashes.key_present]).sum())
+        return duplicated
+
+    def has_blocking_errors(self, table_key):
+        """True once the file can no longer pass validation, whatever later chunks hold."""
+        rules = QUALITY_RULES.get(table_key, {'critical_columns': []})
+        return self.duplicate_records > 0 or any(
+            self.null_value_counts.get(column, 0) > 0 for column in rules['critical_columns']
+        )
+
+    def metrics(self, table_key, target_columns):
+        return build_quality_metrics(
+            table_key,
+            target_columns,
+            self.row_count,
+            dict(self.null_value_counts),
+            self.duplicate_records,
+            self.duplicate_key_records,
+        )
+
+
 # ----------------------------
 # GET TABLE COLUMNS
 # ----------------------------
+def get_table_column_types(conn, table_name):
+    return SCHEMA_CACHE.ensure_loaded(conn).column_types(table_name)
+
+
 def get_table_columns(conn, table_name):
-    with conn.cursor() as cur:
-        cur.execute("""
-            SELECT column_name
-            FROM information_schema.columns
-            WHERE table_schema = 'staging'
-            AND table_name = %s
-        """, (table_name,))
-        return [row[0] for row in cur.fetchall()]
+    return SCHEMA_CACHE.ensure_loaded(conn).columns(table_name)
+
+
+# ----------------------------
+# TYPE COERCION
+# ----------------------------
+INTEGER_TYPES = {'smallint', 'integer', 'bigint'}
+DECIMAL_TYPES = {'numeric', 'real', 'double precision'}
+DATETIME_TYPES = {'date', 'timestamp without time zone', 'timestamp with time zone'}
+
+
+def coerce_to_column_types(df, column_types):
+    """Cast columns to the dtypes implied by their staging column types.
+
+    Values that cannot be converted become nulls and their rows are flagged
+    ``is_dirty``, so a single bad cell is filtered like any other quality
+    issue instead of failing the whole load at the database. Rows that carry
+    quarantine rule labels get ``type:<column>`` when they have no rule yet.
+    """
+    invalid_rows = pd.Series(False, index=df.index)
+    column_invalid_rows = []
+
+    for column in df.columns:
+        data_type = column_types.get(column)
+        values = df[column]
+
+        if data_type in INTEGER_TYPES or data_type in DECIMAL_TYPES:
+            if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+                coerced = values
+            else:
+                coerced = pd.to_numeric(values, errors='coerce')
+            if data_type in INTEGER_TYPES:
+                non_null = coerced.dropna()
+                if (non_null == non_null.round()).all():
+                    coerced = coerced.astype('Int64')
+        elif data_type in DATETIME_TYPES:
+            if pd.api.types.is_datetime64_any_dtype(values):
+                coerced = values
+            else:
+                coerced = pd.to_datetime(values, errors='coerce', format='ISO8601')
+        else:
+            continue
+
+        column_invalid = values.notna() & coerced.isna()
+        invalid_rows |= column_invalid
+        column_invalid_rows.append((f'type:{column}', column_invalid.to_numpy()))
+        df[column] = coerced
+
+    if invalid_rows.any():
+        if 'is_dirty' not in df.columns:
+            df['is_dirty'] = False
+        df.loc[invalid_rows, 'is_dirty'] = True
+        if RULE_COLUMN in df.columns:
+            df[RULE_COLUMN] = rule_labels(len(df), column_invalid_rows, df[RULE_COLUMN].to_numpy())
+
+    return df
 
 
 # ----------------------------
 # UPSERT
 # ----------------------------
-def upsert(df, table_key, conn):
+# Staging tables feeding the SCD Type 2 dimensions. A reloaded primary key
+# takes the new values (and a new loaded_at) instead of being skipped, so the
+# warehouse loader sees the change; other tables keep the first copy of a row.
+STAGING_UPDATE_TABLES = ('stg_customers', 'stg_vehicles')
+
 
+def conflict_clause(table_key, columns, column_types, cur):
+    """ON CONFLICT action for a staging insert; the insert target is aliased ``target``."""
+    table_name = TABLE_MAP[table_key]
+    primary_key = SCHEMA_CACHE.primary_key(table_name)
+    updated = [column for column in columns if column not in primary_key]
+    if table_key not in STAGING_UPDATE_TABLES or not primary_key or not updated:
+        return 'ON CONFLICT DO NOTHING'
+
+    quoted = [quote_ident(column, cur) for column in updated]
+    assignments = [f"{column} = EXCLUDED.{column}" for column in quoted]
+    if 'loaded_at' in column_types and 'loaded_at' not in columns:
+        assignments.append('loaded_at = NOW()')
+    # Rows that arrive unchanged are left alone, so their loaded_at does not move.
+    return f"""ON CONFLICT ({', '.join(quote_ident(column, cur) for column in primary_key)})
+        DO UPDATE SET {', '.join(assignments)}
+        WHERE ROW({', '.join(f'target.{column}' for column in quoted)})
+            IS DISTINCT FROM ROW({', '.join(f'EXCLUDED.{column}' for column in quoted)})"""
+
+
+def load_with_execute_values(df, table_key, column_types, conn):
+    table_name = TABLE_MAP[table_key]
+    column_str = ",".join(df.columns)
+
+    # Replace NaN / NaT with None for PostgreSQL
+    values = [tuple(None if pd.isna(x) else x for x in row) for row in df.to_numpy()]
+
+    with conn.cursor() as cur:
+        conflict = conflict_clause(table_key, list(df.columns), column_types, cur)
+
+    sql = f"""
+        INSERT INTO staging.{table_name} AS target ({column_str})
+        VALUES %s
+        {conflict}
+    """
+
+    with conn.cursor() as cur:
+        execute_values(
+            cur,
+            sql,
+            values,
+            page_size=1000
+        )
+
+    return len(values)
+
+
+COPY_NULL = '\\N'
+# Any of these in a column forces CSV quoting; the backslash covers a literal \\N value.
+CSV_SPECIAL_CHARACTERS = (',', '"', '\n', '\r', '\\')
+
+
+def format_numbers(array, formatter):
+    return np.fromiter(map(formatter, array.tolist()), dtype=object, count=len(array))
+
+
+def encode_copy_column(values):
+    """Render one column as COPY CSV fields in a single column-wise pass.
+
+    Nulls (NaN, NaT, None, pd.NA) become the COPY NULL marker, numbers use
+    their shortest round-trip text, timestamps are ISO-8601, and booleans are
+    t/f. String columns are only quoted when one of their values needs it, so
+    the common ID/code column is passed through untouched. Categoricals encode
+    their categories once. No interpreted Python runs per cell.
+    """
+    dtype = values.dtype
+    missing = values.isna().to_numpy()
+
+    if isinstance(dtype, pd.CategoricalDtype) and len(dtype.categories) == 0:
+        # Every value of a category-less column is null.
+        encoded = np.full(len(values), COPY_NULL, dtype=object)
+    elif isinstance(dtype, pd.CategoricalDtype):
+        categories = encode_copy_column(pd.Series(dtype.categories))
+        encoded = categories[values.cat.codes.to_numpy().clip(min=0)]
+    elif pd.api.types.is_bool_dtype(dtype):
+        encoded = np.where(values.to_numpy(dtype=bool, na_value=False), 't', 'f').astype(object)
+    elif pd.api.types.is_datetime64_any_dtype(dtype):
+        if getattr(dtype, 'tz', None) is not None:
+            encoded = values.dt.strftime('%Y-%m-%d %H:%M:%S.%f%z').to_numpy(dtype=object)
+        else:
+            stamps = values.to_numpy(dtype='datetime64[us]')
+            whole_seconds = (stamps.view('int64')[~missing] % 1_000_000 == 0).all()
+            encoded = stamps.astype('datetime64[s]' if whole_seconds else 'datetime64[us]').astype(str).astype(object)
+    elif pd.api.types.is_integer_dtype(dtype):
+        encoded = format_numbers(values.fillna(0).to_numpy(), str)
+    elif pd.api.types.is_float_dtype(dtype):
+        encoded = format_numbers(values.to_numpy(dtype='float64', na_value=np.nan), repr)
+    else:
+        if pd.api.types.infer_dtype(values, skipna=True) == 'string':
+            encoded = values.to_numpy(dtype=object, copy=True)
+        else:
+            encoded = values.astype(str).to_numpy(dtype=object)
+        encoded[missing] = ''
+        joined = '\x00'.join(encoded)
+        if any(character in joined for character in CSV_SPECIAL_CHARACTERS):
+            text = pd.Series(encoded).str.replace('"', '""', regex=False)
+            encoded = ('"' + text + '"').to_numpy(dtype=object)
+        else:
+            encoded[(encoded == '') & ~missing] = '""'
+
+    encoded[missing] = COPY_NULL
+    return encoded
+
+
+def encode_copy_rows(df):
+    """Return the frame as COPY CSV text, assembled from the encoded columns."""
+    columns = [encode_copy_column(df.iloc[:, position]) for position in range(df.shape[1])]
+    if not columns or not len(df):
+        return ''
+    return '\n'.join(map(','.join, zip(*columns))) + '\n'
+
+
+def copy_frame(df, table, columns, cur):
+    """COPY ``df`` into ``table`` in COPY_BATCH_ROWS batches; returns the rows staged."""
+    copy_sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')"
+    staged_rows = 0
+    for start in range(0, len(df), COPY_BATCH_ROWS):
+        buffer = StringIO(encode_copy_rows(df.iloc[start:start + COPY_BATCH_ROWS]))
+        cur.copy_expert(copy_sql, buffer)
+        staged_rows += cur.rowcount
+    return staged_rows
+
+
+def load_with_copy(df, table_key, column_types, conn):
+    """Stream rows into a session temp table with COPY, then merge in one statement.
+
+    The temp table is all TEXT so COPY never rejects a value; the casts in the
+    INSERT ... SELECT apply the same conversions Postgres would apply to the
+    literals sent by execute_values (for example '3.0' into an INT column).
+    """
+    table_name = TABLE_MAP[table_key]
+    temp_table = f"etl_load_{table_name}"
+
+    with conn.cursor() as cur:
+        columns = [quote_ident(column, cur) for column in df.columns]
+        select_list = []
+        for column, quoted in zip(df.columns, columns):
+            data_type = column_types[column]
+            if data_type in INTEGER_TYPES:
+                select_list.append(f"{quoted}::numeric::{data_type}")
+            elif getattr(df[column].dtype, 'tz', None) is not None:
+                # Offsets are resolved through the session time zone, as psycopg2 literals are.
+                select_list.append(f"{quoted}::timestamptz::{data_type}")
+            else:
+                select_list.append(f"{quoted}::{data_type}")
+
+        cur.execute(f"DROP TABLE IF EXISTS pg_temp.{temp_table}")
+        cur.execute(f"CREATE TEMP TABLE {temp_table} ({', '.join(f'{quoted} TEXT' for quoted in columns)})")
+
+        staged_rows = copy_frame(df, temp_table, columns, cur)
+
+        cur.execute(f"""
+            INSERT INTO staging.{table_name} AS target ({', '.join(columns)})
+            SELECT {', '.join(select_list)}
+            FROM {temp_table}
+            {conflict_clause(table_key, list(df.columns), column_types, cur)}
+        """)
+        cur.execute(f"DROP TABLE {temp_table}")
+
+    if staged_rows != len(df):
+        raise RuntimeError(f"COPY staged {staged_rows} row(s) for staging.{table_name}, expected {len(df)}")
+
+    return staged_rows
+
+
+def rows_to_load(df, table_key, conn):
+    """Return the rows and columns of ``df`` that ``load_frame`` writes, keeping their index labels.
+
+    Dirty rows are filtered, columns are aligned to the staging table, and in
+    STAGING_UPDATE_TABLES only the last copy of each primary key is kept.
+    """
     table_name = TABLE_MAP[table_key]
-    target_table = f"staging.{table_name}"
 
     # Filter out dirty records (data quality issues)
     if 'is_dirty' in df.columns:
@@ -383,58 +1234,421 @@ def upsert(df, table_key, conn):
             LOGGER.info("Filtered %s dirty record(s) from staging.%s", dirty_count, table_name)
         df = clean_df
 
-    # Get table columns from database
-    table_columns = get_table_columns(conn, table_name)
+    # Get table columns from the cached staging catalog
+    column_types = get_table_column_types(conn, table_name)
 
     # Keep only matching columns
-    df = df[[c for c in df.columns if c in table_columns]]
+    df = df[[c for c in df.columns if c in column_types]]
+
+    if table_key in STAGING_UPDATE_TABLES and not df.empty:
+        # One statement cannot update the same row twice; the last copy of a key wins.
+        primary_key = [column for column in SCHEMA_CACHE.primary_key(table_name) if column in df.columns]
+        if primary_key:
+            df = df.drop_duplicates(subset=primary_key, keep='last')
+    return df
 
+
+def write_rows(df, table_key, conn):
+    """Load a frame from ``rows_to_load`` without committing; returns the rows sent to the table."""
+    table_name = TABLE_MAP[table_key]
     if df.empty:
         LOGGER.info("No matching columns remained after target-table alignment for staging.%s", table_name)
         return 0
 
-    cols = list(df.columns)
-    column_str = ",".join(cols)
+    column_types = get_table_column_types(conn, table_name)
+    if ETL_LOAD_MODE == 'execute_values':
+        return load_with_execute_values(df, table_key, column_types, conn)
+    return load_with_copy(df, table_key, column_types, conn)
 
-    # Convert dataframe to list of tuples (fast)
-    # Replace NaN / NaT with None for PostgreSQL
-    values = [tuple(None if pd.isna(x) else x for x in row) for row in df.to_numpy()]
 
-    sql = f"""
-        INSERT INTO {target_table} ({column_str})
-        VALUES %s
-        ON CONFLICT DO NOTHING
-    """
+def load_frame(df, table_key, conn):
+    """Filter, align, and load one frame without committing."""
+    return write_rows(rows_to_load(df, table_key, conn), table_key, conn)
 
-    with conn.cursor() as cur:
-        execute_values(
-            cur,
-            sql,
-            values,
-            page_size=1000
-        )
 
+def upsert(df, table_key, conn):
+    loaded = load_frame(df, table_key, conn)
     conn.commit()
+    return loaded
 
-    return len(values)
+
+# ----------------------------
+# QUARANTINE
+# ----------------------------
+def dirty_rejections(source_df, loaded_df, quarantine=None):
+    """Quarantine rows for the rows of ``loaded_df`` that ``load_frame`` will filter as dirty.
+
+    Records come from ``source_df`` (the normalized frame before transform)
+    by index label, so the stored row is the one the file held. Returns None
+    when quarantine (ETL_QUARANTINE unless ``quarantine`` is given) is off or
+    nothing is dirty.
+    """
+    if quarantine is None:
+        quarantine = ETL_QUARANTINE
+    if not quarantine or 'is_dirty' not in loaded_df.columns:
+        return None
+    dirty = ~(loaded_df['is_dirty'] == False).to_numpy(dtype=bool, na_value=False)
+    if not dirty.any():
+        return None
+    rules = loaded_df[RULE_COLUMN].to_numpy()[dirty] if RULE_COLUMN in loaded_df.columns else None
+    # Rows without a rule label were flagged dirty by the source itself.
+    rules = rule_labels(int(dirty.sum()), [('source:is_dirty', np.ones(int(dirty.sum()), dtype=bool))], rules)
+    return rejected_rows(source_df.loc[loaded_df.index[dirty]], rules)
+
+
+def file_rejections(source_df, error):
+    """Quarantine rows for every row of a file that failed validation, or None when quarantine is off."""
+    if not ETL_QUARANTINE or source_df is None or source_df.empty:
+        return None
+    return rejected_rows(source_df, FILE_VALIDATION_RULE, error)
+
+
+def write_quarantine(rejected, source_keys, table_key, conn):
+    """COPY quarantine rows into staging.etl_quarantine without committing; returns the rows written."""
+    if rejected is None or rejected.empty:
+        return 0
+    frame = quarantine_frame(rejected, RUN_ID, source_keys, TABLE_MAP[table_key])
+    with conn.cursor() as cur:
+        return copy_frame(frame, QUARANTINE_TABLE, QUARANTINE_COLUMNS, cur)
+
+
+def quarantine_rejected_file(key, batch, write):
+    """Quarantine the rows of a file that will not load; failures are logged, not raised.
+
+    ``write(conn)`` writes the rows and returns how many it wrote.
+    """
+    try:
+        return batch.record_quarantine(write)
+    except Exception as exc:
+        if not batch.batched:
+            batch.conn.rollback()
+        LOGGER.warning("Quarantine write failed | file_name=%s | error=%s", key, exc)
+        return 0
 
 
 # ----------------------------
 # METADATA UPDATE
 # ----------------------------
-def update_metadata(table_key, row_count, conn):
+METADATA_UPSERT_SQL = """
+    INSERT INTO staging.etl_metadata
+    (table_name, load_time, row_count)
+    VALUES %s
+    ON CONFLICT (table_name)
+    DO UPDATE SET load_time = NOW(), row_count = EXCLUDED.row_count
+"""
+
+
+def update_metadata(table_key, row_count, conn, watermark=None):
+    write_metadata({table_key: (row_count, watermark)}, conn)
+    conn.commit()
 
+
+def write_metadata(entries, conn):
+    """Upsert ``{table_key: (row_count, watermark)}`` into etl_metadata as one multi-row statement."""
+    if not entries:
+        return
     with conn.cursor() as cur:
-        cur.execute("""
-            INSERT INTO staging.etl_metadata
-            (table_name, load_time, row_count)
-            VALUES (%s, NOW(), %s)
-            ON CONFLICT (table_name)
-            DO UPDATE SET load_time=NOW(), row_count=%s
-        """, (table_key, row_count, row_count))
+        if INCREMENTAL:
+            rows = [
+                (table_key, row_count, *(watermark or (None, None)))
+                for table_key, (row_count, watermark) in entries.items()
+            ]
+            execute_values(cur, WATERMARK_UPSERT_SQL, rows, template='(%s, NOW(), %s, %s::timestamp, %s)')
+        else:
+            rows = [(table_key, row_count) for table_key, (row_count, _) in entries.items()]
+            execute_values(cur, METADATA_UPSERT_SQL, rows, template='(%s, NOW(), %s)')
+
+
+# ----------------------------
+# COMMIT POLICY
+# ----------------------------
+class CommitBatcher:
+    """Apply ETL_COMMIT_POLICY to the files loaded through one connection.
+
+    With the 'file' policy every file commits its rows, its etl_metadata row,
+    and its ledger row as before. With 'rows' and 'table', each file runs
+    inside a savepoint: a failed file rolls back to it without touching the
+    files before it, and a loaded file releases it and waits for the group
+    commit. Metadata for the group is kept per table (last row count, highest
+    watermark) and written with one multi-row upsert just before the commit.
+    """
+
+    def __init__(self, conn, policy=None, commit_rows=None):
+        self.conn = conn
+        self.policy = policy or ETL_COMMIT_POLICY
+        self.commit_rows = commit_rows or ETL_COMMIT_ROWS
+        self.table_key = None
+        self.in_file = False
+        self.pending_rows = 0
+        self.pending_metadata = {}
+        self.pending_outcomes = []
+
+    @property
+    def batched(self):
+        return self.policy != 'file'
+
+    def begin_table(self, table_key):
+        if self.policy == 'table' and self.table_key not in (None, table_key):
+            self.commit()
+        self.table_key = table_key
+
+    def begin_file(self):
+        if self.batched and not self.in_file:
+            with self.conn.cursor() as cur:
+                cur.execute('SAVEPOINT etl_file')
+            self.in_file = True
+
+    def rollback_file(self):
+        if not self.batched:
+            self.conn.rollback()
+            return
+        if self.in_file:
+            with self.conn.cursor() as cur:
+                cur.execute('ROLLBACK TO SAVEPOINT etl_file')
+                cur.execute('RELEASE SAVEPOINT etl_file')
+            self.in_file = False
+
+    def finish_file(self, table_key, row_count, watermark=None):
+        """Record a loaded file's metadata; only the 'file' policy commits here."""
+        if not self.batched:
+            update_metadata(table_key, row_count, self.conn, watermark)
+            return
+        with self.conn.cursor() as cur:
+            cur.execute('RELEASE SAVEPOINT etl_file')
+        self.in_file = False
+        previous = self.pending_metadata.get(table_key)
+        self.pending_metadata[table_key] = (row_count, max_watermark(previous[1] if previous else None, watermark))
+
+    def record_ledger(self, entries):
+        """Write ``(key, object_version, target_table, row_count)`` ledger rows for loaded files."""
+        if not self.batched:
+            record_loaded_objects(self.conn, entries)
+            return
+        with self.conn.cursor() as cur:
+            cur.execute('SAVEPOINT etl_ledger')
+        try:
+            record_loaded_objects(self.conn, entries, commit=False)
+        except Exception:
+            with self.conn.cursor() as cur:
+                cur.execute('ROLLBACK TO SAVEPOINT etl_ledger')
+            raise
+        finally:
+            with self.conn.cursor() as cur:
+                cur.execute('RELEASE SAVEPOINT etl_ledger')
+
+    def record_quarantine(self, write):
+        """Run ``write(conn)`` for a file that failed; under 'file' it commits at once.
+
+        Other policies run it in its own savepoint and commit it with the group.
+        """
+        if not self.batched:
+            written = write(self.conn)
+            self.conn.commit()
+            return written
+        with self.conn.cursor() as cur:
+            cur.execute('SAVEPOINT etl_quarantine')
+        try:
+            return write(self.conn)
+        except Exception:
+            with self.conn.cursor() as cur:
+                cur.execute('ROLLBACK TO SAVEPOINT etl_quarantine')
+            raise
+        finally:
+            with self.conn.cursor() as cur:
+                cur.execute('RELEASE SAVEPOINT etl_quarantine')
+
+    def file_loaded(self, outcome):
+        if not self.batched:
+            return
+        self.pending_outcomes.append(outcome)
+        self.pending_rows += outcome['rows_processed']
+        if self.policy == 'rows' and self.pending_rows >= self.commit_rows:
+            self.commit()
+
+    def commit(self):
+        """Write the pending metadata and commit the group.
+
+        If the commit itself fails, every file in the group is marked failed,
+        because none of their rows were kept.
+        """
+        if not self.batched or not self.pending_outcomes:
+            self.pending_metadata = {}
+            return
+        outcomes = self.pending_outcomes
+        try:
+            # The group's commit is charged to its last file.
+            with outcomes[-1]['stages'].stage('metadata'):
+                write_metadata(self.pending_metadata, self.conn)
+                self.conn.commit()
+            LOGGER.info(
+                "Group commit | policy=%s | files=%s | rows=%s | tables=%s",
+                self.policy,
+                len(outcomes),
+                self.pending_rows,
+                len(self.pending_metadata),
+            )
+        except Exception as exc:
+            self.conn.rollback()
+            for outcome in outcomes:
+                outcome['error'] = f"Group commit failed: {exc}"
+                outcome['rows_quarantined'] = 0
+                LOGGER.error("File processing failed | file_name=%s | error=%s", outcome['file_name'], outcome['error'])
+        finally:
+            self.pending_rows = 0
+            self.pending_metadata = {}
+            self.pending_outcomes = []
+
+    def close(self):
+        self.commit()
+
+
+# ----------------------------
+# INCREMENTAL WATERMARKS
+# ----------------------------
+# (event timestamp column, natural key column) per table. A row is treated as
+# already loaded when its (event time, key) pair is at or below the table's
+# high-water mark from the start of the run.
+WATERMARK_COLUMNS = {
+    'stg_customers': ('created_at', 'customer_id'),
+    'stg_dealers': ('created_at', 'dealer_id'),
+    'stg_vehicles': ('purchase_date', 'vehicle_id'),
+    'stg_sales': ('sale_date', 'sale_id'),
+    'stg_inventory': ('stock_date', 'inventory_id'),
+    'stg_payments': ('payment_date', 'payment_id'),
+    'stg_suppliers': ('created_at', 'supplier_id'),
+    'stg_procurement': ('procurement_date', 'procurement_id'),
+    'stg_interactions': ('interaction_date', 'interaction_id'),
+    'stg_telemetry': ('timestamp', 'telemetry_id'),
+}
+
+WATERMARK_DDL = """
+    ALTER TABLE staging.etl_metadata
+        ADD COLUMN IF NOT EXISTS high_water_timestamp TIMESTAMP,
+        ADD COLUMN IF NOT EXISTS high_water_key VARCHAR(64)
+"""
+
+# Keys compare with the "C" collation so Postgres orders them exactly like the
+# Python string comparison used when filtering.
+WATERMARK_IS_NEWER = """
+    EXCLUDED.high_water_timestamp IS NOT NULL
+    AND (
+        etl_metadata.high_water_timestamp IS NULL
+        OR (EXCLUDED.high_water_timestamp, COALESCE(EXCLUDED.high_water_key, '') COLLATE "C")
+            > (etl_metadata.high_water_timestamp, COALESCE(etl_metadata.high_water_key, '') COLLATE "C")
+    )
+"""
+
+WATERMARK_UPSERT_SQL = f"""
+    INSERT INTO staging.etl_metadata
+    (table_name, load_time, row_count, high_water_timestamp, high_water_key)
+    VALUES %s
+    ON CONFLICT (table_name)
+    DO UPDATE SET
+        load_time = NOW(),
+        row_count = EXCLUDED.row_count,
+        high_water_timestamp = CASE WHEN {WATERMARK_IS_NEWER}
+            THEN EXCLUDED.high_water_timestamp ELSE etl_metadata.high_water_timestamp END,
+        high_water_key = CASE WHEN {WATERMARK_IS_NEWER}
+            THEN EXCLUDED.high_water_key ELSE etl_metadata.high_water_key END
+"""
+
+
+def load_watermarks(conn):
+    """Return {table_key: (event_time, natural_key)} for every table with a mark.
+
+    Empty unless INCREMENTAL is enabled. Adds the watermark columns to
+    ``staging.etl_metadata`` first when an older schema lacks them.
+    """
+    if not INCREMENTAL:
+        return {}
 
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT COUNT(*)
+            FROM information_schema.columns
+            WHERE table_schema = 'staging'
+            AND table_name = 'etl_metadata'
+            AND column_name IN ('high_water_timestamp', 'high_water_key')
+        """)
+        if cur.fetchone()[0] < 2:
+            cur.execute(WATERMARK_DDL)
+        cur.execute("""
+            SELECT table_name, high_water_timestamp, high_water_key
+            FROM staging.etl_metadata
+            WHERE high_water_timestamp IS NOT NULL
+        """)
+        rows = cur.fetchall()
     conn.commit()
 
+    watermarks = {table_key: (pd.Timestamp(event_time), natural_key or '') for table_key, event_time, natural_key in rows}
+    LOGGER.info("Incremental watermarks loaded | tables=%s", len(watermarks))
+    return watermarks
+
+
+def watermark_row_filter(table_key, watermark):
+    """Describe the watermark as a read-time filter that columnar readers can push down."""
+    if watermark is None or table_key not in WATERMARK_COLUMNS:
+        return None
+    event_column, _ = WATERMARK_COLUMNS[table_key]
+    sources = tuple(source for source, target in COLUMN_ALIASES.get(table_key, {}).items() if target == event_column)
+    return RowFilter(event_column, sources, watermark[0])
+
+
+def watermark_timestamps(values):
+    if not pd.api.types.is_datetime64_any_dtype(values):
+        values = pd.to_datetime(values, errors='coerce', format='ISO8601')
+    if getattr(values.dt, 'tz', None) is not None:
+        values = values.dt.tz_convert('UTC').dt.tz_localize(None)
+    return values
+
+
+def filter_loaded_rows(df, table_key, watermark):
+    """Drop rows whose (event time, natural key) is at or below ``watermark``.
+
+    Rows without an event time are always kept. Returns the remaining frame
+    and the number of rows skipped.
+    """
+    event_column, key_column = WATERMARK_COLUMNS.get(table_key, (None, None))
+    if watermark is None or df.empty or event_column not in df.columns:
+        return df, 0
+
+    mark_time, mark_key = watermark
+    events = watermark_timestamps(df[event_column])
+    keep = (events > mark_time) | events.isna()
+    if key_column in df.columns:
+        keep |= (events == mark_time) & (df[key_column].astype(str) > mark_key)
+
+    keep = keep.to_numpy()
+    skipped = int(len(keep) - keep.sum())
+    return (df[keep] if skipped else df), skipped
+
+
+def frame_watermark(df, table_key):
+    """Return the highest (event time, natural key) among the rows that will be loaded."""
+    event_column, key_column = WATERMARK_COLUMNS.get(table_key, (None, None))
+    if event_column not in df.columns:
+        return None
+    if 'is_dirty' in df.columns:
+        df = df[df['is_dirty'] == False]
+
+    events = watermark_timestamps(df[event_column])
+    if not events.notna().any():
+        return None
+    mark_time = events.max()
+    mark_key = ''
+    if key_column in df.columns:
+        keys = df.loc[(events == mark_time).to_numpy(), key_column].dropna().astype(str)
+        mark_key = keys.max() if len(keys) else ''
+    return (mark_time, mark_key)
+
+
+def max_watermark(first, second):
+    if first is None:
+        return second
+    if second is None:
+        return first
+    return max(first, second)
+
 
 # ----------------------------
 # TABLE INFERENCE
@@ -459,108 +1673,1324 @@ def infer_table(key):
 
 
 # ----------------------------
-# MAIN
+# FILE PIPELINE
 # ----------------------------
-def main():
-    run_started_at = perf_counter()
-    files = list_staging_files()
-    run_summary = {
+def new_run_summary():
+    return {
         'pipeline_name': 'automotive_finance_pipeline',
+        'run_id': RUN_ID,
         'files_processed': 0,
+        'files_skipped': 0,
         'rows_loaded': 0,
+        'rows_skipped': 0,
         'processing_time_seconds': 0.0,
         'quality_summary': {
             'files_checked': 0,
             'duplicate_records': 0,
             'total_null_values': 0,
             'schema_failures': 0,
+            'categorical_violations': 0,
+            'rule_violations': 0,
         },
+        'rows_quarantined': 0,
+        'dtype_bytes_saved': 0,
+        'stage_metrics': {},
         'file_metrics': [],
         'errors': [],
     }
 
-    if not files:
-        LOGGER.info("Pipeline completion | stage=phase_4_etl | files_processed=0 | rows_loaded=0 | processing_time_seconds=0.0")
-        print(f"ETL_SUMMARY::{json.dumps(run_summary)}")
+
+def new_file_outcome(key, table_key=None):
+    return {
+        'file_name': key,
+        'file_type': detect_file_type(key),
+        'table_key': table_key,
+        'quality_metrics': None,
+        'rows_processed': 0,
+        'rows_skipped': 0,
+        'rows_quarantined': 0,
+        'processing_time_seconds': 0.0,
+        'error': None,
+        'load_batch': None,
+        'profile': None,
+        'dtype_plan': None,
+        'stages': StageMetrics(),
+    }
+
+
+def resolve_table_key(key):
+    table_key = infer_table(key)
+    if table_key not in TABLE_MAP:
+        raise ValueError(f"No table mapping found for inferred table key {table_key}")
+    return table_key
+
+
+def prepare_file(key, table_key, column_types, watermark=None, body=None):
+    """Run extract, normalize, validate, and transform for one staged key.
+
+    Kept free of database handles so it can run inside a worker process.
+    Validation failures are returned rather than raised so the caller still
+    receives the quality metrics for the run summary. With a ``watermark``
+    (incremental mode), rows already covered by it are dropped before load.
+    With ETL_QUARANTINE, ``prepared['rejected']`` holds the rows to quarantine.
+    With ETL_PROFILE, ``prepared['profile']`` holds the file's column sketches.
+    ``prepared['dtype_plan']`` reports the memory the dtype plan saved, and
+    ``prepared['stages']`` the time and rows of each stage run here.
+    """
+    started_at = perf_counter()
+    file_type = detect_file_type(key)
+    LOGGER.info("File processing start | file_name=%s | file_type=%s | inferred_table=%s", key, file_type, table_key)
+
+    stages = StageMetrics()
+    with stages.stage('extract') as stage:
+        source = open_staging_object(key) if body is None else body
+        raw_df = extract_file(key, projection_columns(table_key, column_types), watermark_row_filter(table_key, watermark), source)
+        stage.rows_out = len(raw_df)
+        stage.bytes_read = bytes_consumed(source)
+    read_skipped_rows = raw_df.attrs.get('skipped_rows', 0)
+    with stages.stage('normalize', len(raw_df)):
+        # Nothing else holds the raw frame, so it is normalized and planned in place.
+        normalized_df, dtype_report = plan_dtypes(normalize_column_aliases(raw_df, table_key), table_key, column_types)
+    profile = new_table_profile(column_types)
+    with stages.stage('quality', len(normalized_df)) as stage:
+        quality_metrics, duplicate_rows = evaluate_data_quality(normalized_df, table_key, list(column_types), profile)
+        stage.rows_out = 0 if quality_metrics['validation_errors'] else len(normalized_df)
+
+    log_quality_metrics(
+        LOGGER,
+        file_name=key,
+        file_type=file_type,
+        table_name=TABLE_MAP[table_key],
+        metrics=quality_metrics,
+    )
+
+    prepared = new_prepared_file(quality_metrics)
+    prepared['profile'] = profile
+    prepared['dtype_plan'] = record_dtype_plan(key, table_key, dtype_report)
+    prepared['stages'] = stages
+    if quality_metrics['validation_errors']:
+        prepared['error'] = (
+            f"Data quality validation failed for {key}: {'; '.join(quality_metrics['validation_errors'])}"
+        )
+        prepared['rejected'] = file_rejections(normalized_df, prepared['error'])
+    else:
+        categorical_report = CategoricalReport()
+        rule_report = RuleReport()
+        with stages.stage('transform', len(normalized_df)) as stage:
+            transformed_df = transform(normalized_df, table_key, categorical_report, duplicate_rows, rule_report=rule_report)
+            stage.rows_out = len(transformed_df)
+        record_categorical_violations(key, table_key, quality_metrics, categorical_report)
+        record_rule_violations(key, table_key, quality_metrics, rule_report)
+        if transformed_df.empty and not read_skipped_rows:
+            prepared['error'] = f"No valid rows remained after transform for {key}"
+        else:
+            with stages.stage('align', len(transformed_df)) as stage:
+                coerced_df = coerce_to_column_types(transformed_df, column_types)
+                coerced_df, filtered_rows = filter_loaded_rows(coerced_df, table_key, watermark)
+                prepared['rejected'] = dirty_rejections(normalized_df, coerced_df)
+                prepared['watermark'] = frame_watermark(coerced_df, table_key) if INCREMENTAL else None
+                stage.rows_out = len(coerced_df)
+            prepared['skipped_rows'] = read_skipped_rows + filtered_rows
+            prepared['transformed_df'] = coerced_df
+
+    prepared['elapsed_seconds'] = perf_counter() - started_at
+    return prepared
+
+
+def new_prepared_file(quality_metrics):
+    return {
+        'quality_metrics': quality_metrics,
+        'transformed_df': None,
+        'error': None,
+        'loaded_rows': None,
+        'skipped_rows': 0,
+        'watermark': None,
+        'rejected': None,
+        'quarantined_rows': 0,
+        'profile': None,
+        'dtype_plan': None,
+        'stages': StageMetrics(),
+    }
+
+
+def record_dtype_plan(key, table_key, dtype_report):
+    """Log what the dtype plan changed in one file and return it as the file's ``dtype_plan`` metrics."""
+    if dtype_report.columns:
+        LOGGER.info(
+            "Dtype plan | file_name=%s | table_name=%s | bytes_before=%s | bytes_after=%s | columns=%s",
+            key,
+            TABLE_MAP[table_key],
+            dtype_report.bytes_before,
+            dtype_report.bytes_after,
+            ', '.join(f'{column}:{dtype}' for column, dtype in sorted(dtype_report.columns.items())),
+        )
+    return dtype_report.to_metrics()
+
+
+def record_categorical_violations(key, table_key, quality_metrics, categorical_report):
+    quality_metrics['categorical_violations'] = categorical_report.to_metrics()
+    LOGGER.info(
+        "Categorical validation | file_name=%s | table_name=%s | dirty_records=%s | total_violations=%s | violations_by_rule=%s",
+        key,
+        TABLE_MAP[table_key],
+        categorical_report.dirty_records,
+        categorical_report.total_violations,
+        {column: count for column, count in categorical_report.violations.items() if count},
+    )
+
+
+def record_rule_violations(key, table_key, quality_metrics, rule_report):
+    quality_metrics['rule_violations'] = rule_report.to_metrics()
+    if not rule_report.violations:
         return
+    LOGGER.info(
+        "Quality rules | file_name=%s | table_name=%s | dirty_records=%s | total_violations=%s | violations_by_rule=%s",
+        key,
+        TABLE_MAP[table_key],
+        rule_report.dirty_records,
+        rule_report.total_violations,
+        {name: count for name, count in rule_report.violations.items() if count},
+    )
 
-    LOGGER.info("Pipeline start | stage=phase_4_etl | file_count=%s", len(files))
 
-    with psycopg2.connect(WAREHOUSE_CONN) as conn:
-        with conn.cursor() as cur:
-            cur.execute("SET search_path TO staging")
+def stream_file(key, table_key, column_types, batch, watermark=None, body=None, stages=None):
+    """Extract, validate, transform, and load a CSV/JSON file in ETL_CHUNK_ROWS chunks.
 
-        for key in files:
-            file_started_at = perf_counter()
-            file_type = detect_file_type(key)
+    Chunks are loaded into the open transaction as they are transformed, and
+    the transaction is only committed once the merged quality metrics pass,
+    so a rejected file leaves nothing behind exactly like the whole-file path.
+    Peak memory is bounded by one chunk plus eight bytes per distinct row hash.
+    Dirty rows are quarantined chunk by chunk in the same transaction; a file
+    that fails validation is read again to quarantine its rows. Stage spans
+    are added to ``stages`` when given, so a file that raises part way
+    through still reports what it read and loaded.
+    """
+    started_at = perf_counter()
+    file_type = detect_file_type(key)
+    LOGGER.info(
+        "File processing start | file_name=%s | file_type=%s | inferred_table=%s | chunk_rows=%s",
+        key,
+        file_type,
+        table_key,
+        ETL_CHUNK_ROWS,
+    )
 
-            try:
-                table_key = infer_table(key)
-                if table_key not in TABLE_MAP:
-                    raise ValueError(f"No table mapping found for inferred table key {table_key}")
-
-                LOGGER.info("File processing start | file_name=%s | file_type=%s | inferred_table=%s", key, file_type, table_key)
-
-                raw_df = extract_file(key)
-                normalized_df = normalize_column_aliases(raw_df.copy(), table_key)
-                target_columns = get_table_columns(conn, TABLE_MAP[table_key])
-                quality_metrics = evaluate_data_quality(normalized_df, table_key, target_columns)
-
-                run_summary['quality_summary']['files_checked'] += 1
-                run_summary['quality_summary']['duplicate_records'] += quality_metrics['duplicate_records']
-                run_summary['quality_summary']['total_null_values'] += quality_metrics['total_null_values']
-                if not quality_metrics['schema_validation']['is_valid']:
-                    run_summary['quality_summary']['schema_failures'] += 1
-
-                log_quality_metrics(
-                    LOGGER,
-                    file_name=key,
-                    file_type=file_type,
-                    table_name=TABLE_MAP[table_key],
-                    metrics=quality_metrics,
+    accumulator = QualityAccumulator(
+        quality_key_columns(table_key),
+        new_table_profile(column_types),
+        duplicate_check_columns(table_key, column_types),
+    )
+    categorical_report = CategoricalReport()
+    rule_report = RuleReport()
+    dtype_report = DtypeReport()
+    stages = StageMetrics() if stages is None else stages
+    transformed_rows = 0
+    loaded_rows = 0
+    skipped_rows = 0
+    read_skipped_rows = 0
+    quarantined_rows = 0
+    loaded_watermark = None
+    conn = batch.conn
+    try:
+        batch.begin_file()
+        with stages.stage('extract'):
+            source = open_staging_object(key) if body is None else body
+        chunks = iter_file_chunks(
+            key,
+            ETL_CHUNK_ROWS,
+            projection_columns(table_key, column_types),
+            watermark_row_filter(table_key, watermark),
+            source,
+        )
+        bytes_read = 0
+        while True:
+            # Extract is the time spent waiting for the reader's next chunk.
+            with stages.stage('extract') as stage:
+                chunk = next(chunks, None)
+                stage.rows_out = 0 if chunk is None else len(chunk)
+                stage.bytes_read = bytes_consumed(source) - bytes_read
+            bytes_read += stage.bytes_read
+            if chunk is None:
+                break
+            read_skipped_rows += chunk.attrs.get('skipped_rows', 0)
+            if chunk.empty:
+                continue
+            with stages.stage('normalize', len(chunk)):
+                normalized_chunk, chunk_dtypes = plan_dtypes(normalize_column_aliases(chunk, table_key), table_key, column_types)
+            dtype_report.merge(chunk_dtypes)
+            with stages.stage('quality', len(normalized_chunk)) as stage:
+                duplicate_rows = accumulator.add(normalized_chunk, planned_date_columns(table_key))
+                blocked = accumulator.has_blocking_errors(table_key)
+                stage.rows_out = 0 if blocked else len(normalized_chunk)
+            # Keep profiling a doomed file for its metrics, but stop loading it.
+            if blocked:
+                continue
+
+            with stages.stage('transform', len(normalized_chunk)) as stage:
+                transformed_chunk = transform(normalized_chunk, table_key, categorical_report, duplicate_rows, rule_report=rule_report)
+                stage.rows_out = len(transformed_chunk)
+            if transformed_chunk.empty:
+                continue
+            transformed_rows += len(transformed_chunk)
+            with stages.stage('align', len(transformed_chunk)) as stage:
+                coerced_chunk = coerce_to_column_types(transformed_chunk, column_types)
+                coerced_chunk, chunk_skipped = filter_loaded_rows(coerced_chunk, table_key, watermark)
+                stage.rows_out = len(coerced_chunk)
+            skipped_rows += chunk_skipped
+            if coerced_chunk.empty:
+                continue
+            if INCREMENTAL:
+                loaded_watermark = max_watermark(loaded_watermark, frame_watermark(coerced_chunk, table_key))
+            with stages.stage('load', len(coerced_chunk)) as stage:
+                quarantined_rows += write_quarantine(dirty_rejections(normalized_chunk, coerced_chunk), key, table_key, conn)
+                stage.rows_out = load_frame(coerced_chunk, table_key, conn)
+            loaded_rows += stage.rows_out
+
+        quality_metrics = accumulator.metrics(table_key, list(column_types))
+        log_quality_metrics(
+            LOGGER,
+            file_name=key,
+            file_type=file_type,
+            table_name=TABLE_MAP[table_key],
+            metrics=quality_metrics,
+        )
+
+        prepared = new_prepared_file(quality_metrics)
+        prepared['profile'] = accumulator.profile
+        prepared['dtype_plan'] = record_dtype_plan(key, table_key, dtype_report)
+        prepared['stages'] = stages
+        prepared['skipped_rows'] = skipped_rows + read_skipped_rows
+        if quality_metrics['validation_errors']:
+            prepared['error'] = (
+                f"Data quality validation failed for {key}: {'; '.join(quality_metrics['validation_errors'])}"
+            )
+        else:
+            record_categorical_violations(key, table_key, quality_metrics, categorical_report)
+            record_rule_violations(key, table_key, quality_metrics, rule_report)
+            if transformed_rows == 0 and not read_skipped_rows:
+                prepared['error'] = f"No valid rows remained after transform for {key}"
+
+        if prepared['error']:
+            batch.rollback_file()
+            if ETL_QUARANTINE and quality_metrics['validation_errors']:
+                prepared['quarantined_rows'] = quarantine_streamed_file(
+                    key, table_key, column_types, batch, watermark, body, prepared['error']
+                )
+        else:
+            with stages.stage('metadata'):
+                batch.finish_file(table_key, loaded_rows, loaded_watermark)
+            prepared['loaded_rows'] = loaded_rows
+            prepared['quarantined_rows'] = quarantined_rows
+    except Exception:
+        batch.rollback_file()
+        raise
+
+    prepared['elapsed_seconds'] = perf_counter() - started_at
+    return prepared
+
+
+def quarantine_streamed_file(key, table_key, column_types, batch, watermark, body, error):
+    """Read a streamed file that failed validation again and quarantine its rows chunk by chunk."""
+    if body is not None:
+        if getattr(body, 'closed', False) or not hasattr(body, 'seek'):
+            body = None
+        else:
+            body.seek(0)
+
+    def write(conn):
+        written = 0
+        chunks = iter_file_chunks(
+            key,
+            ETL_CHUNK_ROWS,
+            projection_columns(table_key, column_types),
+            watermark_row_filter(table_key, watermark),
+            body,
+        )
+        for chunk in chunks:
+            normalized_chunk, _ = plan_dtypes(normalize_column_aliases(chunk, table_key), table_key, column_types)
+            rejected = file_rejections(normalized_chunk, error)
+            written += write_quarantine(rejected, key, table_key, conn)
+        return written
+
+    return quarantine_rejected_file(key, batch, write)
+
+
+def load_prepared_file(prepared, table_key, batch, key=None):
+    if prepared['loaded_rows'] is not None:
+        return prepared['loaded_rows']
+    df = prepared['transformed_df']
+    stages = prepared['stages']
+    try:
+        with stages.stage('load', len(df)) as stage:
+            batch.begin_file()
+            # Dirty rows are quarantined in the transaction that loads the clean ones.
+            prepared['quarantined_rows'] = write_quarantine(prepared['rejected'], key, table_key, batch.conn)
+            if df.empty:
+                inserted = 0
+            elif batch.batched:
+                inserted = load_frame(df, table_key, batch.conn)
+            else:
+                inserted = upsert(df, table_key, batch.conn)
+            stage.rows_out = inserted
+        with stages.stage('metadata'):
+            batch.finish_file(table_key, inserted, prepared['watermark'])
+    except (pg_errors.UndefinedColumn, pg_errors.UndefinedTable, pg_errors.DatatypeMismatch):
+        # The staging DDL changed under us; the next lookup re-reads the catalog.
+        batch.rollback_file()
+        SCHEMA_CACHE.invalidate()
+        raise
+    except Exception:
+        batch.rollback_file()
+        raise
+    return inserted
+
+
+def complete_file_outcome(outcome, prepared, table_key, batch, started_at, object_version=None):
+    """Load a prepared file and fill in its outcome; errors are recorded, not raised.
+
+    Under a batched commit policy the outcome may still be marked failed later
+    if the group commit that carries it fails.
+    """
+    try:
+        outcome['quality_metrics'] = prepared['quality_metrics']
+        outcome['profile'] = prepared['profile']
+        outcome['dtype_plan'] = prepared['dtype_plan']
+        outcome['stages'] = prepared['stages']
+        if prepared['error']:
+            outcome['rows_quarantined'] = prepared['quarantined_rows']
+            if prepared['rejected'] is not None:
+                outcome['rows_quarantined'] += quarantine_rejected_file(
+                    outcome['file_name'],
+                    batch,
+                    lambda conn: write_quarantine(prepared['rejected'], outcome['file_name'], table_key, conn),
                 )
+            raise ValueError(prepared['error'])
+
+        outcome['rows_processed'] = load_prepared_file(prepared, table_key, batch, outcome['file_name'])
+        outcome['rows_skipped'] = prepared['skipped_rows']
+        outcome['rows_quarantined'] = prepared['quarantined_rows']
+        if object_version is not None:
+            with outcome['stages'].stage('metadata'):
+                record_ledger_entries([outcome], {outcome['file_name']: object_version}, table_key, batch)
+        log_file_complete(outcome, started_at)
+    except Exception as exc:
+        fail_file_outcome(outcome, exc, started_at)
+        return outcome
+
+    batch.file_loaded(outcome)
+    return outcome
 
-                if quality_metrics['validation_errors']:
-                    raise ValueError(
-                        f"Data quality validation failed for {key}: {'; '.join(quality_metrics['validation_errors'])}"
+
+def log_file_complete(outcome, started_at):
+    outcome['processing_time_seconds'] = round(perf_counter() - started_at, 2)
+    LOGGER.info(
+        "File processing complete | file_name=%s | file_type=%s | rows_processed=%s | rows_skipped=%s | processing_time_seconds=%.2f",
+        outcome['file_name'],
+        outcome['file_type'],
+        outcome['rows_processed'],
+        outcome['rows_skipped'],
+        outcome['processing_time_seconds'],
+    )
+
+
+def record_ledger_entries(outcomes, object_versions, table_key, batch):
+    entries = [
+        (outcome['file_name'], object_versions[outcome['file_name']], TABLE_MAP[table_key], outcome['rows_processed'])
+        for outcome in outcomes
+        if object_versions.get(outcome['file_name']) is not None
+    ]
+    if not entries:
+        return
+    try:
+        batch.record_ledger(entries)
+    except Exception as exc:
+        # The rows are already loaded; a missing ledger row only means the
+        # object is reloaded (and deduplicated by ON CONFLICT) next time.
+        if not batch.batched:
+            batch.conn.rollback()
+        LOGGER.warning(
+            "Load ledger update failed | file_name=%s | error=%s",
+            ', '.join(entry[0] for entry in entries),
+            exc,
+        )
+
+
+def fail_file_outcome(outcome, exc, started_at):
+    outcome['error'] = str(exc)
+    outcome['processing_time_seconds'] = round(perf_counter() - started_at, 2)
+    LOGGER.error(
+        "File processing failed | file_name=%s | file_type=%s | processing_time_seconds=%.2f | error=%s",
+        outcome['file_name'],
+        outcome['file_type'],
+        outcome['processing_time_seconds'],
+        exc,
+        exc_info=exc,
+    )
+    return outcome
+
+
+def record_file_outcome(run_summary, outcome):
+    quality_metrics = outcome['quality_metrics']
+    if quality_metrics is not None:
+        run_summary['quality_summary']['files_checked'] += 1
+        run_summary['quality_summary']['duplicate_records'] += quality_metrics['duplicate_records']
+        run_summary['quality_summary']['total_null_values'] += quality_metrics['total_null_values']
+        if not quality_metrics['schema_validation']['is_valid']:
+            run_summary['quality_summary']['schema_failures'] += 1
+        if quality_metrics['categorical_violations']:
+            run_summary['quality_summary']['categorical_violations'] += quality_metrics['categorical_violations']['total_violations']
+        if quality_metrics['rule_violations']:
+            run_summary['quality_summary']['rule_violations'] += quality_metrics['rule_violations']['total_violations']
+    run_summary['rows_quarantined'] += outcome['rows_quarantined']
+    if outcome['dtype_plan']:
+        run_summary['dtype_bytes_saved'] += outcome['dtype_plan']['bytes_saved']
+
+    if outcome['error']:
+        run_summary['errors'].append({'file_name': outcome['file_name'], 'error': outcome['error']})
+        return
+
+    run_summary['files_processed'] += 1
+    run_summary['rows_loaded'] += outcome['rows_processed']
+    run_summary['rows_skipped'] += outcome['rows_skipped']
+    run_summary['file_metrics'].append({
+        'file_name': outcome['file_name'],
+        'file_type': outcome['file_type'],
+        'table_name': TABLE_MAP[outcome['table_key']],
+        'rows_processed': outcome['rows_processed'],
+        'rows_skipped': outcome['rows_skipped'],
+        'rows_quarantined': outcome['rows_quarantined'],
+        'processing_time_seconds': outcome['processing_time_seconds'],
+        'categorical_violations': (quality_metrics or {}).get('categorical_violations'),
+        'rule_violations': (quality_metrics or {}).get('rule_violations'),
+        'dtype_plan': outcome['dtype_plan'],
+        'stages': outcome['stages'].to_metrics(),
+        'load_batch': outcome['load_batch'],
+    })
+
+
+def configure_session(conn):
+    with conn.cursor() as cur:
+        cur.execute("SET search_path TO staging")
+    conn.commit()
+
+
+# ----------------------------
+# FILE COALESCING
+# ----------------------------
+def coalescible_keys(files, object_versions=None):
+    """Return {key: table_key} for the keys small enough to be loaded in coalesced batches."""
+    if ETL_COALESCE_ROWS == 0:
+        return {}
+    keys = {}
+    for key in files:
+        version = (object_versions or {}).get(key)
+        if version is None or version[1] > ETL_COALESCE_MAX_BYTES:
+            continue
+        try:
+            keys[key] = resolve_table_key(key)
+        except ValueError:
+            continue
+    return keys
+
+
+def read_coalesced_file(key, table_key, column_types, watermark):
+    """Extract and normalize one file for a coalesced batch; errors are returned, not raised."""
+    started_at = perf_counter()
+    LOGGER.info(
+        "File processing start | file_name=%s | file_type=%s | inferred_table=%s | coalesced=True",
+        key,
+        detect_file_type(key),
+        table_key,
+    )
+    stages = StageMetrics()
+    read = {'key': key, 'started_at': started_at, 'frame': None, 'read_skipped_rows': 0, 'dtype_plan': None, 'stages': stages, 'error': None}
+    try:
+        with stages.stage('extract') as stage:
+            source = open_staging_object(key)
+            raw_df = extract_file(key, projection_columns(table_key, column_types), watermark_row_filter(table_key, watermark), source)
+            stage.rows_out = len(raw_df)
+            stage.bytes_read = bytes_consumed(source)
+        read['read_skipped_rows'] = raw_df.attrs.get('skipped_rows', 0)
+        with stages.stage('normalize', len(raw_df)):
+            read['frame'], dtype_report = plan_dtypes(normalize_column_aliases(raw_df, table_key), table_key, column_types)
+        read['dtype_plan'] = record_dtype_plan(key, table_key, dtype_report)
+    except Exception as exc:
+        read['error'] = exc
+    return read
+
+
+def iter_coalesced_reads(keys, table_key, column_types, watermark):
+    """Read ``keys`` on ETL_COALESCE_READERS threads and yield the results in input order."""
+    pending_keys = iter(keys)
+    window = []
+    with ThreadPoolExecutor(max_workers=ETL_COALESCE_READERS, thread_name_prefix='coalesce-read') as pool:
+        for key in pending_keys:
+            window.append(pool.submit(read_coalesced_file, key, table_key, column_types, watermark))
+            if len(window) >= ETL_COALESCE_READERS * 2:
+                break
+        while window:
+            read = window.pop(0).result()
+            next_key = next(pending_keys, None)
+            if next_key is not None:
+                window.append(pool.submit(read_coalesced_file, next_key, table_key, column_types, watermark))
+            yield read
+
+
+def segment_sums(values, file_rows):
+    """Sum the rows of a 2-D array per file, for files stored back to back."""
+    running = np.zeros((len(values) + 1, values.shape[1]), dtype=np.int64)
+    np.cumsum(values, axis=0, out=running[1:])
+    ends = np.cumsum(file_rows)
+    return running[ends] - running[ends - file_rows]
+
+
+def evaluate_coalesced_quality(df, file_rows, table_key, target_columns, profile=None):
+    """Return per-file quality metrics and the duplicate-row mask for a coalesced batch.
+
+    One ``frame_hashes`` pass covers the whole batch. Pairing each row hash
+    with its file position keeps duplicates within a file, as
+    ``evaluate_data_quality`` counts them per file; rows repeated across files
+    are left to ``ON CONFLICT`` as before. Files in a batch share one column
+    layout, so schema checks are the same for each of them. ``profile`` is
+    filled for the batch as a whole.
+    """
+    sources = np.repeat(np.arange(len(file_rows)), file_rows)
+    hashes = frame_hashes(
+        df,
+        quality_key_columns(table_key),
+        profile,
+        planned_date_columns(table_key),
+        duplicate_check_columns(table_key, target_columns),
+    )
+    duplicate_rows = pd.DataFrame({'file': sources, 'row': hashes.rows}).duplicated().to_numpy()
+    duplicate_counts = np.bincount(sources[duplicate_rows], minlength=len(file_rows))
+
+    duplicate_key_counts = np.zeros(len(file_rows), dtype=np.int64)
+    if hashes.keys is not None:
+        key_sources = sources[hashes.key_present]
+        repeated_keys = pd.DataFrame({'file': key_sources, 'key': hashes.keys[hashes.key_present]}).duplicated().to_numpy()
+        duplicate_key_counts = np.bincount(key_sources[repeated_keys], minlength=len(file_rows))
+
+    null_counts = segment_sums(df.isna().to_numpy(), file_rows)
+    metrics = [
+        build_quality_metrics(
+            table_key,
+            target_columns,
+            row_count,
+            {column: int(count) for column, count in zip(df.columns, file_nulls)},
+            int(duplicate_count),
+            int(duplicate_key_count),
+        )
+        for row_count, file_nulls, duplicate_count, duplicate_key_count in zip(
+            file_rows, null_counts, duplicate_counts, duplicate_key_counts
+        )
+    ]
+    return metrics, duplicate_rows
+
+
+def load_coalesced_batch(reads, table_key, column_types, batch, watermark=None, object_versions=None):
+    """Validate, transform, and load several files of one table as a single frame.
+
+    Quality metrics, validation errors, categorical violations, and loaded and
+    skipped row counts are still worked out per file from each row's file
+    position. The files that pass are loaded with one bulk load and one
+    etl_metadata update. If that load fails, they are loaded again one at a
+    time, so the error is attributed to the file that caused it. With
+    ETL_QUARANTINE, dirty rows are quarantined with the batch load and the
+    rows of files that fail validation right away. With ETL_PROFILE the batch
+    is profiled as one unit in the quality pass, and the profile goes on the
+    first loaded outcome so the run merges it once; the rows are profiled
+    again only when some files are not loaded with the batch.
+    Stages run once for the whole batch are charged to its first file.
+    Returns the outcomes in the order of ``reads``.
+    """
+    outcomes = [new_file_outcome(read['key'], table_key) for read in reads]
+    for read, outcome in zip(reads, outcomes):
+        outcome['dtype_plan'] = read['dtype_plan']
+        outcome['stages'] = read['stages']
+    stages = outcomes[0]['stages']
+    file_rows = np.array([len(read['frame']) for read in reads], dtype=np.int64)
+    # Categorical columns stay categorical across the batch.
+    df = concat_frames(read['frame'] for read in reads)
+    sources = pd.Series(np.repeat(np.arange(len(reads)), file_rows), index=df.index)
+    read_skipped_rows = np.array([read['read_skipped_rows'] for read in reads], dtype=np.int64)
+    load_batch = {'first_file': reads[0]['key'], 'files': len(reads)}
+
+    profile = new_table_profile(column_types)
+    with stages.stage('quality', len(df)) as stage:
+        quality_metrics, duplicate_rows = evaluate_coalesced_quality(df, file_rows, table_key, list(column_types), profile)
+        stage.rows_out = int(sum(rows for rows, metrics in zip(file_rows, quality_metrics) if not metrics['validation_errors']))
+    passed = np.zeros(len(reads), dtype=bool)
+    for position, (read, outcome, metrics) in enumerate(zip(reads, outcomes, quality_metrics)):
+        outcome['quality_metrics'] = metrics
+        outcome['load_batch'] = load_batch
+        log_quality_metrics(LOGGER, file_name=read['key'], file_type=outcome['file_type'], table_name=TABLE_MAP[table_key], metrics=metrics)
+        if metrics['validation_errors']:
+            message = f"Data quality validation failed for {read['key']}: {'; '.join(metrics['validation_errors'])}"
+            failed_rows = file_rejections(read['frame'], message)
+            if failed_rows is not None:
+                outcome['rows_quarantined'] = quarantine_rejected_file(
+                    read['key'],
+                    batch,
+                    lambda conn: write_quarantine(failed_rows, read['key'], table_key, conn),
+                )
+            fail_file_outcome(outcome, ValueError(message), read['started_at'])
+        else:
+            passed[position] = True
+
+    keep_rows = passed[sources.to_numpy()]
+    categorical_reports = [CategoricalReport() for _ in reads]
+    rule_reports = [RuleReport() for _ in reads]
+    with stages.stage('transform', int(keep_rows.sum())) as stage:
+        transformed_df = transform(
+            df[keep_rows],
+            table_key,
+            None,
+            duplicate_rows[keep_rows],
+            sources,
+            categorical_reports,
+            group_rule_reports=rule_reports,
+        )
+        stage.rows_out = len(transformed_df)
+    transformed_rows = np.bincount(sources.loc[transformed_df.index].to_numpy(), minlength=len(reads))
+    for position in np.flatnonzero(passed):
+        read = reads[position]
+        record_categorical_violations(read['key'], table_key, quality_metrics[position], categorical_reports[position])
+        record_rule_violations(read['key'], table_key, quality_metrics[position], rule_reports[position])
+        if transformed_rows[position] == 0 and not read_skipped_rows[position]:
+            fail_file_outcome(outcomes[position], ValueError(f"No valid rows remained after transform for {read['key']}"), read['started_at'])
+            passed[position] = False
+    if not passed.any():
+        # Nothing to load, so no etl_metadata row either, as for a single failed file.
+        return outcomes
+
+    with stages.stage('align', len(transformed_df)) as stage:
+        coerced_df = coerce_to_column_types(transformed_df, column_types)
+        coerced_df, _ = filter_loaded_rows(coerced_df, table_key, watermark)
+        rejected = dirty_rejections(df, coerced_df)
+        stage.rows_out = len(coerced_df)
+    row_sources = sources.loc[coerced_df.index].to_numpy()
+    skipped_rows = read_skipped_rows + transformed_rows - np.bincount(row_sources, minlength=len(reads))
+    loadable = np.flatnonzero(passed)
+    if profile is not None and not passed.all():
+        profile = profile_frame(df[passed[sources.to_numpy()]], column_types, planned_date_columns(table_key))
+    rejected_sources = None if rejected is None else sources.loc[rejected.index].to_numpy()
+    quarantined_rows = np.zeros(len(reads), dtype=np.int64)
+
+    try:
+        with stages.stage('load', len(coerced_df)) as stage:
+            batch.begin_file()
+            if rejected is not None:
+                source_keys = np.array([read['key'] for read in reads], dtype=object)[rejected_sources]
+                write_quarantine(rejected, source_keys, table_key, batch.conn)
+                quarantined_rows = np.bincount(rejected_sources, minlength=len(reads))
+            loaded_df = rows_to_load(coerced_df, table_key, batch.conn)
+            if coerced_df.empty:
+                inserted = 0
+            else:
+                inserted = write_rows(loaded_df, table_key, batch.conn)
+                if not batch.batched:
+                    batch.conn.commit()
+            stage.rows_out = inserted
+        with stages.stage('metadata'):
+            batch.finish_file(table_key, inserted, frame_watermark(coerced_df, table_key) if INCREMENTAL else None)
+    except Exception as exc:
+        batch.rollback_file()
+        if isinstance(exc, (pg_errors.UndefinedColumn, pg_errors.UndefinedTable, pg_errors.DatatypeMismatch)):
+            SCHEMA_CACHE.invalidate()
+        LOGGER.warning(
+            "Coalesced load failed, loading files one at a time | table_name=%s | files=%s | error=%s",
+            TABLE_MAP[table_key],
+            len(loadable),
+            exc,
+        )
+        for position in loadable:
+            prepared = new_prepared_file(quality_metrics[position])
+            prepared['transformed_df'] = coerced_df[row_sources == position]
+            prepared['rejected'] = None if rejected is None else rejected[rejected_sources == position]
+            prepared['profile'] = None if profile is None else profile_frame(reads[position]['frame'], column_types, planned_date_columns(table_key))
+            prepared['dtype_plan'] = reads[position]['dtype_plan']
+            prepared['stages'] = outcomes[position]['stages']
+            prepared['skipped_rows'] = int(skipped_rows[position])
+            prepared['watermark'] = frame_watermark(prepared['transformed_df'], table_key) if INCREMENTAL else None
+            complete_file_outcome(
+                outcomes[position],
+                prepared,
+                table_key,
+                batch,
+                reads[position]['started_at'],
+                (object_versions or {}).get(reads[position]['key']),
+            )
+        return outcomes
+
+    # Each file is credited with its rows that survived load_frame's dirty
+    # filter and key dedupe, so the per-file counts add up to ``inserted``.
+    loaded_rows = np.bincount(sources.loc[loaded_df.index].to_numpy(), minlength=len(reads)) if inserted else np.zeros(len(reads), dtype=np.int64)
+    loaded_outcomes = [outcomes[position] for position in loadable]
+    for position, outcome in zip(loadable, loaded_outcomes):
+        outcome['rows_processed'] = int(loaded_rows[position])
+        outcome['rows_skipped'] = int(skipped_rows[position])
+        outcome['rows_quarantined'] = int(quarantined_rows[position])
+    if loaded_outcomes:
+        loaded_outcomes[0]['profile'] = profile
+    with stages.stage('metadata'):
+        record_ledger_entries(loaded_outcomes, object_versions or {}, table_key, batch)
+    LOGGER.info(
+        "Coalesced load | table_name=%s | files=%s | rows_processed=%s",
+        TABLE_MAP[table_key],
+        len(loaded_outcomes),
+        inserted,
+    )
+    for position, outcome in zip(loadable, loaded_outcomes):
+        log_file_complete(outcome, reads[position]['started_at'])
+        batch.file_loaded(outcome)
+    return outcomes
+
+
+def group_coalesced_reads(reads):
+    """Group reads, in order, into batches of up to ETL_COALESCE_ROWS rows that share one column layout.
+
+    A failed read is yielded on its own.
+    """
+    pending = []
+    pending_rows = 0
+    for read in reads:
+        if read['error'] is not None:
+            yield [read]
+            continue
+        rows = len(read['frame'])
+        if pending and (pending_rows + rows > ETL_COALESCE_ROWS or list(read['frame'].columns) != list(pending[0]['frame'].columns)):
+            yield pending
+            pending = []
+            pending_rows = 0
+        pending.append(read)
+        pending_rows += rows
+    if pending:
+        yield pending
+
+
+def load_coalesced_files(indexed_keys, table_key, batch, watermark=None, object_versions=None):
+    """Load one table's small files in coalesced batches; returns {index: outcome}."""
+    outcomes = {}
+    indexes = {key: index for index, key in indexed_keys}
+    try:
+        column_types = get_table_column_types(batch.conn, TABLE_MAP[table_key])
+    except Exception as exc:
+        for index, key in indexed_keys:
+            outcomes[index] = fail_file_outcome(new_file_outcome(key, table_key), exc, perf_counter())
+        return outcomes
+
+    reads = iter_coalesced_reads([key for _, key in indexed_keys], table_key, column_types, watermark)
+    for group in group_coalesced_reads(reads):
+        if group[0]['error'] is not None:
+            read = group[0]
+            outcome = new_file_outcome(read['key'], table_key)
+            outcome['stages'] = read['stages']
+            outcomes[indexes[read['key']]] = fail_file_outcome(outcome, read['error'], read['started_at'])
+            continue
+        for read, outcome in zip(group, load_coalesced_batch(group, table_key, column_types, batch, watermark, object_versions)):
+            outcomes[indexes[read['key']]] = outcome
+    return outcomes
+
+
+# ----------------------------
+# EXECUTION ENGINES
+# ----------------------------
+def run_serial(files, object_versions=None):
+    outcomes = {}
+
+    with psycopg2.connect(WAREHOUSE_CONN) as conn:
+        configure_session(conn)
+        if ETL_QUARANTINE:
+            ensure_quarantine_table(conn)
+        watermarks = load_watermarks(conn)
+        SCHEMA_CACHE.load(conn)
+        conn.commit()
+
+        # Small files wait in per-table lists and are loaded in coalesced
+        # batches, before the table's next standalone file and at the end.
+        coalesced = coalescible_keys(files, object_versions)
+        pending = OrderedDict()
+        # The next ETL_PREFETCH_DEPTH standalone objects download while this
+        # loop transforms and loads the current one.
+        prefetcher = new_prefetcher([key for key in files if key not in coalesced], object_versions)
+        batch = CommitBatcher(conn)
+        try:
+            for index, key in enumerate(files):
+                if key in coalesced:
+                    pending.setdefault(coalesced[key], []).append((index, key))
+                    continue
+                table_key = infer_table(key)
+                if table_key in pending:
+                    batch.begin_table(table_key)
+                    outcomes.update(
+                        load_coalesced_files(pending.pop(table_key), table_key, batch, watermarks.get(table_key), object_versions)
                     )
 
-                transformed_df = transform(normalized_df, table_key)
-                if transformed_df.empty:
-                    raise ValueError(f"No valid rows remained after transform for {key}")
-
-                inserted = upsert(transformed_df, table_key, conn)
-                update_metadata(table_key, inserted, conn)
-
-                file_duration = round(perf_counter() - file_started_at, 2)
-                run_summary['files_processed'] += 1
-                run_summary['rows_loaded'] += inserted
-                run_summary['file_metrics'].append({
-                    'file_name': key,
-                    'file_type': file_type,
-                    'table_name': TABLE_MAP[table_key],
-                    'rows_processed': inserted,
-                    'processing_time_seconds': file_duration,
-                })
-
-                LOGGER.info(
-                    "File processing complete | file_name=%s | file_type=%s | rows_processed=%s | processing_time_seconds=%.2f",
-                    key,
-                    file_type,
-                    inserted,
-                    file_duration,
+                file_started_at = perf_counter()
+                outcome = new_file_outcome(key)
+                try:
+                    table_key = resolve_table_key(key)
+                    outcome['table_key'] = table_key
+                    batch.begin_table(table_key)
+                    body = prefetcher.take(key).body if prefetcher else None
+                    column_types = get_table_column_types(conn, TABLE_MAP[table_key])
+                    watermark = watermarks.get(table_key)
+                    if is_streamable(key):
+                        prepared = stream_file(key, table_key, column_types, batch, watermark, body, outcome['stages'])
+                    else:
+                        prepared = prepare_file(key, table_key, column_types, watermark, body)
+                except Exception as exc:
+                    outcomes[index] = fail_file_outcome(outcome, exc, file_started_at)
+                    continue
+                finally:
+                    if prefetcher:
+                        prefetcher.release(key)
+
+                outcomes[index] = complete_file_outcome(
+                    outcome,
+                    prepared,
+                    table_key,
+                    batch,
+                    file_started_at,
+                    (object_versions or {}).get(key),
                 )
 
+            for table_key, indexed_keys in pending.items():
+                batch.begin_table(table_key)
+                outcomes.update(load_coalesced_files(indexed_keys, table_key, batch, watermarks.get(table_key), object_versions))
+            batch.close()
+        finally:
+            if prefetcher:
+                prefetcher.close()
+
+    return [outcomes[index] for index in range(len(files))]
+
+
+def group_files_by_table(files):
+    """Split keys into per-table groups, keeping each group in input order."""
+    groups = OrderedDict()
+    unmapped = []
+    for index, key in enumerate(files):
+        try:
+            table_key = resolve_table_key(key)
+        except ValueError as exc:
+            unmapped.append((index, key, exc))
+            continue
+        groups.setdefault(table_key, []).append((index, key))
+    return groups, unmapped
+
+
+def run_table_group(table_key, indexed_keys, process_pool, conn_pool, prepare_slots, watermark=None, object_versions=None, prefetch_groups=1):
+    """Prepare a table's files concurrently, then load them strictly in input order.
+
+    One thread owns each table group and holds a single pooled connection, so
+    files that target the same staging table are never loaded out of order or
+    from two sessions at once. Every file submitted to the process pool holds
+    one of the ``prepare_slots`` semaphore's slots until its frame is taken,
+    so across all groups the prepared frames held in the parent never
+    outnumber the slots. A group waits for a slot only when it has nothing
+    else in flight, so the groups holding slots can always release them.
+    Streamed files, which run on this thread, are read ahead like in
+    ``run_serial``, each of the ``prefetch_groups`` groups running at once
+    holding an equal share of ETL_PREFETCH_MEMORY_MB.
+    """
+    outcomes = {}
+    prefetcher = None
+    conn = conn_pool.getconn()
+    try:
+        try:
+            column_types = get_table_column_types(conn, TABLE_MAP[table_key])
+            conn.commit()
+        except Exception as exc:
+            conn.rollback()
+            for index, key in indexed_keys:
+                outcome = new_file_outcome(key, table_key)
+                outcomes[index] = fail_file_outcome(outcome, exc, perf_counter())
+            return outcomes
+
+        # Streamed and coalesced files load on this thread's connection, so
+        # only standalone whole-file keys are handed to the process pool.
+        coalesced = coalescible_keys([key for _, key in indexed_keys], object_versions)
+        standalone = deque((index, key) for index, key in indexed_keys if key not in coalesced)
+        started = deque()
+        # Process pool workers download their own files; coalesced files are
+        # already read on ETL_COALESCE_READERS threads.
+        streamed = [key for _, key in standalone if is_streamable(key)]
+        if streamed:
+            prefetcher = new_prefetcher(streamed, object_versions, prefetch_groups)
+
+        batch = CommitBatcher(conn)
+        pending = [(index, key) for index, key in indexed_keys if key in coalesced]
+        while standalone or started:
+            while standalone:
+                index, key = standalone[0]
+                if is_streamable(key):
+                    started.append((index, key, perf_counter(), None))
+                elif prepare_slots.acquire(blocking=not started):
+                    future = process_pool.submit(prepare_file, key, table_key, column_types, watermark)
+                    started.append((index, key, perf_counter(), future))
+                else:
+                    break
+                standalone.popleft()
+            index, key, submitted_at, future = started.popleft()
+
+            # Coalesced files that precede this one load first, keeping input order.
+            earlier = [(pending_index, pending_key) for pending_index, pending_key in pending if pending_index < index]
+            if earlier:
+                outcomes.update(load_coalesced_files(earlier, table_key, batch, watermark, object_versions))
+                pending = pending[len(earlier):]
+
+            outcome = new_file_outcome(key, table_key)
+            try:
+                if future is None:
+                    try:
+                        body = prefetcher.take(key).body if prefetcher else None
+                        prepared = stream_file(key, table_key, column_types, batch, watermark, body, outcome['stages'])
+                    finally:
+                        if prefetcher:
+                            prefetcher.release(key)
+                else:
+                    try:
+                        prepared = future.result()
+                    finally:
+                        prepare_slots.release()
             except Exception as exc:
-                run_summary['errors'].append({'file_name': key, 'error': str(exc)})
-                LOGGER.exception(
-                    "File processing failed | file_name=%s | file_type=%s | processing_time_seconds=%.2f | error=%s",
-                    key,
-                    file_type,
-                    perf_counter() - file_started_at,
-                    exc,
-                )
+                outcomes[index] = fail_file_outcome(outcome, exc, submitted_at)
+                continue
+
+            # Time spent queued behind other files is not charged to this one.
+            load_started_at = perf_counter() - prepared['elapsed_seconds']
+            outcomes[index] = complete_file_outcome(
+                outcome,
+                prepared,
+                table_key,
+                batch,
+                load_started_at,
+                (object_versions or {}).get(key),
+            )
+        if pending:
+            outcomes.update(load_coalesced_files(pending, table_key, batch, watermark, object_versions))
+        batch.close()
+    finally:
+        if prefetcher:
+            prefetcher.close()
+        conn_pool.putconn(conn)
+
+    return outcomes
+
+
+def run_parallel(files, workers, object_versions=None):
+    groups, unmapped = group_files_by_table(files)
+    outcomes = {index: fail_file_outcome(new_file_outcome(key), exc, perf_counter()) for index, key, exc in unmapped}
+
+    if groups:
+        thread_count = min(workers, len(groups))
+        conn_pool = ThreadedConnectionPool(1, thread_count, WAREHOUSE_CONN)
+        try:
+            connections = [conn_pool.getconn() for _ in range(thread_count)]
+            for conn in connections:
+                configure_session(conn)
+            if ETL_QUARANTINE:
+                ensure_quarantine_table(connections[0])
+            watermarks = load_watermarks(connections[0])
+            SCHEMA_CACHE.load(connections[0])
+            connections[0].commit()
+            for conn in connections:
+                conn_pool.putconn(conn)
+
+            # Spawned workers start from a clean interpreter, so they never
+            # inherit locks or boto3/psycopg2 state from the loader threads.
+            # The table groups share one slot per worker for prepared files.
+            prepare_slots = threading.BoundedSemaphore(workers)
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as process_pool:
+                with ThreadPoolExecutor(max_workers=thread_count) as thread_pool:
+                    futures = [
+                        thread_pool.submit(
+                            run_table_group,
+                            table_key,
+                            indexed_keys,
+                            process_pool,
+                            conn_pool,
+                            prepare_slots,
+                            watermarks.get(table_key),
+                            object_versions,
+                            thread_count,
+                        )
+                        for table_key, indexed_keys in groups.items()
+                    ]
+                    for future in futures:
+                        outcomes.update(future.result())
+        finally:
+            conn_pool.closeall()
+
+    return [outcomes[index] for index in range(len(files))]
+
+
+# ----------------------------
+# STAGE METRICS
+# ----------------------------
+def log_stage_metrics(stages):
+    """Log the run's totals per stage and return them for the summary's ``stage_metrics``."""
+    metrics = stages.to_metrics()
+    for name, totals in metrics.items():
+        LOGGER.info(
+            "Stage metrics | stage=%s | calls=%s | wall_seconds=%.3f | cpu_seconds=%.3f | peak_rss_delta_bytes=%s | rows_in=%s | rows_out=%s | bytes_read=%s",
+            name,
+            totals['calls'],
+            totals['wall_seconds'],
+            totals['cpu_seconds'],
+            totals['peak_rss_delta_bytes'],
+            totals['rows_in'],
+            totals['rows_out'],
+            totals['bytes_read'],
+        )
+    return metrics
+
+
+# ----------------------------
+# DATA PROFILES
+# ----------------------------
+def record_profiles(outcomes):
+    """Merge the run's file profiles per table, check them for drift, and fold them into the stored history.
+
+    Only files that loaded contribute. Drift is checked against the history as
+    it was before this run. Returns the per-table summaries with their drift
+    checks; a failure to read or store the history is logged, not raised.
+    """
+    run_profiles = {}
+    for outcome in outcomes:
+        if outcome['error'] or outcome['profile'] is None:
+            continue
+        table_name = TABLE_MAP[outcome['table_key']]
+        run_profiles.setdefault(table_name, TableProfile()).merge(outcome['profile'])
+    if not run_profiles:
+        return {}
+
+    try:
+        with psycopg2.connect(WAREHOUSE_CONN) as conn:
+            ensure_profile_table(conn)
+            history = load_profiles(conn, run_profiles)
+            report = {}
+            updated = {}
+            for table_name, profile in run_profiles.items():
+                stored, runs = history.get(table_name, (TableProfile(), 0))
+                drift = profile_drift(profile, stored)
+                for check in drift:
+                    LOGGER.warning(
+                        "Profile drift | table_name=%s | column=%s | check=%s | value=%s | baseline=%s",
+                        table_name,
+                        check['column'],
+                        check['check'],
+                        check.get('value'),
+                        check.get('baseline'),
+                    )
+                report[table_name] = {**profile.summary(), 'drift': drift}
+                updated[table_name] = (stored.merge(profile), runs + 1)
+            save_profiles(conn, updated)
+            conn.commit()
+    except Exception as exc:
+        LOGGER.warning("Profile update failed | tables=%s | error=%s", len(run_profiles), exc)
+        return None
+    return report
+
+
+# ----------------------------
+# QUARANTINE EXPORT AND REPLAY
+# ----------------------------
+def export_quarantine():
+    """Write this run's quarantined rows to ETL_QUARANTINE_PATH; a failed export is logged, not raised."""
+    try:
+        with psycopg2.connect(WAREHOUSE_CONN) as conn:
+            written = export_run(conn, RUN_ID, ETL_QUARANTINE_PATH, s3)
+    except Exception as exc:
+        LOGGER.warning("Quarantine export failed | run_id=%s | location=%s | error=%s", RUN_ID, ETL_QUARANTINE_PATH, exc)
+        return None
+    LOGGER.info("Quarantine export | run_id=%s | location=%s | rows=%s", RUN_ID, ETL_QUARANTINE_PATH, written)
+    return written
+
+
+def replay_records(records, table_key, column_types, conn):
+    """Check quarantined source rows again and load the ones that pass, without committing.
+
+    Rows go through the critical column checks, ``transform()``, and
+    ``coerce_to_column_types()`` like a file would; an exact copy of another
+    row in the batch shares that row's result. Returns the ids to mark
+    replayed, a Series of the rule each remaining row fails, and the rows
+    loaded.
+    """
+    normalized = normalize_column_aliases(records.copy(), table_key)
+    rules = QUALITY_RULES.get(table_key, {'required_columns': [], 'critical_columns': []})
+    masks = [
+        (f'required:{column}', np.ones(len(normalized), dtype=bool))
+        for column in rules['required_columns']
+        if column not in normalized.columns
+    ]
+    masks += [
+        (f'critical_null:{column}', normalized[column].isna().to_numpy())
+        for column in rules['critical_columns']
+        if column in normalized.columns
+    ]
+    failed = pd.Series(rule_labels(len(normalized), masks), index=normalized.index, dtype=object)
+
+    checked = normalized[failed.isna().to_numpy()]
+    copies = checked.duplicated().to_numpy()
+    # Replay records the rule each remaining row fails, which needs the labels.
+    coerced = coerce_to_column_types(transform(checked, table_key, quarantine=True), column_types)
+    clean = (coerced['is_dirty'] == False).to_numpy(dtype=bool, na_value=False) if 'is_dirty' in coerced.columns else np.ones(len(coerced), dtype=bool)
+    dirty = dirty_rejections(normalized, coerced, quarantine=True)
+    if dirty is not None:
+        failed.loc[dirty.index] = dirty['rule']
+    # Rows transform dropped for another reason than being a copy (no '@' in email, all null).
+    failed.loc[checked.index[~copies].difference(coerced.index)] = 'transform:dropped'
+
+    if copies.any():
+        hashes = pd.util.hash_pandas_object(checked, index=False)
+        first_rules = pd.Series(failed.loc[checked.index[~copies]].to_numpy(), index=hashes[~copies].to_numpy())
+        failed.loc[checked.index[copies]] = hashes[copies].map(first_rules).to_numpy()
+
+    loaded = load_frame(coerced, table_key, conn) if clean.any() else 0
+    replayed = failed.index[failed.isna().to_numpy() & normalized.index.isin(checked.index)]
+    return replayed, failed.dropna(), loaded
+
+
+def replay_quarantine(table_keys=None, rule=None, run_id=None):
+    """Load the pending quarantined rows that pass the current checks.
+
+    Rows are read per table in quarantine_id order, ETL_QUARANTINE_REPLAY_ROWS
+    at a time. Each batch's load, its replayed_at marks, and the refreshed
+    rules of the rows that still fail commit together. Replayed customer and
+    vehicle rows update their staging rows like any reloaded row.
+    """
+    summary = {'stage': 'quarantine_replay', 'run_id': RUN_ID, 'tables': {}}
+    with psycopg2.connect(WAREHOUSE_CONN) as conn:
+        configure_session(conn)
+        ensure_quarantine_table(conn)
+        SCHEMA_CACHE.load(conn)
+        conn.commit()
+        for table_key in table_keys or list(TABLE_MAP):
+            table_name = TABLE_MAP[table_key]
+            column_types = get_table_column_types(conn, table_name)
+            counts = {'rows_read': 0, 'rows_replayed': 0, 'rows_loaded': 0, 'rows_still_quarantined': 0}
+            after_id = 0
+            while True:
+                records, _ = fetch_pending(conn, table_name, after_id, ETL_QUARANTINE_REPLAY_ROWS, rule, run_id)
+                if not len(records):
+                    break
+                after_id = int(records.index[-1])
+                try:
+                    replayed, failed, loaded = replay_records(records, table_key, column_types, conn)
+                    with conn.cursor() as cur:
+                        mark_replayed(cur, replayed, RUN_ID)
+                        update_rules(cur, failed.index, failed.to_numpy())
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                counts['rows_read'] += len(records)
+                counts['rows_replayed'] += len(replayed)
+                counts['rows_loaded'] += loaded
+                counts['rows_still_quarantined'] += len(failed)
+            summary['tables'][table_name] = counts
+            LOGGER.info(
+                "Quarantine replay | table_name=%s | rows_read=%s | rows_replayed=%s | rows_loaded=%s | rows_still_quarantined=%s",
+                table_name,
+                counts['rows_read'],
+                counts['rows_replayed'],
+                counts['rows_loaded'],
+                counts['rows_still_quarantined'],
+            )
+    return summary
+
+
+# ----------------------------
+# MAIN
+# ----------------------------
+def table_key_argument(value):
+    """Accept a table key (stg_sales) or a staging table name (staging_sales)."""
+    for table_key, table_name in TABLE_MAP.items():
+        if value in (table_key, table_name):
+            return table_key
+    raise argparse.ArgumentTypeError(f"unknown staging table {value!r}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Phase 4 staging ETL')
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='reload staging objects even if the load ledger already has their current version',
+    )
+    parser.add_argument(
+        '--replay-quarantine',
+        action='store_true',
+        help='load the pending quarantined rows that pass the current checks, instead of loading staged files',
+    )
+    parser.add_argument(
+        '--table',
+        action='append',
+        type=table_key_argument,
+        help='with --replay-quarantine, only replay this table (repeatable)',
+    )
+    parser.add_argument('--rule', help='with --replay-quarantine, only replay rows quarantined under this rule')
+    parser.add_argument('--run-id', help='with --replay-quarantine, only replay rows quarantined by this run')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.replay_quarantine:
+        print(f"ETL_SUMMARY::{json.dumps(replay_quarantine(args.table, args.rule, args.run_id))}")
+        return
+
+    run_started_at = perf_counter()
+    run_summary = new_run_summary()
+    stages = StageMetrics()
+    with stages.stage('list') as stage:
+        staged_objects = list_staging_objects()
+        files = list(staged_objects)
+        stage.rows_in = len(files)
+
+        object_versions = resolve_object_versions(staged_objects) if files else {}
+        if files and not args.force:
+            files, unchanged = skip_loaded_objects(files, object_versions)
+            run_summary['files_skipped'] = len(unchanged)
+        stage.rows_out = len(files)
+
+    if not files:
+        LOGGER.info(
+            "Pipeline completion | stage=phase_4_etl | files_processed=0 | files_skipped=%s | rows_loaded=0 | processing_time_seconds=0.0",
+            run_summary['files_skipped'],
+        )
+        run_summary['stage_metrics'] = stages.to_metrics()
+        print(f"ETL_SUMMARY::{json.dumps(run_summary)}")
+        return
+
+    workers = min(ETL_WORKERS, len(files))
+    LOGGER.info(
+        "Pipeline start | stage=phase_4_etl | file_count=%s | workers=%s | incremental=%s",
+        len(files),
+        workers,
+        INCREMENTAL,
+    )
 
+    if workers > 1:
+        outcomes = run_parallel(files, workers, object_versions)
+    else:
+        outcomes = run_serial(files, object_versions)
+
+    # Outcomes come back in input order regardless of engine, which keeps the
+    # summary payload deterministic for the DAG.
+    for outcome in outcomes:
+        record_file_outcome(run_summary, outcome)
+        stages.merge(outcome['stages'])
+    with stages.stage('metadata'):
+        if ETL_QUARANTINE_PATH and run_summary['rows_quarantined']:
+            run_summary['quarantine_export'] = export_quarantine()
+        if ETL_PROFILE:
+            run_summary['profiles'] = record_profiles(outcomes)
+
+    run_summary['stage_metrics'] = log_stage_metrics(stages)
     run_summary['processing_time_seconds'] = round(perf_counter() - run_started_at, 2)
     LOGGER.info(
         "Pipeline completion | stage=phase_4_etl | files_processed=%s | rows_loaded=%s | processing_time_seconds=%.2f | errors=%s",
@@ -579,4 +3009,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
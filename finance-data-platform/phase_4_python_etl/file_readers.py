@@ -0,0 +1,577 @@
+"""Staging file readers for the Phase 4 ETL, registered by file extension."""
+
+from __future__ import annotations
+
+import codecs
+import csv
+import json
+import re
+import shutil
+import tempfile
+from dataclasses import dataclass
+from io import BytesIO
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Collection, Iterator
+
+import pandas as pd
+
+JSON_READ_BYTES = 1024 * 1024
+# Columnar files need random access; bodies up to this size stay in memory,
+# larger ones are spooled to a temporary file.
+SPOOL_MAX_BYTES = 64 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class RowFilter:
+    """Keep rows whose ``column`` is at or after ``minimum`` (or is null).
+
+    ``column`` is the staging column name; ``sources`` lists the file column
+    names that are renamed to it, so readers can find it before aliasing.
+    """
+
+    column: str
+    sources: tuple[str, ...]
+    minimum: pd.Timestamp
+
+
+@dataclass(frozen=True)
+class FileReader:
+    """How to read one file format.
+
+    ``read(body, columns, row_filter)`` returns the whole file as a frame.
+    ``iter_chunks(body, chunk_rows, columns, row_filter)`` yields bounded
+    frames, or is None when the format cannot be streamed. ``columns`` (the
+    names worth keeping) and ``row_filter`` are hints; readers that cannot
+    push them down return every column and row. Rows a reader drops for
+    ``row_filter`` are counted in the frame's ``attrs['skipped_rows']``.
+    """
+
+    file_type: str
+    read: Callable[[BinaryIO, Collection[str] | None, RowFilter | None], pd.DataFrame]
+    iter_chunks: Callable[[BinaryIO, int, Collection[str] | None, RowFilter | None], Iterator[pd.DataFrame]] | None = None
+
+
+PARSE_ENGINES = ('pandas', 'arrow')
+
+READERS: dict[str, FileReader] = {}
+# Engine-specific overrides; extensions without one fall back to READERS.
+ENGINE_READERS: dict[str, dict[str, FileReader]] = {engine: {} for engine in PARSE_ENGINES}
+
+
+def register_reader(extension: str, reader: FileReader, engine: str | None = None) -> None:
+    if engine is None:
+        READERS[extension.lower()] = reader
+    else:
+        ENGINE_READERS[engine][extension.lower()] = reader
+
+
+def find_reader(key: str, engine: str = 'pandas') -> FileReader | None:
+    extension = Path(key).suffix.lower()
+    return ENGINE_READERS.get(engine, {}).get(extension) or READERS.get(extension)
+
+
+def get_reader(key: str, engine: str = 'pandas') -> FileReader:
+    reader = find_reader(key, engine)
+    if reader is None:
+        raise ValueError(f"Unsupported file format: {key}")
+    return reader
+
+
+def supported_extensions() -> tuple[str, ...]:
+    return tuple(READERS)
+
+
+# ----------------------------
+# CSV / JSON / EXCEL
+# ----------------------------
+def read_csv(body, columns=None, row_filter=None):
+    return pd.read_csv(body)
+
+
+def iter_csv_chunks(body, chunk_rows, columns=None, row_filter=None):
+    yield from pd.read_csv(body, chunksize=chunk_rows)
+
+
+def read_json(body, columns=None, row_filter=None):
+    return pd.json_normalize(json.load(body))
+
+
+def iter_json_records(body, read_size=JSON_READ_BYTES):
+    """Yield records from a JSON array (or JSON Lines) without loading the whole document."""
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    position = 0
+    eof = False
+    in_array = None
+
+    while True:
+        while position < len(buffer) and buffer[position] in ' \t\r\n,':
+            position += 1
+
+        if position >= len(buffer):
+            if eof:
+                return
+            raw = body.read(read_size)
+            eof = not raw
+            buffer = buffer[position:] + text_decoder.decode(raw or b'', final=eof)
+            position = 0
+            continue
+
+        if in_array is None:
+            in_array = buffer[position] == '['
+            if in_array:
+                position += 1
+                continue
+
+        if in_array and buffer[position] == ']':
+            return
+
+        try:
+            record, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            raw = body.read(read_size)
+            eof = not raw
+            buffer = buffer[position:] + text_decoder.decode(raw or b'', final=eof)
+            position = 0
+            continue
+
+        yield record
+
+
+def batch_records(records: Iterator[dict[str, Any]], chunk_rows: int) -> Iterator[pd.DataFrame]:
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= chunk_rows:
+            yield pd.json_normalize(batch)
+            batch = []
+    if batch:
+        yield pd.json_normalize(batch)
+
+
+def iter_json_chunks(body, chunk_rows, columns=None, row_filter=None):
+    yield from batch_records(iter_json_records(body), chunk_rows)
+
+
+def read_excel(body, columns=None, row_filter=None):
+    return pd.read_excel(BytesIO(body.read()))
+
+
+# ----------------------------
+# PARQUET
+# ----------------------------
+def import_parquet():
+    try:
+        import pyarrow.compute as pc
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise RuntimeError("Reading Parquet staging files requires the pyarrow package") from exc
+    return pq, pc
+
+
+def spool(body) -> tempfile.SpooledTemporaryFile:
+    handle = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    shutil.copyfileobj(body, handle)
+    handle.seek(0)
+    return handle
+
+
+def project_columns(available, columns):
+    if columns is None:
+        return list(available)
+    return [name for name in available if name in columns]
+
+
+def filter_source_column(available, row_filter):
+    """Return the file column that becomes ``row_filter.column``, or None if it is ambiguous."""
+    if row_filter is None:
+        return None
+    if row_filter.column in available:
+        return row_filter.column
+    present = [name for name in row_filter.sources if name in available]
+    return present[0] if len(present) == 1 else None
+
+
+def timestamp_bound(arrow_type, minimum):
+    """Return ``minimum`` in the unit and zone of a timestamp column, or None for other types."""
+    import pyarrow as pa
+
+    if not pa.types.is_timestamp(arrow_type):
+        return None
+    bound = pd.Timestamp(minimum)
+    if arrow_type.tz is not None:
+        bound = bound.tz_localize('UTC') if bound.tzinfo is None else bound
+    elif bound.tzinfo is not None:
+        bound = bound.tz_convert('UTC').tz_localize(None)
+    return pa.scalar(bound.to_pydatetime(), type=arrow_type)
+
+
+def parquet_row_groups(parquet_file, column_name, bound):
+    """Indexes of row groups that may hold rows at or after ``bound``, judged by their statistics."""
+    metadata = parquet_file.metadata
+    if column_name is None or bound is None:
+        return list(range(metadata.num_row_groups))
+
+    leaf_paths = [metadata.schema.column(index).path for index in range(metadata.num_columns)]
+    if column_name not in leaf_paths:
+        return list(range(metadata.num_row_groups))
+    column_index = leaf_paths.index(column_name)
+    minimum = bound.as_py()
+    kept = []
+    for index in range(metadata.num_row_groups):
+        statistics = metadata.row_group(index).column(column_index).statistics
+        try:
+            skip = (
+                statistics is not None
+                and statistics.has_min_max
+                and statistics.null_count == 0
+                and statistics.max < minimum
+            )
+        except TypeError:
+            skip = False
+        if not skip:
+            kept.append(index)
+    return kept
+
+
+def filter_table(table, column_name, bound):
+    if column_name is None or bound is None:
+        return table
+    _, pc = import_parquet()
+    values = table.column(column_name)
+    return table.filter(pc.or_kleene(pc.greater_equal(values, bound), pc.is_null(values)))
+
+
+def open_parquet(body, columns, row_filter):
+    pq, _ = import_parquet()
+    handle = spool(body)
+    parquet_file = pq.ParquetFile(handle)
+    schema = parquet_file.schema_arrow
+    selected = project_columns(schema.names, columns)
+    column_name = filter_source_column(schema.names, row_filter)
+    bound = timestamp_bound(schema.field(column_name).type, row_filter.minimum) if column_name else None
+    if bound is None:
+        column_name = None
+    if column_name is not None and column_name not in selected:
+        selected.append(column_name)
+    row_groups = parquet_row_groups(parquet_file, column_name, bound)
+    return handle, parquet_file, selected, row_groups, column_name, bound
+
+
+def with_skipped_rows(df, skipped_rows):
+    df.attrs['skipped_rows'] = int(skipped_rows)
+    return df
+
+
+def read_parquet(body, columns=None, row_filter=None):
+    handle, parquet_file, selected, row_groups, column_name, bound = open_parquet(body, columns, row_filter)
+    with handle:
+        table = filter_table(parquet_file.read_row_groups(row_groups, columns=selected), column_name, bound)
+        return with_skipped_rows(table.to_pandas(), parquet_file.metadata.num_rows - table.num_rows)
+
+
+def iter_parquet_chunks(body, chunk_rows, columns=None, row_filter=None):
+    """Stream a Parquet file batch by batch, skipping row groups the row filter rules out.
+
+    Pruned row groups are reported on the first chunk; a file whose rows are
+    all filtered out yields one empty frame that carries the count.
+    """
+    handle, parquet_file, selected, row_groups, column_name, bound = open_parquet(body, columns, row_filter)
+    with handle:
+        metadata = parquet_file.metadata
+        skipped_rows = metadata.num_rows - sum(metadata.row_group(index).num_rows for index in row_groups)
+        if row_groups:
+            import pyarrow as pa
+
+            for batch in parquet_file.iter_batches(batch_size=chunk_rows, row_groups=row_groups, columns=selected):
+                table = filter_table(pa.Table.from_batches([batch]), column_name, bound)
+                skipped_rows += batch.num_rows - table.num_rows
+                if table.num_rows:
+                    yield with_skipped_rows(table.to_pandas(), skipped_rows)
+                    skipped_rows = 0
+        if skipped_rows:
+            empty = parquet_file.schema_arrow.empty_table().select(selected).to_pandas()
+            yield with_skipped_rows(empty, skipped_rows)
+
+
+# ----------------------------
+# AVRO
+# ----------------------------
+def iter_avro_records(body, columns=None):
+    try:
+        import fastavro
+    except ImportError as exc:
+        raise RuntimeError("Reading Avro staging files requires the fastavro package") from exc
+
+    for record in fastavro.reader(body):
+        if columns is None:
+            yield record
+        else:
+            yield {name: value for name, value in record.items() if name in columns}
+
+
+def read_avro(body, columns=None, row_filter=None):
+    return pd.json_normalize(list(iter_avro_records(body, columns)))
+
+
+def iter_avro_chunks(body, chunk_rows, columns=None, row_filter=None):
+    yield from batch_records(iter_avro_records(body, columns), chunk_rows)
+
+
+# ----------------------------
+# ARROW ENGINE (CSV / JSON)
+# ----------------------------
+# Strings parsed by Arrow stay in Arrow buffers as pandas "string[pyarrow]"
+# columns; their .str methods run as Arrow compute kernels.
+ARROW_STRING_DTYPE = pd.StringDtype('pyarrow')
+ARROW_CSV_BLOCK_BYTES = 4 * 1024 * 1024
+
+
+def import_arrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+        import pyarrow.json as pa_json
+    except ImportError as exc:
+        raise RuntimeError("The arrow parse engine requires the pyarrow package") from exc
+    return pa, pa_csv, pa_json
+
+
+def arrow_to_pandas(table) -> pd.DataFrame:
+    pa, _, _ = import_arrow()
+    string_types = {pa.string(): ARROW_STRING_DTYPE, pa.large_string(): ARROW_STRING_DTYPE}
+    return table.to_pandas(types_mapper=string_types.get)
+
+
+def arrow_strings(df: pd.DataFrame) -> pd.DataFrame:
+    """Move object columns that hold only strings into Arrow-backed string columns."""
+    updates = {
+        column: df[column].astype(ARROW_STRING_DTYPE)
+        for column in df.columns
+        if df[column].dtype == object and pd.api.types.infer_dtype(df[column], skipna=True) == 'string'
+    }
+    return df.assign(**updates) if updates else df
+
+
+class PrefixedStream:
+    """A readable stream that replays ``prefix`` before the rest of ``body``."""
+
+    def __init__(self, prefix: bytes, body) -> None:
+        self.prefix = prefix
+        self.body = body
+        self.closed = False
+
+    def read(self, size=-1):
+        if self.prefix:
+            if size is None or size < 0:
+                data, self.prefix = self.prefix + self.body.read(), b''
+                return data
+            data, self.prefix = self.prefix[:size], self.prefix[size:]
+            if len(data) < size:
+                data += self.body.read(size - len(data))
+            return data
+        return self.body.read() if size is None or size < 0 else self.body.read(size)
+
+    def readable(self):
+        return True
+
+    def close(self):
+        self.closed = True
+
+
+def read_csv_header(body):
+    """Return the CSV column names and a stream that still starts at the header."""
+    prefix = b''
+    while b'\n' not in prefix:
+        block = body.read(64 * 1024)
+        if not block:
+            break
+        prefix += block
+    header_line = prefix.split(b'\n', 1)[0].decode('utf-8-sig').rstrip('\r')
+    names = next(csv.reader([header_line]), [])
+    return names, PrefixedStream(prefix, body)
+
+
+def arrow_csv_options(names, columns=None):
+    """Read the projected columns as nullable strings; the staging catalog types them later.
+
+    Columns outside ``columns`` are skipped by the parser, not converted and dropped.
+    """
+    pa, pa_csv, _ = import_arrow()
+    selected = project_columns(names, columns)
+    return (
+        pa_csv.ReadOptions(block_size=ARROW_CSV_BLOCK_BYTES, use_threads=True),
+        pa_csv.ConvertOptions(
+            column_types={name: pa.string() for name in selected},
+            strings_can_be_null=True,
+            include_columns=selected,
+        ),
+    )
+
+
+def read_csv_arrow(body, columns=None, row_filter=None):
+    _, pa_csv, _ = import_arrow()
+    names, stream = read_csv_header(body)
+    read_options, convert_options = arrow_csv_options(names, columns)
+    return arrow_to_pandas(pa_csv.read_csv(stream, read_options=read_options, convert_options=convert_options))
+
+
+def rebatch(batches, chunk_rows):
+    """Regroup Arrow record batches into tables of exactly ``chunk_rows`` rows (the last may be short)."""
+    pa, _, _ = import_arrow()
+    pending = []
+    pending_rows = 0
+    for batch in batches:
+        pending.append(batch)
+        pending_rows += batch.num_rows
+        while pending_rows >= chunk_rows:
+            table = pa.Table.from_batches(pending)
+            yield table.slice(0, chunk_rows)
+            rest = table.slice(chunk_rows)
+            pending = rest.to_batches()
+            pending_rows = rest.num_rows
+    if pending_rows:
+        yield pa.Table.from_batches(pending)
+
+
+def iter_csv_chunks_arrow(body, chunk_rows, columns=None, row_filter=None):
+    _, pa_csv, _ = import_arrow()
+    names, stream = read_csv_header(body)
+    read_options, convert_options = arrow_csv_options(names, columns)
+    reader = pa_csv.open_csv(stream, read_options=read_options, convert_options=convert_options)
+    for table in rebatch(reader, chunk_rows):
+        yield arrow_to_pandas(table)
+
+
+def flatten_structs(table):
+    """Flatten nested struct columns into dotted names, like ``pd.json_normalize``."""
+    pa, _, _ = import_arrow()
+    while any(pa.types.is_struct(field.type) for field in table.schema):
+        table = table.flatten()
+    return table
+
+
+# Arrow's JSON reader takes JSON Lines. A JSON array of objects is re-framed
+# byte for byte: newlines (never significant in JSON) become spaces, the
+# comma between two objects becomes a newline, and the brackets become
+# spaces. A "},{" inside a string or a nested array that is taken for a
+# separator leaves an unterminated line, which Arrow rejects, so a wrong
+# guess falls back to the Python decoder instead of changing the data.
+JSON_NEWLINES_TO_SPACES = bytes.maketrans(b'\r\n', b'  ')
+JSON_RECORD_SEPARATOR = re.compile(rb'(}\s*),(?=\s*{)')
+
+
+def frame_json_lines(block, opens_array=False, closes_array=False):
+    """Re-frame part of a JSON array as JSON Lines; the result is as long as ``block``."""
+    framed = JSON_RECORD_SEPARATOR.sub(rb'\1\n', block.translate(JSON_NEWLINES_TO_SPACES))
+    if opens_array:
+        start = len(framed) - len(framed.lstrip())
+        framed = framed[:start] + b' ' + framed[start + 1:]
+    if closes_array:
+        end = len(framed.rstrip()) - 1
+        if framed[end:end + 1] == b']':
+            framed = framed[:end] + b' ' + framed[end + 1:]
+    return framed
+
+
+class JsonLinesFraming:
+    """Cut a JSON array (or JSON Lines) body into JSON Lines chunks for Arrow.
+
+    ``chunks(chunk_rows)`` yields ``(framed, original)`` pairs of byte strings
+    holding ``chunk_rows`` records each (the last may be short), where
+    ``original`` is the same span of the file as it was read.
+    """
+
+    def __init__(self, body, read_size=JSON_READ_BYTES):
+        self.body = body
+        self.read_size = read_size
+        self.in_array = None
+        self.opened = False
+        self.carry = b''
+        self.framed = bytearray()
+        self.original = bytearray()
+
+    def unparsed(self, original):
+        """A stream of ``original`` and every byte after it, readable by ``iter_json_records``."""
+        if self.in_array and original.lstrip()[:1] != b'[':
+            original = b'[' + original
+        return PrefixedStream(original + bytes(self.original) + self.carry, self.body)
+
+    def read_block(self):
+        """Frame the next block of the body; returns False once the body is exhausted."""
+        raw = self.body.read(self.read_size)
+        data = self.carry + raw
+        if self.in_array is None:
+            if raw and not data.strip():
+                self.carry = data
+                return True
+            self.in_array = data.lstrip()[:1] == b'['
+        # A separator starts at a "}", so everything before the last one can be framed now.
+        cut = max(data.rfind(b'}'), 0) if raw and self.in_array else len(data)
+        block, self.carry = data[:cut], data[cut:]
+        if self.in_array and block:
+            self.framed += frame_json_lines(block, not self.opened, not raw)
+            self.opened = True
+        else:
+            self.framed += block
+        self.original += block
+        return bool(raw)
+
+    def take(self, size):
+        framed, original = bytes(self.framed[:size]), bytes(self.original[:size])
+        del self.framed[:size]
+        del self.original[:size]
+        return framed, original
+
+    def chunks(self, chunk_rows):
+        more = True
+        while more:
+            more = self.read_block()
+            lines = self.framed.count(b'\n')
+            while lines >= chunk_rows:
+                end = -1
+                for _ in range(chunk_rows):
+                    end = self.framed.index(b'\n', end + 1)
+                yield self.take(end + 1)
+                lines -= chunk_rows
+        if self.framed.strip():
+            yield self.take(len(self.framed))
+
+
+def read_json_arrow(body, columns=None, row_filter=None):
+    pa, _, pa_json = import_arrow()
+    raw = body.read()
+    framed = frame_json_lines(raw, True, True) if raw.lstrip()[:1] == b'[' else raw
+    # Arrays and JSON Lines go through Arrow's multithreaded reader; fields
+    # whose values mix types fall back to the Python decoder below.
+    try:
+        return arrow_to_pandas(flatten_structs(pa_json.read_json(BytesIO(framed))))
+    except pa.ArrowInvalid:
+        pass
+    return arrow_strings(pd.json_normalize(list(iter_json_records(BytesIO(raw)))))
+
+
+def iter_json_chunks_arrow(body, chunk_rows, columns=None, row_filter=None):
+    pa, _, pa_json = import_arrow()
+    framing = JsonLinesFraming(body)
+    for framed, original in framing.chunks(chunk_rows):
+        try:
+            table = pa_json.read_json(BytesIO(framed))
+        except pa.ArrowInvalid:
+            # The rest of the file goes through the Python decoder, in the same chunk sizes.
+            for chunk in batch_records(iter_json_records(framing.unparsed(original)), chunk_rows):
+                yield arrow_strings(chunk)
+            return
+        yield arrow_to_pandas(flatten_structs(table))
+
+
+register_reader('.csv', FileReader('CSV', read_csv, iter_csv_chunks))
+register_reader('.json', FileReader('JSON', read_json, iter_json_chunks))
+register_reader('.xlsx', FileReader('Excel', read_excel))
+register_reader('.parquet', FileReader('Parquet', read_parquet, iter_parquet_chunks))
+register_reader('.avro', FileReader('Avro', read_avro, iter_avro_chunks))
+register_reader('.csv', FileReader('CSV', read_csv_arrow, iter_csv_chunks_arrow), engine='arrow')
+register_reader('.json', FileReader('JSON', read_json_arrow, iter_json_chunks_arrow), engine='arrow')
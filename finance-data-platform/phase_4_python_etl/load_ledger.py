@@ -0,0 +1,96 @@
+"""Ledger of staging objects already loaded by the Phase 4 ETL."""
+
+from __future__ import annotations
+
+from typing import Any, Iterable
+
+from psycopg2.extras import execute_values
+
+LEDGER_TABLE = "staging.etl_load_ledger"
+
+LEDGER_DDL = f"""
+    CREATE TABLE IF NOT EXISTS {LEDGER_TABLE} (
+        s3_key VARCHAR(1024) NOT NULL,
+        etag VARCHAR(128) NOT NULL,
+        size_bytes BIGINT NOT NULL,
+        target_table VARCHAR(64) NOT NULL,
+        row_count INT NOT NULL,
+        loaded_at TIMESTAMP NOT NULL DEFAULT NOW(),
+        PRIMARY KEY (s3_key, etag, size_bytes)
+    )
+"""
+
+# An object is identified by (ETag, size); both are returned by
+# list_objects_v2 and head_object without downloading the body.
+ObjectVersion = tuple[str, int]
+
+
+def normalize_etag(etag: str | None) -> str:
+    return (etag or "").strip('"')
+
+
+def ensure_ledger_table(conn: Any) -> None:
+    with conn.cursor() as cur:
+        cur.execute(LEDGER_DDL)
+    conn.commit()
+
+
+def fetch_loaded_keys(conn: Any, object_versions: dict[str, ObjectVersion]) -> set[str]:
+    """Return the keys whose current (ETag, size) is already in the ledger, in one query."""
+    if not object_versions:
+        return set()
+
+    keys = list(object_versions)
+    with conn.cursor() as cur:
+        cur.execute(
+            f"""
+            SELECT ledger.s3_key
+            FROM {LEDGER_TABLE} ledger
+            JOIN unnest(%s::text[], %s::text[], %s::bigint[]) AS staged(s3_key, etag, size_bytes)
+                ON staged.s3_key = ledger.s3_key
+                AND staged.etag = ledger.etag
+                AND staged.size_bytes = ledger.size_bytes
+            """,
+            (
+                keys,
+                [object_versions[key][0] for key in keys],
+                [object_versions[key][1] for key in keys],
+            ),
+        )
+        loaded = {row[0] for row in cur.fetchall()}
+    conn.commit()
+    return loaded
+
+
+def record_loaded_objects(
+    conn: Any,
+    entries: Iterable[tuple[str, ObjectVersion, str, int]],
+    commit: bool = True,
+) -> None:
+    """Upsert ``(key, object_version, target_table, row_count)`` ledger rows in one statement."""
+    rows = [(key, etag, size_bytes, target_table, row_count) for key, (etag, size_bytes), target_table, row_count in entries]
+    if not rows:
+        return
+    with conn.cursor() as cur:
+        execute_values(
+            cur,
+            f"""
+            INSERT INTO {LEDGER_TABLE} (s3_key, etag, size_bytes, target_table, row_count, loaded_at)
+            VALUES %s
+            ON CONFLICT (s3_key, etag, size_bytes)
+            DO UPDATE SET target_table = EXCLUDED.target_table, row_count = EXCLUDED.row_count, loaded_at = NOW()
+            """,
+            rows,
+            template="(%s, %s, %s, %s, %s, NOW())",
+        )
+    if commit:
+        conn.commit()
+
+
+def split_unchanged(keys: Iterable[str], loaded_keys: set[str]) -> tuple[list[str], list[str]]:
+    """Split keys, in order, into (to_load, unchanged)."""
+    to_load: list[str] = []
+    unchanged: list[str] = []
+    for key in keys:
+        (unchanged if key in loaded_keys else to_load).append(key)
+    return to_load, unchanged
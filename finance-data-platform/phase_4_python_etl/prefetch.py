@@ -0,0 +1,197 @@
+"""Read-ahead download of staging objects for the Phase 4 ETL."""
+
+from __future__ import annotations
+
+import logging
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from io import BytesIO
+from time import perf_counter
+from typing import Any, BinaryIO, Callable, Iterable
+
+LOGGER = logging.getLogger("phase_4_python_etl.prefetch")
+
+COPY_BLOCK_BYTES = 1024 * 1024
+
+
+@dataclass
+class PrefetchedObject:
+    """A downloaded object body, held in memory or spilled to a temp file."""
+
+    key: str
+    body: BinaryIO
+    size_bytes: int
+    spilled: bool
+    download_seconds: float
+    # Bytes this object holds against the prefetcher's memory ceiling.
+    charge: int = field(default=0, repr=False)
+
+
+def download(
+    key: str,
+    open_object: Callable[[str], Any],
+    spill_threshold_bytes: int,
+    spill_dir: str | None,
+    size_hint: int | None = None,
+) -> PrefetchedObject:
+    """Copy one object body into memory, moving it to ``spill_dir`` once it exceeds the threshold."""
+    started_at = perf_counter()
+    source = open_object(key)
+    spilled = size_hint is not None and size_hint > spill_threshold_bytes
+    target: BinaryIO = tempfile.TemporaryFile(dir=spill_dir) if spilled else BytesIO()
+    try:
+        while True:
+            block = source.read(COPY_BLOCK_BYTES)
+            if not block:
+                break
+            target.write(block)
+            if not spilled and target.tell() > spill_threshold_bytes:
+                spill_file = tempfile.TemporaryFile(dir=spill_dir)
+                spill_file.write(target.getbuffer())
+                target = spill_file
+                spilled = True
+    except BaseException:
+        target.close()
+        raise
+    finally:
+        close = getattr(source, "close", None)
+        if close is not None:
+            close()
+
+    size_bytes = target.tell()
+    target.seek(0)
+    return PrefetchedObject(key, target, size_bytes, spilled, perf_counter() - started_at)
+
+
+class Prefetcher:
+    """Download the next ``depth`` keys in background threads while the caller works on the current one.
+
+    Keys are taken in order with ``take()``, and each taken object must be
+    given back with ``release()``. In-memory bodies count against
+    ``memory_limit_bytes``. A download is only started when its expected size
+    fits under the ceiling, or when nothing else is held. Objects larger than
+    ``spill_threshold_bytes`` are written to a temp file in ``spill_dir``
+    instead, and do not count against the ceiling. ``sizes`` (key -> bytes,
+    e.g. from the bucket listing) lets the prefetcher plan before a download
+    starts. Keys without a size are charged the spill threshold until their
+    download finishes.
+    """
+
+    def __init__(
+        self,
+        keys: Iterable[str],
+        open_object: Callable[[str], Any],
+        depth: int,
+        memory_limit_bytes: int,
+        spill_threshold_bytes: int,
+        spill_dir: str | None = None,
+        sizes: dict[str, int] | None = None,
+    ) -> None:
+        self.keys = list(keys)
+        self.open_object = open_object
+        self.depth = max(1, depth)
+        self.memory_limit_bytes = memory_limit_bytes
+        self.spill_threshold_bytes = spill_threshold_bytes
+        self.spill_dir = spill_dir or None
+        self.sizes = sizes or {}
+        self.held_bytes = 0
+        self.next_index = 0
+        self.pending: dict[str, tuple[Future, int]] = {}
+        self.taken: dict[str, PrefetchedObject] = {}
+        self.released: set[str] = set()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=self.depth, thread_name_prefix="s3-prefetch")
+        self._schedule()
+
+    def __enter__(self) -> "Prefetcher":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def expected_charge(self, key: str) -> int:
+        size = self.sizes.get(key)
+        if size is None:
+            return self.spill_threshold_bytes
+        return 0 if size > self.spill_threshold_bytes else size
+
+    def _submit(self, key: str) -> None:
+        charge = self.expected_charge(key)
+        self.held_bytes += charge
+        future = self._pool.submit(download, key, self.open_object, self.spill_threshold_bytes, self.spill_dir, self.sizes.get(key))
+        self.pending[key] = (future, charge)
+
+    def _schedule(self) -> None:
+        with self._lock:
+            while self.next_index < len(self.keys) and len(self.pending) < self.depth:
+                key = self.keys[self.next_index]
+                charge = self.expected_charge(key)
+                if self.held_bytes and self.held_bytes + charge > self.memory_limit_bytes:
+                    break
+                self.next_index += 1
+                if key not in self.pending and key not in self.taken and key not in self.released:
+                    self._submit(key)
+
+    def take(self, key: str) -> PrefetchedObject:
+        """Return ``key``'s downloaded body, waiting for its download if it is still running."""
+        with self._lock:
+            if key not in self.pending:
+                # Not read ahead (out of order or over the ceiling): fetch it now.
+                self._submit(key)
+            future, charge = self.pending.pop(key)
+
+        waited_at = perf_counter()
+        try:
+            prefetched = future.result()
+        except BaseException:
+            with self._lock:
+                self.held_bytes -= charge
+            self._schedule()
+            raise
+
+        with self._lock:
+            prefetched.charge = 0 if prefetched.spilled else prefetched.size_bytes
+            self.held_bytes += prefetched.charge - charge
+            self.taken[key] = prefetched
+        self._schedule()
+
+        LOGGER.info(
+            "Prefetch | file_name=%s | size_bytes=%s | spilled=%s | download_seconds=%s | wait_seconds=%s",
+            key,
+            prefetched.size_bytes,
+            prefetched.spilled,
+            round(prefetched.download_seconds, 3),
+            round(perf_counter() - waited_at, 3),
+        )
+        return prefetched
+
+    def release(self, key: str) -> None:
+        with self._lock:
+            prefetched = self.taken.pop(key, None)
+            if prefetched is None:
+                return
+            self.held_bytes -= prefetched.charge
+            self.released.add(key)
+        prefetched.body.close()
+        self._schedule()
+
+    def close(self) -> None:
+        with self._lock:
+            self.next_index = len(self.keys)
+            pending = list(self.pending.values())
+            self.pending.clear()
+            taken = list(self.taken.values())
+            self.taken.clear()
+            self.held_bytes = 0
+
+        for future, _ in pending:
+            if not future.cancel():
+                try:
+                    future.result().body.close()
+                except Exception:
+                    pass
+        for prefetched in taken:
+            prefetched.body.close()
+        self._pool.shutdown(wait=True)
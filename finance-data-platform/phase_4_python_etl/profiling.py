@@ -0,0 +1,318 @@
+"""Mergeable per-column sketches (HyperLogLog, t-digest, min/max, nulls) for staging data profiles."""
+
+from __future__ import annotations
+
+import base64
+import math
+from typing import Any, Iterable
+
+import numpy as np
+import pandas as pd
+from psycopg2.extras import Json, execute_values
+
+PROFILE_TABLE = "staging.etl_table_profiles"
+
+PROFILE_DDL = f"""
+    CREATE TABLE IF NOT EXISTS {PROFILE_TABLE} (
+        table_name VARCHAR(64) PRIMARY KEY,
+        row_count BIGINT NOT NULL,
+        runs INT NOT NULL,
+        profile JSONB NOT NULL,
+        updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+    )
+"""
+
+# 2^12 one-byte registers per column: about 1.6% standard error on distinct counts.
+HLL_PRECISION = 12
+# Upper bound on t-digest centroids is about half of this.
+TDIGEST_COMPRESSION = 200
+PROFILE_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+# Drift thresholds against the table's history: change in null ratio, and
+# shift of the median measured in history interquartile ranges.
+NULL_RATIO_DRIFT = 0.1
+MEDIAN_SHIFT_DRIFT = 1.0
+
+
+class HyperLogLog:
+    """Distinct-count sketch over 64-bit hashes; registers merge with an element-wise max."""
+
+    def __init__(self, precision: int = HLL_PRECISION, registers: np.ndarray | None = None) -> None:
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8) if registers is None else registers
+
+    def add_hashes(self, hashes: np.ndarray) -> None:
+        if not len(hashes):
+            return
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        index = (hashes >> np.uint64(64 - self.precision)).astype(np.intp)
+        remainder = hashes & np.uint64((1 << (64 - self.precision)) - 1)
+        # Position of the first set bit in the remaining 64 - p bits, from the top.
+        rank = np.full(len(hashes), 64 - self.precision + 1, dtype=np.uint8)
+        nonzero = remainder > 0
+        bit_length = np.floor(np.log2(remainder[nonzero].astype(np.float64))).astype(np.int64) + 1
+        rank[nonzero] = (64 - self.precision - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.ldexp(1.0, -self.registers.astype(np.int64)).sum()
+        empty = int((self.registers == 0).sum())
+        if estimate <= 2.5 * m and empty:
+            estimate = m * math.log(m / empty)
+        return int(round(estimate))
+
+    def to_state(self) -> str:
+        return base64.b64encode(self.registers.tobytes()).decode("ascii")
+
+    @classmethod
+    def from_state(cls, state: str) -> "HyperLogLog":
+        registers = np.frombuffer(base64.b64decode(state), dtype=np.uint8).copy()
+        return cls(int(math.log2(len(registers))), registers)
+
+
+class TDigest:
+    """Quantile sketch of (mean, weight) centroids.
+
+    Sorted points are grouped by the integer part of the arcsine scale
+    function of their left cumulative weight, so centroids stay small in the
+    tails and the digest keeps at most about ``compression / 2`` of them. A
+    batch of values is clustered on its own first, so merging it into the
+    digest only sorts a few hundred centroids.
+    """
+
+    def __init__(self, compression: int = TDIGEST_COMPRESSION) -> None:
+        self.compression = compression
+        self.means = np.empty(0, dtype=np.float64)
+        self.weights = np.empty(0, dtype=np.float64)
+        self.minimum = math.inf
+        self.maximum = -math.inf
+
+    @property
+    def count(self) -> float:
+        return float(self.weights.sum())
+
+    def add(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64)
+        values = values[np.isfinite(values)]
+        if not len(values):
+            return
+        # Cluster the sorted batch on its own, then merge the few centroids it yields.
+        batch = TDigest(self.compression)
+        batch.minimum = float(values.min())
+        batch.maximum = float(values.max())
+        batch._cluster(np.sort(values), np.ones(len(values)))
+        self.merge(batch)
+
+    def merge(self, other: "TDigest") -> "TDigest":
+        if len(other.means):
+            self.minimum = min(self.minimum, other.minimum)
+            self.maximum = max(self.maximum, other.maximum)
+            self._compress(other.means, other.weights)
+        return self
+
+    def _compress(self, means: np.ndarray, weights: np.ndarray) -> None:
+        means = np.concatenate([self.means, means])
+        weights = np.concatenate([self.weights, weights])
+        order = np.argsort(means, kind="stable")
+        self._cluster(means[order], weights[order])
+
+    def _cluster(self, means: np.ndarray, weights: np.ndarray) -> None:
+        """Replace the centroids with ``means``/``weights`` (sorted by mean) grouped by the arcsine scale."""
+        left = (np.cumsum(weights) - weights) / weights.sum()
+        scale = np.floor(self.compression / (2 * math.pi) * np.arcsin(2 * left - 1))
+        # The scale never decreases along sorted means, so clusters are runs of equal values.
+        clusters = np.concatenate([[0], np.cumsum(scale[1:] != scale[:-1])])
+        self.weights = np.bincount(clusters, weights=weights)
+        self.means = np.bincount(clusters, weights=weights * means) / self.weights
+
+    def quantiles(self, quantiles: Iterable[float]) -> list[float | None]:
+        if not len(self.means):
+            return [None for _ in quantiles]
+        centers = np.cumsum(self.weights) - self.weights / 2
+        positions = np.concatenate([[0.0], centers, [self.count]])
+        values = np.concatenate([[self.minimum], self.means, [self.maximum]])
+        return [float(value) for value in np.interp(np.asarray(list(quantiles)) * self.count, positions, values)]
+
+    def to_state(self) -> dict[str, Any]:
+        return {
+            "means": self.means.tolist(),
+            "weights": self.weights.tolist(),
+            "min": self.minimum if len(self.means) else None,
+            "max": self.maximum if len(self.means) else None,
+        }
+
+    @classmethod
+    def from_state(cls, state: dict[str, Any]) -> "TDigest":
+        digest = cls()
+        digest.means = np.asarray(state["means"], dtype=np.float64)
+        digest.weights = np.asarray(state["weights"], dtype=np.float64)
+        if len(digest.means):
+            digest.minimum, digest.maximum = state["min"], state["max"]
+        return digest
+
+
+class ColumnProfile:
+    """Sketches of one column: non-null count, distinct values, and (numeric columns) a t-digest."""
+
+    def __init__(self, numeric: bool = False) -> None:
+        self.present = 0
+        self.distinct = HyperLogLog()
+        self.digest = TDigest() if numeric else None
+
+    def merge(self, other: "ColumnProfile") -> "ColumnProfile":
+        self.present += other.present
+        self.distinct.merge(other.distinct)
+        if other.digest is not None:
+            self.digest = (self.digest or TDigest()).merge(other.digest)
+        return self
+
+    def summary(self, row_count: int) -> dict[str, Any]:
+        summary: dict[str, Any] = {
+            "null_ratio": round(1 - self.present / row_count, 6) if row_count else None,
+            "distinct_estimate": self.distinct.estimate(),
+        }
+        if self.digest is not None and len(self.digest.means):
+            summary["min"] = self.digest.minimum
+            summary["max"] = self.digest.maximum
+            for quantile, value in zip(PROFILE_QUANTILES, self.digest.quantiles(PROFILE_QUANTILES)):
+                summary[f"p{int(quantile * 100)}"] = value
+        return summary
+
+    def to_state(self) -> dict[str, Any]:
+        state: dict[str, Any] = {"present": self.present, "hll": self.distinct.to_state()}
+        if self.digest is not None:
+            state["digest"] = self.digest.to_state()
+        return state
+
+    @classmethod
+    def from_state(cls, state: dict[str, Any]) -> "ColumnProfile":
+        profile = cls()
+        profile.present = int(state["present"])
+        profile.distinct = HyperLogLog.from_state(state["hll"])
+        if "digest" in state:
+            profile.digest = TDigest.from_state(state["digest"])
+        return profile
+
+
+class TableProfile:
+    """Column profiles of one staging table, filled chunk by chunk and mergeable across files and runs.
+
+    ``add_column`` takes the per-cell hashes the quality pass already
+    computed, so profiling does not hash the data a second time. Columns in
+    ``numeric_columns`` are also parsed as numbers for the t-digest.
+    """
+
+    def __init__(self, numeric_columns: Iterable[str] = ()) -> None:
+        self.numeric_columns = frozenset(numeric_columns)
+        self.row_count = 0
+        self.columns: dict[str, ColumnProfile] = {}
+
+    def add_rows(self, row_count: int) -> None:
+        self.row_count += row_count
+
+    def add_column(self, column: str, values: pd.Series, hashes: np.ndarray, present: np.ndarray) -> None:
+        profile = self.columns.get(column)
+        if profile is None:
+            profile = self.columns[column] = ColumnProfile(column in self.numeric_columns)
+        profile.present += int(present.sum())
+        profile.distinct.add_hashes(hashes[present])
+        if profile.digest is not None:
+            if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+                numbers = values.to_numpy(dtype="float64", na_value=np.nan)
+            else:
+                numbers = pd.to_numeric(values, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+            profile.digest.add(numbers)
+
+    def merge(self, other: "TableProfile") -> "TableProfile":
+        self.numeric_columns |= other.numeric_columns
+        self.row_count += other.row_count
+        for column, profile in other.columns.items():
+            if column in self.columns:
+                self.columns[column].merge(profile)
+            else:
+                self.columns[column] = ColumnProfile().merge(profile)
+        return self
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "row_count": self.row_count,
+            "columns": {column: profile.summary(self.row_count) for column, profile in self.columns.items()},
+        }
+
+    def to_state(self) -> dict[str, Any]:
+        return {
+            "row_count": self.row_count,
+            "columns": {column: profile.to_state() for column, profile in self.columns.items()},
+        }
+
+    @classmethod
+    def from_state(cls, state: dict[str, Any]) -> "TableProfile":
+        profile = cls()
+        profile.row_count = int(state["row_count"])
+        profile.columns = {column: ColumnProfile.from_state(column_state) for column, column_state in state["columns"].items()}
+        profile.numeric_columns = frozenset(column for column, column_profile in profile.columns.items() if column_profile.digest is not None)
+        return profile
+
+
+def profile_drift(current: TableProfile, history: TableProfile) -> list[dict[str, Any]]:
+    """Checks of a run's profile against the table's history that exceed the drift thresholds."""
+    drift = []
+    current_summary = current.summary()["columns"]
+    history_summary = history.summary()["columns"]
+    for column, summary in current_summary.items():
+        baseline = history_summary.get(column)
+        if baseline is None:
+            if history.row_count:
+                drift.append({"column": column, "check": "new_column"})
+            continue
+        if summary["null_ratio"] is not None and baseline["null_ratio"] is not None:
+            change = summary["null_ratio"] - baseline["null_ratio"]
+            if abs(change) > NULL_RATIO_DRIFT:
+                drift.append({"column": column, "check": "null_ratio", "value": summary["null_ratio"], "baseline": baseline["null_ratio"]})
+        if "p50" in summary and "p50" in baseline:
+            spread = baseline["p75"] - baseline["p25"]
+            shift = abs(summary["p50"] - baseline["p50"]) / spread if spread > 0 else (0.0 if summary["p50"] == baseline["p50"] else math.inf)
+            if shift > MEDIAN_SHIFT_DRIFT:
+                drift.append({"column": column, "check": "median_shift", "value": summary["p50"], "baseline": baseline["p50"]})
+    return drift
+
+
+def ensure_profile_table(conn: Any) -> None:
+    with conn.cursor() as cur:
+        cur.execute(PROFILE_DDL)
+    conn.commit()
+
+
+def load_profiles(conn: Any, table_names: Iterable[str]) -> dict[str, tuple[TableProfile, int]]:
+    """Stored ``(profile, runs)`` per table, in one query."""
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT table_name, profile, runs FROM {PROFILE_TABLE} WHERE table_name = ANY(%s)", (list(table_names),))
+        rows = cur.fetchall()
+    return {table_name: (TableProfile.from_state(state), runs) for table_name, state, runs in rows}
+
+
+def save_profiles(conn: Any, profiles: dict[str, tuple[TableProfile, int]]) -> None:
+    """Upsert ``{table_name: (profile, runs)}`` with one multi-row statement; does not commit."""
+    if not profiles:
+        return
+    with conn.cursor() as cur:
+        execute_values(
+            cur,
+            f"""
+            INSERT INTO {PROFILE_TABLE} (table_name, row_count, runs, profile, updated_at)
+            VALUES %s
+            ON CONFLICT (table_name) DO UPDATE SET
+                row_count = EXCLUDED.row_count,
+                runs = EXCLUDED.runs,
+                profile = EXCLUDED.profile,
+                updated_at = NOW()
+            """,
+            [(table_name, profile.row_count, runs, Json(profile.to_state())) for table_name, (profile, runs) in profiles.items()],
+            template="(%s, %s, %s, %s, NOW())",
+        )
@@ -0,0 +1,372 @@
+"""Declarative row-level quality rules, compiled once per table into vectorized masks."""
+
+from __future__ import annotations
+
+import json
+import operator
+import re
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Iterable, Mapping
+
+import numpy as np
+import pandas as pd
+
+from phase_4_python_etl.categorical_validation import CategoricalReport, factorize_column, group_offenders, offender_value
+
+DEFAULT_RULES_PATH = Path(__file__).with_name("quality_rules.yaml")
+
+COMPARE_OPERATORS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+VALUE_TYPES = ("number", "date")
+
+DISTINCT_SAMPLE_ROWS = 10_000
+
+
+@dataclass(frozen=True)
+class QualityRule:
+    """One compiled rule of a table's spec.
+
+    ``columns`` is the checked column (``range``, ``regex``, ``enum``), the
+    left and right columns (``compare``), or the key (``unique``). ``when``
+    limits the rule to rows whose columns hold one of the listed values.
+    """
+
+    name: str
+    kind: str
+    columns: tuple[str, ...]
+    minimum: float | None = None
+    maximum: float | None = None
+    pattern: str | None = None
+    values: tuple = ()
+    operator: str | None = None
+    value_type: str = "number"
+    when: tuple[tuple[str, tuple], ...] = ()
+
+    @property
+    def referenced_columns(self) -> tuple[str, ...]:
+        return self.columns + tuple(column for column, _ in self.when)
+
+
+# ----------------------------
+# SPEC LOADING
+# ----------------------------
+def read_rule_spec(path: str | Path) -> dict[str, Any]:
+    """Read a rule spec from a ``.json`` or ``.yaml``/``.yml`` file."""
+    path = Path(path)
+    text = path.read_text(encoding="utf-8")
+    if path.suffix.lower() == ".json":
+        return json.loads(text)
+    try:
+        import yaml
+    except ImportError as exc:
+        raise RuntimeError(f"Reading the YAML rule spec {path} requires the PyYAML package") from exc
+    return yaml.safe_load(text) or {}
+
+
+def compile_rule(table_key: str, spec: Mapping[str, Any]) -> QualityRule:
+    name = spec.get("name")
+    kind = spec.get("kind")
+    where = f"quality rule {name!r} of {table_key}"
+    if not name or not isinstance(name, str):
+        raise ValueError(f"Every quality rule of {table_key} needs a name")
+
+    when = tuple(
+        (column, tuple(allowed if isinstance(allowed, list) else [allowed]))
+        for column, allowed in (spec.get("when") or {}).items()
+    )
+    if kind in ("range", "regex", "enum"):
+        if not spec.get("column"):
+            raise ValueError(f"{where} needs a column")
+        columns = (spec["column"],)
+    elif kind == "compare":
+        if not spec.get("left") or not spec.get("right"):
+            raise ValueError(f"{where} needs left and right columns")
+        columns = (spec["left"], spec["right"])
+    elif kind == "unique":
+        key = spec.get("columns") or ([spec["column"]] if spec.get("column") else [])
+        if not key:
+            raise ValueError(f"{where} needs columns")
+        columns = tuple(key)
+    else:
+        raise ValueError(f"{where} has unknown kind {kind!r}; expected range, regex, enum, compare, or unique")
+
+    rule = QualityRule(
+        name=name,
+        kind=kind,
+        columns=columns,
+        minimum=None if spec.get("min") is None else float(spec["min"]),
+        maximum=None if spec.get("max") is None else float(spec["max"]),
+        pattern=spec.get("pattern"),
+        values=tuple(spec.get("values") or ()),
+        operator=spec.get("operator"),
+        value_type=spec.get("type", "number"),
+        when=when,
+    )
+    if kind == "range" and rule.minimum is None and rule.maximum is None:
+        raise ValueError(f"{where} needs min, max, or both")
+    if kind == "regex":
+        if not rule.pattern:
+            raise ValueError(f"{where} needs a pattern")
+        re.compile(rule.pattern)
+    if kind == "enum" and not rule.values:
+        raise ValueError(f"{where} needs values")
+    if kind == "compare" and rule.operator not in COMPARE_OPERATORS:
+        raise ValueError(f"{where} has unknown operator {rule.operator!r}; expected one of {', '.join(COMPARE_OPERATORS)}")
+    if rule.value_type not in VALUE_TYPES:
+        raise ValueError(f"{where} has unknown type {rule.value_type!r}; expected number or date")
+    return rule
+
+
+def compile_rule_spec(spec: Mapping[str, Any]) -> dict[str, tuple[QualityRule, ...]]:
+    """``{table_key: [rule, ...]}`` -> ``{table_key: (QualityRule, ...)}``; rule names must be unique per table."""
+    compiled = {}
+    for table_key, rules in (spec or {}).items():
+        table_rules = tuple(compile_rule(table_key, rule) for rule in rules or ())
+        names = Counter(rule.name for rule in table_rules)
+        repeated = sorted(name for name, count in names.items() if count > 1)
+        if repeated:
+            raise ValueError(f"Quality rule names repeat in {table_key}: {repeated}")
+        compiled[table_key] = table_rules
+    return compiled
+
+
+def load_rules(path: str | Path) -> dict[str, tuple[QualityRule, ...]]:
+    return compile_rule_spec(read_rule_spec(path))
+
+
+# ----------------------------
+# EVALUATION
+# ----------------------------
+class RuleReport(CategoricalReport):
+    """Per-rule violation counts (with offending values for regex and enum rules), plus the unique-rule keys seen so far in one file."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.seen: dict[str, pd.Index] = {}
+
+
+def when_rows(rule: QualityRule, column_values: Callable[[str], pd.Series], row_count: int) -> np.ndarray | None:
+    """Rows the rule applies to, or None for every row."""
+    applies = None
+    for column, allowed in rule.when:
+        codes, uniques = factorize_column(column_values(column))
+        matching = np.asarray(uniques.isin(allowed), dtype=bool)
+        rows = matching[codes] & (codes >= 0) if len(uniques) else np.zeros(row_count, dtype=bool)
+        applies = rows if applies is None else applies & rows
+    return applies
+
+
+def parse_values(values: pd.Series, value_type: str) -> np.ndarray:
+    """Numbers as float64, or dates as datetime64[ns]; values that do not parse become NaN/NaT."""
+    if value_type == "date":
+        if not pd.api.types.is_datetime64_any_dtype(values):
+            values = pd.to_datetime(values, errors="coerce", format="ISO8601")
+        return values.to_numpy(dtype="datetime64[ns]")
+    if not pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+        values = pd.to_numeric(values, errors="coerce")
+    return values.to_numpy(dtype="float64", na_value=np.nan)
+
+
+def range_rule_rows(rule: QualityRule, values: pd.Series) -> np.ndarray:
+    """Invalid rows of a range rule; nulls pass and non-null values that do not parse fail."""
+    numbers = parse_values(values, "number")
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        # Numeric columns hold no unparseable values, so NaN is exactly the nulls.
+        present = ~np.isnan(numbers)
+    else:
+        present = values.notna().to_numpy()
+    in_range = np.ones(len(numbers), dtype=bool)
+    if rule.minimum is not None:
+        in_range &= numbers >= rule.minimum
+    if rule.maximum is not None:
+        in_range &= numbers <= rule.maximum
+    # NaN compares false, so non-null values that do not parse fail too.
+    return present & ~in_range
+
+
+def mostly_distinct(values: pd.Series) -> bool:
+    """Whether a sample of the column is mostly distinct values, so testing per distinct value saves nothing."""
+    sample = values.iloc[:DISTINCT_SAMPLE_ROWS]
+    return len(sample) >= DISTINCT_SAMPLE_ROWS and sample.nunique() > len(sample) // 2
+
+
+def factorized_rule_rows(rule: QualityRule, values: pd.Series) -> tuple[np.ndarray, np.ndarray, pd.Index]:
+    """Invalid rows of a regex or enum rule, with codes and uniques covering at least the invalid rows.
+
+    Each distinct value is tested once. A regex over a mostly distinct column
+    (VINs, ids) is tested row by row instead and only the failing values are
+    factorized.
+    """
+    if rule.kind == "regex" and mostly_distinct(values):
+        invalid = values.notna().to_numpy()
+        invalid[invalid] = ~np.asarray(values[invalid].astype(str).str.fullmatch(rule.pattern), dtype=bool)
+        codes = np.full(len(values), -1, dtype=np.intp)
+        codes[invalid], uniques = factorize_column(values[invalid])
+        return invalid, codes, uniques
+    codes, uniques = factorize_column(values)
+    if not len(uniques):
+        return np.zeros(len(codes), dtype=bool), codes, uniques
+    if rule.kind == "regex":
+        invalid_uniques = ~np.asarray(uniques.astype(str).str.fullmatch(rule.pattern), dtype=bool)
+    else:
+        invalid_uniques = ~np.asarray(uniques.isin(rule.values), dtype=bool)
+    return invalid_uniques[codes] & (codes >= 0), codes, uniques
+
+
+def compare_rule_rows(rule: QualityRule, left: pd.Series, right: pd.Series) -> np.ndarray:
+    """Rows where both sides are present and ``left <operator> right`` does not hold."""
+    present = left.notna().to_numpy() & right.notna().to_numpy()
+    holds = COMPARE_OPERATORS[rule.operator](parse_values(left, rule.value_type), parse_values(right, rule.value_type))
+    return present & ~holds
+
+
+def key_text(keys: list[pd.Series]) -> pd.Series:
+    """Each row's key as text, so chunks with different inferred dtypes agree."""
+    # Object columns already hold text; only typed columns need converting.
+    parts = [column if column.dtype == object else column.astype(str) for column in keys]
+    text = parts[0]
+    for part in parts[1:]:
+        text = text.astype(str) + "\x1f" + part.astype(str)
+    return text
+
+
+def unique_rule_rows(
+    keys: list[pd.Series],
+    row_groups: np.ndarray | None,
+    seen: dict[str, pd.Index] | None,
+    name: str,
+) -> np.ndarray:
+    """Rows whose key repeats an earlier row's key (within its group); rows with a null key column pass.
+
+    With ``seen``, keys from earlier chunks of the same file count too, and
+    this frame's keys are added to ``seen[name]``.
+    """
+    keys = [column.reset_index(drop=True) for column in keys]
+    present = keys[0].notna().to_numpy()
+    for column in keys[1:]:
+        present &= column.notna().to_numpy()
+    invalid = np.zeros(len(present), dtype=bool)
+    if not present.any():
+        return invalid
+    every_row = bool(present.all())
+    if not every_row:
+        keys = [column[present] for column in keys]
+    text = key_text(keys)
+    if row_groups is None:
+        repeated = text.duplicated().to_numpy()
+    else:
+        groups = row_groups if every_row else row_groups[present]
+        repeated = pd.DataFrame({"group": groups, "key": text.to_numpy()}).duplicated().to_numpy()
+    if seen is not None:
+        earlier = seen.get(name)
+        if earlier is None:
+            seen[name] = pd.Index(text.unique())
+        else:
+            in_earlier = text.isin(earlier).to_numpy()
+            repeated |= in_earlier
+            seen[name] = earlier.append(pd.Index(text[~in_earlier].unique()))
+    invalid[present] = repeated
+    return invalid
+
+
+def evaluate_rules(
+    rules: Iterable[QualityRule],
+    column_values: Callable[[str], pd.Series],
+    row_count: int,
+    counted_rows: np.ndarray | None = None,
+    row_groups: np.ndarray | None = None,
+    group_count: int = 0,
+    seen: dict[str, pd.Index] | None = None,
+    rule_rows: dict[str, np.ndarray] | None = None,
+) -> tuple[np.ndarray, RuleReport]:
+    """Evaluate compiled rules over one frame and return the combined invalid mask and a per-rule report.
+
+    ``column_values(column)`` returns a column's current values; every column
+    a rule references must exist. Range, regex, and enum rules test each
+    distinct value once where they can and map the result back through the
+    codes. Null values pass every rule; required values are the job of the
+    critical-column checks.
+
+    ``counted_rows``, ``row_groups``, and ``group_count`` work as in
+    ``validate_categoricals``: the report counts kept rows only and holds one
+    report per group. Unique rules compare keys within a group, and with
+    ``seen`` also against earlier chunks. When ``rule_rows`` is given, each
+    rule's invalid-row mask is stored in it under the rule name.
+    """
+    invalid_rows = np.zeros(row_count, dtype=bool)
+    report = RuleReport()
+    if row_groups is not None:
+        report.groups = [RuleReport() for _ in range(group_count)]
+
+    for rule in rules:
+        applies = when_rows(rule, column_values, row_count)
+        codes = uniques = None
+        if applies is not None and not applies.any():
+            rows = np.zeros(row_count, dtype=bool)
+        elif rule.kind == "unique":
+            keys = [column_values(column) for column in rule.columns]
+            if applies is not None:
+                # Rows the rule does not apply to get a null key, so they pass.
+                keys = [column.where(applies) for column in keys]
+            rows = unique_rule_rows(keys, row_groups, seen, rule.name)
+        elif rule.kind == "compare":
+            rows = compare_rule_rows(rule, column_values(rule.columns[0]), column_values(rule.columns[1]))
+            if applies is not None:
+                rows &= applies
+        else:
+            # Only the rows the rule applies to are parsed.
+            values = column_values(rule.columns[0])
+            if applies is not None:
+                values = values[applies]
+            if rule.kind == "range":
+                rows = range_rule_rows(rule, values)
+            else:
+                rows, codes, uniques = factorized_rule_rows(rule, values)
+            if applies is not None:
+                rows, subset_rows = np.zeros(row_count, dtype=bool), rows
+                rows[applies] = subset_rows
+                if codes is not None:
+                    codes, subset_codes = np.full(row_count, -1, dtype=codes.dtype), codes
+                    codes[applies] = subset_codes
+
+        invalid_rows |= rows
+        if rule_rows is not None:
+            rule_rows[rule.name] = rows
+        counted = rows if counted_rows is None else rows & counted_rows
+
+        # Offending values come from the codes of regex and enum rules; the
+        # values failing range, compare, and unique rules are mostly distinct,
+        # so those rules report counts only.
+        offenders = Counter()
+        if codes is not None:
+            value_counts = np.bincount(codes[counted], minlength=len(uniques))
+            offenders = Counter({
+                offender_value(uniques[position]): int(value_counts[position])
+                for position in np.flatnonzero(value_counts)
+            })
+        report.add_rule(rule.name, int(counted.sum()), offenders)
+        if row_groups is None:
+            continue
+        if codes is not None:
+            group_offenders(report.groups, rule.name, codes[counted], row_groups[counted], uniques, value_counts > 0)
+        else:
+            group_violations = np.bincount(row_groups[counted], minlength=group_count)
+            for group_report, violation_count in zip(report.groups, group_violations):
+                group_report.add_rule(rule.name, int(violation_count), Counter())
+
+    counted_invalid = invalid_rows if counted_rows is None else invalid_rows & counted_rows
+    report.dirty_records = int(counted_invalid.sum())
+    if row_groups is not None:
+        group_invalid = np.bincount(row_groups[counted_invalid], minlength=group_count)
+        for group_report, invalid_count in zip(report.groups, group_invalid):
+            group_report.dirty_records = int(invalid_count)
+    return invalid_rows, report
@@ -0,0 +1,254 @@
+"""Quarantine store for rows the Phase 4 ETL rejects, and the queries that replay them."""
+
+from __future__ import annotations
+
+import datetime as dt
+import os
+import re
+from io import BytesIO, StringIO
+from pathlib import Path
+from typing import Any, Iterable
+
+import numpy as np
+import pandas as pd
+
+QUARANTINE_TABLE = "staging.etl_quarantine"
+
+QUARANTINE_DDL = f"""
+    CREATE TABLE IF NOT EXISTS {QUARANTINE_TABLE} (
+        quarantine_id BIGSERIAL PRIMARY KEY,
+        run_id VARCHAR(256) NOT NULL,
+        source_key VARCHAR(1024),
+        target_table VARCHAR(64) NOT NULL,
+        rule VARCHAR(128) NOT NULL,
+        detail TEXT,
+        record JSONB NOT NULL,
+        quarantined_at TIMESTAMP NOT NULL DEFAULT NOW(),
+        replayed_at TIMESTAMP,
+        replay_run_id VARCHAR(256)
+    );
+    CREATE INDEX IF NOT EXISTS idx_etl_quarantine_pending
+        ON {QUARANTINE_TABLE} (target_table, rule) WHERE replayed_at IS NULL;
+    CREATE INDEX IF NOT EXISTS idx_etl_quarantine_run ON {QUARANTINE_TABLE} (run_id);
+    CREATE INDEX IF NOT EXISTS idx_etl_quarantine_source ON {QUARANTINE_TABLE} (source_key)
+"""
+
+# Columns written for each quarantined row, in COPY order.
+QUARANTINE_COLUMNS = ("run_id", "source_key", "target_table", "rule", "detail", "record")
+
+# Per-row rule label carried through transform while quarantine is enabled;
+# it is not a staging column, so load_frame drops it with the other extras.
+RULE_COLUMN = "_quarantine_rule"
+
+# Rule recorded for every row of a file rejected by the file-level checks.
+FILE_VALIDATION_RULE = "quality_validation"
+
+EXPORT_COLUMNS = ("quarantine_id", "run_id", "source_key", "target_table", "rule", "detail", "record", "quarantined_at")
+
+EXPORT_SQL = f"""
+    SELECT quarantine_id, run_id, source_key, target_table, rule, detail, record::text, quarantined_at
+    FROM {QUARANTINE_TABLE}
+    WHERE run_id = %s
+    ORDER BY target_table, quarantine_id
+"""
+
+PENDING_SQL = f"""
+    SELECT quarantine_id, source_key, record::text
+    FROM {QUARANTINE_TABLE}
+    WHERE target_table = %s AND replayed_at IS NULL AND quarantine_id > %s
+"""
+
+
+def new_run_id() -> str:
+    """ETL_RUN_ID, else the Airflow run id, else a UTC timestamp id for a manual run."""
+    run_id = os.getenv("ETL_RUN_ID") or os.getenv("AIRFLOW_CTX_DAG_RUN_ID")
+    if run_id:
+        return run_id
+    return "manual__" + dt.datetime.now(dt.timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+
+
+def ensure_quarantine_table(conn: Any) -> None:
+    with conn.cursor() as cur:
+        cur.execute(QUARANTINE_DDL)
+    conn.commit()
+
+
+def rule_labels(row_count: int, rule_masks: Iterable[tuple[str, np.ndarray]], labels: np.ndarray | None = None) -> np.ndarray:
+    """Label each row with the first rule whose mask flags it; unflagged rows stay None.
+
+    Rows already labelled in ``labels`` keep their label.
+    """
+    labels = np.full(row_count, None, dtype=object) if labels is None else labels.copy()
+    for rule, mask in rule_masks:
+        unlabelled = pd.isna(labels)
+        labels[np.asarray(mask, dtype=bool) & unlabelled] = rule
+    return labels
+
+
+def records_json(df: pd.DataFrame) -> np.ndarray:
+    """One JSON object per row, rendered by pandas' C encoder in one call."""
+    if df.empty:
+        return np.empty(0, dtype=object)
+    text = df.to_json(orient="records", lines=True, date_format="iso")
+    # Non-ASCII and control characters are escaped, so '\n' only ends a record.
+    return np.array(text.rstrip("\n").split("\n"), dtype=object)
+
+
+def rejected_rows(records: pd.DataFrame, rules: Any, detail: str | None = None) -> pd.DataFrame:
+    """Quarantine rows (rule, detail, record) for ``records``, keeping their index."""
+    return pd.DataFrame(
+        {"rule": rules, "detail": detail, "record": records_json(records)},
+        index=records.index,
+        columns=["rule", "detail", "record"],
+    )
+
+
+def quarantine_frame(rejected: pd.DataFrame, run_id: str, source_keys: Any, target_table: str) -> pd.DataFrame:
+    """``rejected`` with the run, source, and table columns, in QUARANTINE_COLUMNS order."""
+    frame = rejected.assign(run_id=run_id, source_key=source_keys, target_table=target_table)
+    frame["rule"] = frame["rule"].fillna(FILE_VALIDATION_RULE)
+    return frame.loc[:, list(QUARANTINE_COLUMNS)]
+
+
+def records_frame(records: Iterable[str], index: Any) -> pd.DataFrame:
+    """Rebuild source rows from their JSON records; values keep their JSON types, strings stay strings."""
+    texts = list(records)
+    if not texts:
+        return pd.DataFrame(index=pd.Index(index))
+    frame = pd.read_json(StringIO("\n".join(texts)), lines=True, dtype=False, convert_dates=False)
+    frame.index = pd.Index(index)
+    return frame
+
+
+def fetch_pending(
+    conn: Any,
+    target_table: str,
+    after_id: int = 0,
+    limit: int | None = None,
+    rule: str | None = None,
+    run_id: str | None = None,
+) -> tuple[pd.DataFrame, pd.Series]:
+    """Pending (not yet replayed) rows of one table above ``after_id``.
+
+    Returns the source rows and their source object keys, both indexed by quarantine_id.
+    """
+    sql = PENDING_SQL
+    params: list[Any] = [target_table, after_id]
+    if rule is not None:
+        sql += " AND rule = %s"
+        params.append(rule)
+    if run_id is not None:
+        sql += " AND run_id = %s"
+        params.append(run_id)
+    sql += " ORDER BY quarantine_id"
+    if limit is not None:
+        sql += " LIMIT %s"
+        params.append(limit)
+    with conn.cursor() as cur:
+        cur.execute(sql, params)
+        rows = cur.fetchall()
+    ids = [row[0] for row in rows]
+    source_keys = pd.Series([row[1] for row in rows], index=pd.Index(ids), dtype=object)
+    return records_frame((row[2] for row in rows), ids), source_keys
+
+
+def mark_replayed(cur: Any, quarantine_ids: Iterable[int], replay_run_id: str) -> int:
+    cur.execute(
+        f"UPDATE {QUARANTINE_TABLE} SET replayed_at = NOW(), replay_run_id = %s WHERE quarantine_id = ANY(%s)",
+        (replay_run_id, [int(quarantine_id) for quarantine_id in quarantine_ids]),
+    )
+    return cur.rowcount
+
+
+def update_rules(cur: Any, quarantine_ids: Iterable[int], rules: Iterable[str]) -> None:
+    """Record the rule each still-failing row fails under the current checks."""
+    cur.execute(
+        f"""
+        UPDATE {QUARANTINE_TABLE} AS quarantine SET rule = failed.rule
+        FROM unnest(%s::bigint[], %s::text[]) AS failed(quarantine_id, rule)
+        WHERE quarantine.quarantine_id = failed.quarantine_id AND quarantine.rule <> failed.rule
+        """,
+        ([int(quarantine_id) for quarantine_id in quarantine_ids], list(rules)),
+    )
+
+
+# ----------------------------
+# PARQUET EXPORT
+# ----------------------------
+def import_parquet_writer():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise RuntimeError("Exporting quarantined rows to Parquet requires the pyarrow package") from exc
+    return pa, pq
+
+
+def export_schema(pa: Any) -> Any:
+    return pa.schema([
+        ("quarantine_id", pa.int64()),
+        ("run_id", pa.string()),
+        ("source_key", pa.string()),
+        ("target_table", pa.string()),
+        ("rule", pa.string()),
+        ("detail", pa.string()),
+        ("record", pa.string()),
+        ("quarantined_at", pa.timestamp("us")),
+    ])
+
+
+def export_object_name(target_table: str, run_id: str) -> str:
+    return f"{target_table}/{re.sub(r'[^A-Za-z0-9._-]', '_', run_id)}.parquet"
+
+
+def split_s3_location(location: str) -> tuple[str, str]:
+    bucket, _, prefix = location[len("s3://"):].partition("/")
+    return bucket, prefix.strip("/")
+
+
+def export_run(conn: Any, run_id: str, location: str, s3_client: Any = None, batch_rows: int = 50000) -> dict[str, int]:
+    """Write one zstd Parquet file per table with the rows quarantined by ``run_id``.
+
+    ``location`` is a local directory or ``s3://bucket/prefix`` (uploaded with
+    ``s3_client``). Rows are read through a server-side cursor and written one
+    row group per fetch. Returns the rows written per target table.
+    """
+    pa, pq = import_parquet_writer()
+    schema = export_schema(pa)
+    written: dict[str, int] = {}
+    current_table = None
+    writer = None
+    sink: Any = None
+
+    def close_file() -> None:
+        writer.close()
+        name = export_object_name(current_table, run_id)
+        if location.startswith("s3://"):
+            bucket, prefix = split_s3_location(location)
+            s3_client.put_object(Bucket=bucket, Key=f"{prefix}/{name}" if prefix else name, Body=sink.getvalue())
+
+    with conn.cursor(name="etl_quarantine_export") as cur:
+        cur.itersize = batch_rows
+        cur.execute(EXPORT_SQL, (run_id,))
+        while True:
+            rows = cur.fetchmany(batch_rows)
+            if not rows:
+                break
+            frame = pd.DataFrame(rows, columns=list(EXPORT_COLUMNS))
+            for target_table, part in frame.groupby("target_table", sort=False):
+                if target_table != current_table:
+                    if writer is not None:
+                        close_file()
+                    current_table = target_table
+                    if location.startswith("s3://"):
+                        sink = BytesIO()
+                    else:
+                        sink = Path(location) / export_object_name(target_table, run_id)
+                        sink.parent.mkdir(parents=True, exist_ok=True)
+                    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+                writer.write_table(pa.Table.from_pandas(part, schema=schema, preserve_index=False))
+                written[target_table] = written.get(target_table, 0) + len(part)
+    if writer is not None:
+        close_file()
+    conn.commit()
+    return written
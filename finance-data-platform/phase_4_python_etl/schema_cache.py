@@ -0,0 +1,165 @@
+"""Cached staging catalog metadata for the Phase 4 ETL."""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Any
+
+LOGGER = logging.getLogger("phase_4_python_etl.schema_cache")
+
+CATALOG_SQL = """
+    SELECT
+        c.table_name,
+        c.column_name,
+        c.data_type,
+        pk.column_name IS NOT NULL AS is_primary_key
+    FROM information_schema.columns c
+    LEFT JOIN (
+        SELECT kcu.table_name, kcu.column_name
+        FROM information_schema.table_constraints tc
+        JOIN information_schema.key_column_usage kcu
+            ON kcu.constraint_schema = tc.constraint_schema
+            AND kcu.constraint_name = tc.constraint_name
+        WHERE tc.table_schema = %(schema)s
+        AND tc.constraint_type = 'PRIMARY KEY'
+    ) pk
+        ON pk.table_name = c.table_name
+        AND pk.column_name = c.column_name
+    WHERE c.table_schema = %(schema)s
+    ORDER BY c.table_name, c.ordinal_position
+"""
+
+# Hashes the column layout and primary keys straight from pg_catalog, so any
+# ALTER/CREATE/DROP on the schema produces a new value in a single-row query.
+FINGERPRINT_SQL = """
+    SELECT md5(
+        COALESCE((
+            SELECT string_agg(
+                format('%%s.%%s:%%s', cls.relname, att.attname, format_type(att.atttypid, att.atttypmod)),
+                ',' ORDER BY cls.relname, att.attnum
+            )
+            FROM pg_attribute att
+            JOIN pg_class cls ON cls.oid = att.attrelid
+            JOIN pg_namespace nsp ON nsp.oid = cls.relnamespace
+            WHERE nsp.nspname = %(schema)s
+            AND cls.relkind IN ('r', 'p')
+            AND att.attnum > 0
+            AND NOT att.attisdropped
+        ), '')
+        || '|' ||
+        COALESCE((
+            SELECT string_agg(
+                format('%%s:%%s', con.conname, pg_get_constraintdef(con.oid)),
+                ',' ORDER BY con.conname
+            )
+            FROM pg_constraint con
+            JOIN pg_namespace nsp ON nsp.oid = con.connamespace
+            WHERE nsp.nspname = %(schema)s
+            AND con.contype = 'p'
+        ), '')
+    )
+"""
+
+
+def fetch_schema_fingerprint(conn: Any, schema: str = "staging") -> str:
+    with conn.cursor() as cur:
+        cur.execute(FINGERPRINT_SQL, {"schema": schema})
+        return cur.fetchone()[0]
+
+
+def fetch_catalog(conn: Any, schema: str = "staging") -> dict[str, dict[str, Any]]:
+    tables: dict[str, dict[str, Any]] = {}
+    with conn.cursor() as cur:
+        cur.execute(CATALOG_SQL, {"schema": schema})
+        for table_name, column_name, data_type, is_primary_key in cur.fetchall():
+            table = tables.setdefault(table_name, {"columns": {}, "primary_key": []})
+            table["columns"][column_name] = data_type
+            if is_primary_key:
+                table["primary_key"].append(column_name)
+    return tables
+
+
+class StagingSchemaCache:
+    """Column names, types, and primary keys for every table in one schema.
+
+    The whole schema is read with one catalog query. When ``cache_path`` is
+    set, the result is also written to disk next to the schema fingerprint and
+    reused by later runs until the fingerprint changes.
+    """
+
+    def __init__(self, cache_path: str | Path | None = None, schema: str = "staging") -> None:
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.schema = schema
+        self.fingerprint: str | None = None
+        self.tables: dict[str, dict[str, Any]] = {}
+        self.loaded = False
+        self._lock = threading.Lock()
+
+    def load(self, conn: Any) -> "StagingSchemaCache":
+        with self._lock:
+            fingerprint = fetch_schema_fingerprint(conn, self.schema)
+            if self.loaded and fingerprint == self.fingerprint:
+                return self
+
+            tables = self._read_disk_cache(fingerprint)
+            source = "disk"
+            if tables is None:
+                tables = fetch_catalog(conn, self.schema)
+                source = "catalog"
+                self._write_disk_cache(fingerprint, tables)
+
+            self.tables = tables
+            self.fingerprint = fingerprint
+            self.loaded = True
+
+        LOGGER.info("Schema cache loaded | schema=%s | source=%s | tables=%s | fingerprint=%s", self.schema, source, len(tables), fingerprint)
+        return self
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.loaded = False
+            self.fingerprint = None
+            self.tables = {}
+
+    def ensure_loaded(self, conn: Any) -> "StagingSchemaCache":
+        if not self.loaded:
+            self.load(conn)
+        return self
+
+    def column_types(self, table_name: str) -> dict[str, str]:
+        return dict(self.tables.get(table_name, {}).get("columns", {}))
+
+    def columns(self, table_name: str) -> list[str]:
+        return list(self.tables.get(table_name, {}).get("columns", {}))
+
+    def primary_key(self, table_name: str) -> list[str]:
+        return list(self.tables.get(table_name, {}).get("primary_key", []))
+
+    def _read_disk_cache(self, fingerprint: str) -> dict[str, dict[str, Any]] | None:
+        if self.cache_path is None or not self.cache_path.exists():
+            return None
+        try:
+            payload = json.loads(self.cache_path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            LOGGER.warning("Ignoring unreadable schema cache file | path=%s", self.cache_path)
+            return None
+        if payload.get("schema") != self.schema or payload.get("fingerprint") != fingerprint:
+            return None
+        return payload.get("tables")
+
+    def _write_disk_cache(self, fingerprint: str, tables: dict[str, dict[str, Any]]) -> None:
+        if self.cache_path is None:
+            return
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_path.with_suffix(self.cache_path.suffix + ".tmp")
+            tmp_path.write_text(
+                json.dumps({"schema": self.schema, "fingerprint": fingerprint, "tables": tables}, indent=2),
+                encoding="utf-8",
+            )
+            tmp_path.replace(self.cache_path)
+        except OSError as exc:
+            LOGGER.warning("Schema cache file could not be written | path=%s | error=%s", self.cache_path, exc)
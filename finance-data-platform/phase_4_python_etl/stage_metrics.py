@@ -0,0 +1,127 @@
+"""Wall time, CPU time, peak RSS growth, rows, and bytes per ETL stage, cheap enough to stay on."""
+
+from __future__ import annotations
+
+import sys
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Any
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Stages in pipeline order; the summary lists them in this order.
+STAGES = ("list", "extract", "normalize", "quality", "transform", "align", "load", "metadata")
+
+# RUSAGE_THREAD (Linux) reports the calling thread's CPU time together with the
+# process's peak RSS, so one call covers both. Elsewhere CPU is process-wide.
+RUSAGE_WHO = getattr(resource, "RUSAGE_THREAD", getattr(resource, "RUSAGE_SELF", None))
+# ru_maxrss is in kilobytes on Linux and bytes on macOS.
+MAXRSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+
+def usage() -> tuple[float, int]:
+    """CPU seconds of the calling thread and the process's peak RSS in bytes so far."""
+    if resource is None:
+        return 0.0, 0
+    current = resource.getrusage(RUSAGE_WHO)
+    return current.ru_utime + current.ru_stime, current.ru_maxrss * MAXRSS_UNIT
+
+
+def bytes_consumed(body: Any) -> int:
+    """How far a reader got into a staging object body, or 0 when the body cannot tell."""
+    try:
+        return int(body.tell())
+    except (AttributeError, OSError, ValueError):
+        return 0
+
+
+@dataclass
+class StageTotals:
+    """Running totals of one stage over the spans added to it."""
+
+    calls: int = 0
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    peak_rss_delta_bytes: int = 0
+    rows_in: int = 0
+    rows_out: int = 0
+    bytes_read: int = 0
+
+    def merge(self, other: "StageTotals") -> "StageTotals":
+        self.calls += other.calls
+        self.wall_seconds += other.wall_seconds
+        self.cpu_seconds += other.cpu_seconds
+        self.peak_rss_delta_bytes += other.peak_rss_delta_bytes
+        self.rows_in += other.rows_in
+        self.rows_out += other.rows_out
+        self.bytes_read += other.bytes_read
+        return self
+
+    def to_metrics(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "wall_seconds": round(self.wall_seconds, 4),
+            "cpu_seconds": round(self.cpu_seconds, 4),
+            "peak_rss_delta_bytes": self.peak_rss_delta_bytes,
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+            "bytes_read": self.bytes_read,
+        }
+
+
+class StageSpan:
+    """One timed pass through a stage; set ``rows_out`` and ``bytes_read`` before it exits.
+
+    ``rows_out`` defaults to ``rows_in``. The span is added to its totals even
+    when the stage raises, so failed files still show where their time went.
+    """
+
+    __slots__ = ("totals", "rows_in", "rows_out", "bytes_read", "_wall", "_cpu", "_peak_rss")
+
+    def __init__(self, totals: StageTotals, rows_in: int) -> None:
+        self.totals = totals
+        self.rows_in = rows_in
+        self.rows_out: int | None = None
+        self.bytes_read = 0
+
+    def __enter__(self) -> "StageSpan":
+        self._cpu, self._peak_rss = usage()
+        self._wall = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        wall = perf_counter() - self._wall
+        cpu, peak_rss = usage()
+        totals = self.totals
+        totals.calls += 1
+        totals.wall_seconds += wall
+        totals.cpu_seconds += cpu - self._cpu
+        totals.peak_rss_delta_bytes += peak_rss - self._peak_rss
+        totals.rows_in += self.rows_in
+        totals.rows_out += self.rows_in if self.rows_out is None else self.rows_out
+        totals.bytes_read += self.bytes_read
+
+
+@dataclass
+class StageMetrics:
+    """Stage totals for one file, batch, or run; files merge into their run."""
+
+    stages: dict[str, StageTotals] = field(default_factory=dict)
+
+    def stage(self, name: str, rows_in: int = 0) -> StageSpan:
+        totals = self.stages.get(name)
+        if totals is None:
+            totals = self.stages[name] = StageTotals()
+        return StageSpan(totals, rows_in)
+
+    def merge(self, other: "StageMetrics | None") -> "StageMetrics":
+        if other is not None:
+            for name, totals in other.stages.items():
+                self.stages.setdefault(name, StageTotals()).merge(totals)
+        return self
+
+    def to_metrics(self) -> dict[str, dict[str, Any]]:
+        return {name: self.stages[name].to_metrics() for name in STAGES if name in self.stages}
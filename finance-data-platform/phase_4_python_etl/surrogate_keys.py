@@ -0,0 +1,191 @@
+"""Bounded in-memory natural -> surrogate key maps for warehouse fact loading."""
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Iterable, NamedTuple
+
+import numpy as np
+import pandas as pd
+from psycopg2.extensions import quote_ident
+
+# Key returned for natural IDs the dimension does not hold.
+MISSING_KEY = -1
+
+
+class DimensionSource(NamedTuple):
+    """Where one map's entries come from: ``natural_column`` -> ``dimension_key`` of ``dimension``."""
+
+    dimension: str
+    natural_column: str
+    dimension_key: str
+    current_only: bool
+
+
+class KeyMap:
+    """Natural -> surrogate keys of one dimension, bounded to ``capacity`` entries.
+
+    The natural IDs are a unique pandas Index aligned with numpy arrays of
+    surrogate keys and last-use ticks, so a whole batch resolves with one
+    ``get_indexer`` call. When ``put`` takes the map over capacity, the least
+    recently used entries are dropped with one ``argpartition``.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = max(1, capacity)
+        self.natural_ids = pd.Index([], dtype=object)
+        self.keys = np.empty(0, dtype=np.int64)
+        self.last_used = np.empty(0, dtype=np.int64)
+        self.clock = 0
+        # Highest surrogate key read from the dimension; refresh() reads above it.
+        self.high_water_key = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def get(self, natural_ids: pd.Index) -> np.ndarray:
+        """Surrogate keys for ``natural_ids``, MISSING_KEY where the map has no entry."""
+        self.clock += 1
+        positions = self.natural_ids.get_indexer(natural_ids)
+        found = positions >= 0
+        self.last_used[positions[found]] = self.clock
+        keys = np.full(len(natural_ids), MISSING_KEY, dtype=np.int64)
+        keys[found] = self.keys[positions[found]]
+        hits = int(found.sum())
+        self.hits += hits
+        self.misses += len(natural_ids) - hits
+        return keys
+
+    def put(self, natural_ids: Iterable[Any], keys: Iterable[int]) -> None:
+        """Add or replace entries; for a natural ID given twice, the later key wins."""
+        incoming = pd.Index(list(natural_ids), dtype=object)
+        if not len(incoming):
+            return
+        incoming_keys = np.asarray(keys, dtype=np.int64)
+        self.clock += 1
+
+        kept = ~self.natural_ids.isin(incoming)
+        merged_ids = self.natural_ids[kept].append(incoming)
+        merged_keys = np.concatenate([self.keys[kept], incoming_keys])
+        merged_used = np.concatenate([self.last_used[kept], np.full(len(incoming), self.clock, dtype=np.int64)])
+        last_copy = ~merged_ids.duplicated(keep="last")
+        if not last_copy.all():
+            merged_ids, merged_keys, merged_used = merged_ids[last_copy], merged_keys[last_copy], merged_used[last_copy]
+
+        excess = len(merged_keys) - self.capacity
+        if excess > 0:
+            evicted = np.argpartition(merged_used, excess - 1)[:excess]
+            retained = np.ones(len(merged_keys), dtype=bool)
+            retained[evicted] = False
+            merged_ids, merged_keys, merged_used = merged_ids[retained], merged_keys[retained], merged_used[retained]
+            self.evictions += excess
+
+        self.natural_ids, self.keys, self.last_used = merged_ids, merged_keys, merged_used
+
+    def stats(self) -> dict[str, int]:
+        return {"entries": len(self), "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+class SurrogateKeyResolver:
+    """Resolve natural IDs of fact batches to dimension surrogate keys from bounded in-memory maps.
+
+    ``load()`` reads each dimension's newest ``capacity`` members once per run,
+    ``refresh()`` reads only rows whose surrogate key is above the highest one
+    seen (new members and new SCD2 versions), and ``resolve()`` fetches the IDs
+    a batch misses in one query. Maps are shared by every fact table that looks
+    up the same dimension, and each map has its own lock so the loader's worker
+    threads can resolve concurrently.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.maps: dict[DimensionSource, KeyMap] = {}
+        self.locks: dict[DimensionSource, threading.Lock] = {}
+
+    def register(self, source: DimensionSource) -> None:
+        if source not in self.maps:
+            self.maps[source] = KeyMap(self.capacity)
+            self.locks[source] = threading.Lock()
+
+    @staticmethod
+    def rows_sql(cur: Any, source: DimensionSource, where: str, order: str) -> str:
+        """SELECT of (natural ID, surrogate key) pairs; SCD2 sources keep the newest current row per ID."""
+        natural = quote_ident(source.natural_column, cur)
+        dimension_key = quote_ident(source.dimension_key, cur)
+        if source.current_only:
+            where = f"is_current AND {where}"
+        return f"SELECT {natural}, {dimension_key} FROM warehouse.{source.dimension} WHERE {where} ORDER BY {order}"
+
+    def fetch(self, cur: Any, source: DimensionSource, where: str, params: Any) -> pd.Series:
+        """Read (natural ID, key) rows into ``source``'s map and return them as a Series of keys by natural ID.
+
+        Rows are read in key order, so a newer version replaces an older one.
+        """
+        dimension_key = quote_ident(source.dimension_key, cur)
+        cur.execute(self.rows_sql(cur, source, where, dimension_key), params)
+        rows = cur.fetchall()
+        if not rows:
+            return pd.Series([], index=pd.Index([], dtype=object), dtype=np.int64)
+        natural_ids, keys = zip(*rows)
+        key_map = self.maps[source]
+        key_map.put(natural_ids, keys)
+        key_map.high_water_key = max(key_map.high_water_key, int(keys[-1]))
+        fetched = pd.Series(np.asarray(keys, dtype=np.int64), index=pd.Index(natural_ids, dtype=object))
+        return fetched[~fetched.index.duplicated(keep="last")]
+
+    def load(self, conn: Any) -> None:
+        """Fill every registered map with the dimension's newest members, up to capacity."""
+        with conn.cursor() as cur:
+            for source, key_map in self.maps.items():
+                with self.locks[source]:
+                    dimension_key = quote_ident(source.dimension_key, cur)
+                    cur.execute(
+                        f"SELECT * FROM ({self.rows_sql(cur, source, 'TRUE', f'{dimension_key} DESC')} LIMIT %s) newest",
+                        (key_map.capacity,),
+                    )
+                    rows = cur.fetchall()
+                    if rows:
+                        natural_ids, keys = zip(*reversed(rows))
+                        key_map.put(natural_ids, keys)
+                        key_map.high_water_key = max(key_map.high_water_key, max(keys))
+        conn.commit()
+
+    def refresh(self, conn: Any, dimensions: Iterable[str] | None = None) -> None:
+        """Read rows added to the dimensions since the last load or refresh."""
+        wanted = None if dimensions is None else set(dimensions)
+        with conn.cursor() as cur:
+            for source, key_map in self.maps.items():
+                if wanted is not None and source.dimension not in wanted:
+                    continue
+                with self.locks[source]:
+                    dimension_key = quote_ident(source.dimension_key, cur)
+                    self.fetch(cur, source, f"{dimension_key} > %s", (key_map.high_water_key,))
+        conn.commit()
+
+    def resolve(self, cur: Any, source: DimensionSource, natural_ids: Iterable[Any]) -> np.ndarray:
+        """Surrogate keys for ``natural_ids`` (MISSING_KEY where the dimension has none), fetching misses in one query."""
+        batch = pd.Index(list(natural_ids), dtype=object)
+        with self.locks[source]:
+            key_map = self.maps[source]
+            keys = key_map.get(batch)
+            missing = keys == MISSING_KEY
+            if missing.any():
+                # Taken from the fetched rows, not the map: a batch larger than
+                # the map can evict its own entries.
+                natural = quote_ident(source.natural_column, cur)
+                fetched = self.fetch(cur, source, f"{natural} = ANY(%s)", (list(batch[missing]),))
+                positions = fetched.index.get_indexer(batch[missing])
+                found = positions >= 0
+                missed_keys = np.full(len(positions), MISSING_KEY, dtype=np.int64)
+                missed_keys[found] = fetched.to_numpy()[positions[found]]
+                keys[missing] = missed_keys
+        return keys
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        stats: dict[str, dict[str, int]] = {}
+        for source, key_map in self.maps.items():
+            stats[f"{source.dimension}.{source.natural_column}"] = key_map.stats()
+        return stats
@@ -0,0 +1,960 @@
+"""Promote staging rows into the warehouse star schema with set-based SQL.
+
+Each run reads the staging rows whose ``loaded_at`` is after the table's
+stored mark. ``loaded_at`` defaults to ``NOW()``, the start of the staging
+transaction, not its commit, so a transaction still open while the loader
+runs can commit rows older than the mark the loader stores. Each run
+therefore reads back ``WAREHOUSE_LOAD_LAG_SECONDS`` before the mark; the
+merges are idempotent, so rows read twice are not duplicated. A staging
+transaction that stays open for longer than the lag while a load runs can
+still be missed, which ``--full`` repairs.
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import json
+import os
+import string
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from time import perf_counter
+from typing import Any
+
+import psycopg2
+from psycopg2.extensions import quote_ident
+
+CURRENT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = CURRENT_DIR.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from phase_4_python_etl.date_dimension import date_key_sql, extend_calendar, has_deterministic_keys
+from phase_4_python_etl.schema_cache import fetch_catalog
+from phase_4_python_etl.surrogate_keys import MISSING_KEY, DimensionSource, SurrogateKeyResolver
+from phase_8_monitoring_logging.logging.logging_config import configure_pipeline_logger
+
+LOGGER = configure_pipeline_logger("phase_4_python_etl.warehouse_loader")
+
+
+def load_env_file(env_path: str) -> None:
+    env_file = CURRENT_DIR / env_path
+    if env_file.exists():
+        with open(env_file) as f:
+            for line in f:
+                if line.strip() and not line.strip().startswith("#"):
+                    k, v = line.strip().split("=", 1)
+                    os.environ.setdefault(k, v.strip().strip('"'))
+
+
+load_env_file("warehouse_conn.env")
+
+WAREHOUSE_CONN = os.getenv("WAREHOUSE_CONN", "dbname=yourdb user=youruser password=yourpass host=yourhost")
+# Tables of one dependency level merged concurrently, each on its own connection.
+WAREHOUSE_LOAD_WORKERS = max(1, int(os.getenv("WAREHOUSE_LOAD_WORKERS", "4")))
+# Entries per dimension kept in memory to resolve fact surrogate keys; 0 resolves them with SQL joins.
+WAREHOUSE_KEY_CACHE_ENTRIES = max(0, int(os.getenv("WAREHOUSE_KEY_CACHE_ENTRIES", "0")))
+# Staging rows are read back this far before each table's mark (see the module docstring).
+WAREHOUSE_LOAD_LAG = dt.timedelta(seconds=max(0, int(os.getenv("WAREHOUSE_LOAD_LAG_SECONDS", "900"))))
+# dim_date always covers this range, extended as far as the loaded facts need.
+WAREHOUSE_CALENDAR_START = dt.date.fromisoformat(os.getenv("WAREHOUSE_CALENDAR_START", "2020-01-01"))
+WAREHOUSE_CALENDAR_END = dt.date.fromisoformat(os.getenv("WAREHOUSE_CALENDAR_END") or f"{dt.date.today().year + 1}-12-31")
+
+STATE_TABLE = "metadata.warehouse_load_state"
+
+STATE_DDL = f"""
+    CREATE SCHEMA IF NOT EXISTS metadata;
+    CREATE TABLE IF NOT EXISTS {STATE_TABLE} (
+        target_table VARCHAR(64) PRIMARY KEY,
+        source_table VARCHAR(64) NOT NULL,
+        high_water_loaded_at TIMESTAMP,
+        rows_loaded INT NOT NULL DEFAULT 0,
+        load_time TIMESTAMP NOT NULL DEFAULT NOW()
+    )
+"""
+
+# Rows already in a staging table when the column is added all get the time of
+# the ALTER, so the first promotion after the upgrade picks up everything.
+LOADED_AT_DDL = """
+    ALTER TABLE staging.{table} ADD COLUMN IF NOT EXISTS loaded_at TIMESTAMP NOT NULL DEFAULT NOW();
+    CREATE INDEX IF NOT EXISTS idx_{table}_loaded_at ON staging.{table} (loaded_at)
+"""
+
+WAREHOUSE_COLUMNS_SQL = """
+    SELECT
+        cls.relname,
+        att.attname,
+        format_type(att.atttypid, att.atttypmod),
+        COALESCE(pg_get_expr(def.adbin, def.adrelid) LIKE 'nextval(%%', FALSE) OR att.attidentity <> ''
+    FROM pg_attribute att
+    JOIN pg_class cls ON cls.oid = att.attrelid
+    JOIN pg_namespace nsp ON nsp.oid = cls.relnamespace
+    LEFT JOIN pg_attrdef def ON def.adrelid = att.attrelid AND def.adnum = att.attnum
+    WHERE nsp.nspname = 'warehouse'
+    AND cls.relkind IN ('r', 'p')
+    AND att.attnum > 0
+    AND NOT att.attisdropped
+    ORDER BY cls.relname, att.attnum
+"""
+
+# md5 of the tracked attributes of an SCD2 dimension row (see scd2_hash_sql).
+HASH_COLUMN = "attribute_hash"
+HASH_DDL = f"ALTER TABLE warehouse.{{table}} ADD COLUMN IF NOT EXISTS {HASH_COLUMN} CHAR(32)"
+# Maintained by the SCD2 merge itself, so never part of the attribute hash.
+SCD2_BOOKKEEPING_COLUMNS = frozenset({"effective_date", "expiry_date", "is_current", "created_at", HASH_COLUMN})
+
+STATE_UPSERT_SQL = f"""
+    INSERT INTO {STATE_TABLE} (target_table, source_table, high_water_loaded_at, rows_loaded, load_time)
+    VALUES (%s, %s, %s, %s, NOW())
+    ON CONFLICT (target_table)
+    DO UPDATE SET
+        source_table = EXCLUDED.source_table,
+        high_water_loaded_at = GREATEST({STATE_TABLE}.high_water_loaded_at, EXCLUDED.high_water_loaded_at),
+        rows_loaded = EXCLUDED.rows_loaded,
+        load_time = NOW()
+"""
+
+
+def as_number(expression: str) -> str:
+    """SQL for a text value cast to numeric, or NULL when it is not a plain number."""
+    return f"CASE WHEN ({expression})::text ~ '^\\s*[-+]?[0-9]+(\\.[0-9]+)?\\s*$' THEN ({expression})::text::numeric END"
+
+
+def sensor_reading(sensor_type: str) -> str:
+    """One sensor's value from the long telemetry layout (``sensor_type`` / ``sensor_value`` rows)."""
+    return f"CASE WHEN {{sensor_type}} = '{sensor_type}' THEN {as_number('{sensor_value}')} END"
+
+
+@dataclass(frozen=True)
+class Lookup:
+    """Fill ``key_column`` with ``dimension_key`` of the ``dimension`` row whose ``natural_column`` equals the staged ``source``."""
+
+    key_column: str
+    dimension: str
+    dimension_key: str
+    natural_column: str
+    source: str
+    current_only: bool = False
+
+
+@dataclass(frozen=True)
+class StarTable:
+    """How one warehouse table is filled from one staging table.
+
+    ``columns`` maps staged columns to candidate SQL expressions over the
+    staging row, with staging columns written as ``{name}``. The first
+    candidate whose columns all exist in staging is used. Warehouse columns
+    without an entry are copied from the staging column of the same name when
+    there is one. Staged columns that are not warehouse columns (natural IDs
+    of other dimensions) only feed ``lookups``. ``checks`` mirror the table's
+    CHECK constraints per staged column; rows failing one are counted as
+    rejected and not loaded. ``scd2`` tables keep history per natural key
+    (see ``close_changed_versions``).
+    """
+
+    name: str
+    source: str
+    natural_key: str
+    columns: dict[str, tuple[str, ...]] = field(default_factory=dict)
+    lookups: tuple[Lookup, ...] = ()
+    checks: dict[str, str] = field(default_factory=dict)
+    scd2: bool = False
+
+
+def date_lookup(key_column: str, source: str) -> Lookup:
+    return Lookup(key_column, "dim_date", "date_key", "date_actual", source)
+
+
+CUSTOMER = Lookup("customer_key", "dim_customer", "customer_key", "customer_id", "customer_id", current_only=True)
+VEHICLE = Lookup("vehicle_key", "dim_vehicle", "vehicle_key", "vehicle_id", "vehicle_id", current_only=True)
+DEALER = Lookup("dealer_key", "dim_dealer", "dealer_key", "dealer_id", "dealer_id")
+SUPPLIER = Lookup("supplier_key", "dim_supplier", "supplier_key", "supplier_id", "supplier_id")
+NON_NEGATIVE = ">= 0"
+
+SCD2_COLUMNS = {
+    "effective_date": ("COALESCE({created_at}::date, CURRENT_DATE)", "CURRENT_DATE"),
+    "is_current": ("TRUE",),
+}
+
+STAR_TABLES = (
+    StarTable(
+        name="dim_customer",
+        source="staging_customers",
+        natural_key="customer_id",
+        columns={
+            **SCD2_COLUMNS,
+            "customer_name": ("NULLIF(concat_ws(' ', {first_name}, {last_name}), '')",),
+            "street_name": ("{address}",),
+            "province": ("{state}",),
+            "postal_code": ("{zip_code}",),
+        },
+        scd2=True,
+    ),
+    StarTable(
+        name="dim_dealer",
+        source="staging_dealers",
+        natural_key="dealer_id",
+        columns={
+            "street_name": ("{address}",),
+            "province": ("{state}",),
+            "postal_code": ("{zip_code}",),
+        },
+    ),
+    StarTable(
+        name="dim_vehicle",
+        source="staging_vehicles",
+        natural_key="vin",
+        columns={
+            **SCD2_COLUMNS,
+            "effective_date": ("COALESCE({purchase_date}::date, CURRENT_DATE)", "CURRENT_DATE"),
+        },
+        checks={"year": "BETWEEN 1980 AND 2100"},
+        scd2=True,
+    ),
+    StarTable(
+        name="dim_supplier",
+        source="staging_suppliers",
+        natural_key="supplier_id",
+    ),
+    StarTable(
+        name="fact_sales",
+        source="staging_sales",
+        natural_key="sale_id",
+        columns={
+            "sale_date": ("{sale_date}::date",),
+            "final_price": ("{final_price}", "{sale_price} - COALESCE({discount_amount}, 0)", "{sale_price}"),
+            "customer_id": ("{customer_id}",),
+            "vehicle_id": ("{vehicle_id}",),
+            "dealer_id": ("{dealer_id}",),
+        },
+        lookups=(date_lookup("sale_date_key", "sale_date"), CUSTOMER, VEHICLE, DEALER),
+        checks={"sale_price": NON_NEGATIVE, "discount_amount": NON_NEGATIVE, "final_price": NON_NEGATIVE},
+    ),
+    StarTable(
+        name="fact_payments",
+        source="staging_payments",
+        natural_key="payment_id",
+        columns={
+            "payment_date": ("{payment_date}::date",),
+            "payment_amount": ("{payment_amount}", "{amount}"),
+            "payment_status": ("{payment_status}", "{status}"),
+        },
+        lookups=(
+            date_lookup("payment_date_key", "payment_date"),
+            Lookup("sales_key", "fact_sales", "sales_key", "sale_id", "sale_id"),
+        ),
+        checks={"payment_amount": NON_NEGATIVE},
+    ),
+    StarTable(
+        name="fact_procurement",
+        source="staging_procurement",
+        natural_key="procurement_id",
+        columns={
+            "procurement_date": ("{procurement_date}::date",),
+            "cost_price": ("{cost_price}", "{cost}"),
+            "supplier_id": ("{supplier_id}",),
+            "vehicle_id": ("{vehicle_id}",),
+        },
+        lookups=(date_lookup("procurement_date_key", "procurement_date"), SUPPLIER, VEHICLE),
+        checks={"cost_price": NON_NEGATIVE},
+    ),
+    StarTable(
+        name="fact_inventory",
+        source="staging_inventory",
+        natural_key="inventory_id",
+        columns={
+            "inventory_date": ("{inventory_date}::date", "{stock_date}::date"),
+            "vehicle_id": ("{vehicle_id}",),
+            "dealer_id": ("{dealer_id}",),
+        },
+        lookups=(date_lookup("inventory_date_key", "inventory_date"), VEHICLE, DEALER),
+        checks={"quantity": NON_NEGATIVE},
+    ),
+    StarTable(
+        name="fact_interactions",
+        source="staging_interactions",
+        natural_key="interaction_id",
+        columns={
+            "interaction_date": ("{interaction_date}::date",),
+            "customer_id": ("{customer_id}",),
+            "dealer_id": ("{dealer_id}",),
+        },
+        lookups=(date_lookup("interaction_date_key", "interaction_date"), CUSTOMER, DEALER),
+    ),
+    StarTable(
+        name="fact_telemetry",
+        source="staging_telemetry",
+        natural_key="telemetry_id",
+        columns={
+            "telemetry_timestamp": ("{telemetry_timestamp}", "{timestamp}"),
+            # Wide readings (one column per sensor) or the long staging layout.
+            "speed": (as_number("{speed}"), sensor_reading("speed")),
+            "fuel_level": (as_number("{fuel_level}"), sensor_reading("fuel_level")),
+            "engine_temperature": (as_number("{engine_temperature}"), sensor_reading("engine_temperature")),
+            "vehicle_id": ("{vehicle_id}",),
+        },
+        lookups=(date_lookup("telemetry_date_key", "telemetry_timestamp"), VEHICLE),
+        checks={
+            "speed": "BETWEEN 0 AND 350",
+            "fuel_level": "BETWEEN 0 AND 100",
+            "engine_temperature": "BETWEEN -50 AND 250",
+        },
+    ),
+)
+
+STAR_TABLES_BY_NAME = {table.name: table for table in STAR_TABLES}
+LOOKUP_TARGETS = {lookup.dimension for table in STAR_TABLES for lookup in table.lookups}
+
+
+def template_fields(expression: str) -> list[str]:
+    return [name for _, name, _, _ in string.Formatter().parse(expression) if name]
+
+
+def resolve_expression(candidates: tuple[str, ...], staging_columns: dict[str, str]) -> str | None:
+    """Render the first candidate whose staging columns all exist, or None."""
+    for candidate in candidates:
+        names = template_fields(candidate)
+        if all(name in staging_columns for name in names):
+            return candidate.format(**{name: f's."{name}"' for name in names})
+    return None
+
+
+@dataclass
+class TablePlan:
+    """The SQL pieces for one table, resolved against the current catalogs."""
+
+    table: StarTable
+    # staged column -> (SQL expression, cast type or None)
+    staged: dict[str, tuple[str, str | None]]
+    insert_columns: list[str]
+    lookups: list[Lookup]
+    # Condition over the temp table (alias ``t``) that a row must meet to be loaded.
+    valid: str
+    # (column, SQL type) hashed into HASH_COLUMN, for SCD2 tables.
+    hash_columns: list[tuple[str, str]] = field(default_factory=list)
+    # Date keys are the dates' yyyymmdd numbers, so dim_date lookups need no join.
+    computed_date_keys: bool = False
+
+
+def plan_table(table: StarTable, staging_columns: dict[str, str], warehouse_columns: dict[str, tuple[str, bool]]) -> TablePlan:
+    lookup_keys = {lookup.key_column for lookup in table.lookups}
+    staged: dict[str, tuple[str, str | None]] = {}
+    for column, (data_type, is_serial) in warehouse_columns.items():
+        if is_serial or column in lookup_keys or column == HASH_COLUMN:
+            continue
+        candidates = table.columns.get(column, ()) + ("{" + column + "}",)
+        expression = resolve_expression(candidates, staging_columns)
+        if expression is not None:
+            staged[column] = (expression, data_type)
+    for column, candidates in table.columns.items():
+        if column in warehouse_columns:
+            continue
+        expression = resolve_expression(candidates, staging_columns)
+        if expression is not None:
+            staged[column] = (expression, None)
+
+    if table.natural_key not in staged:
+        raise ValueError(f"staging.{table.source} has no column for {table.name}.{table.natural_key}")
+
+    lookups = [
+        lookup for lookup in table.lookups
+        if lookup.key_column in warehouse_columns and lookup.source in staged
+    ]
+    insert_columns = [column for column in staged if column in warehouse_columns]
+    valid = " AND ".join(
+        f't."{column}" IS NULL OR t."{column}" {condition}'.join("()")
+        for column, condition in table.checks.items()
+        if column in staged
+    )
+    hash_columns = []
+    if table.scd2:
+        if HASH_COLUMN not in warehouse_columns:
+            raise ValueError(f"warehouse.{table.name} has no {HASH_COLUMN} column")
+        hash_columns = scd2_hash_columns(table, warehouse_columns)
+        insert_columns.append(HASH_COLUMN)
+    return TablePlan(table, staged, insert_columns, lookups, valid or "TRUE", hash_columns)
+
+
+def scd2_hash_columns(table: StarTable, warehouse_columns: dict[str, tuple[str, bool]]) -> list[tuple[str, str]]:
+    """The tracked attributes of an SCD2 table: every warehouse column except keys and bookkeeping.
+
+    The list comes from the warehouse table alone, so a column that staging
+    does not provide hashes as NULL, and the hash of an unchanged row does not
+    move when the staging layout changes.
+    """
+    lookup_keys = {lookup.key_column for lookup in table.lookups}
+    return [
+        (column, data_type)
+        for column, (data_type, is_serial) in warehouse_columns.items()
+        if not is_serial
+        and column != table.natural_key
+        and column not in lookup_keys
+        and column not in SCD2_BOOKKEEPING_COLUMNS
+    ]
+
+
+def scd2_hash_sql(alias: str, hash_columns: list[tuple[str, str]], available: Any) -> str:
+    """md5 of the row's tracked attributes; columns missing from ``available`` hash as typed NULLs.
+
+    The text form of a row value quotes values that need it and leaves NULL
+    empty, so distinct attribute tuples never produce the same input string.
+    """
+    values = ", ".join(
+        f'{alias}."{column}"' if column in available else f"NULL::{data_type}"
+        for column, data_type in hash_columns
+    )
+    return f"md5(ROW({values})::text)"
+
+
+def table_dependencies(table: StarTable) -> set[str]:
+    return {lookup.dimension for lookup in table.lookups} & (set(STAR_TABLES_BY_NAME) | {"dim_date"})
+
+
+def dependency_levels(tables: tuple[StarTable, ...]) -> list[list[str]]:
+    """Group table names so every table comes after the tables it looks keys up in.
+
+    ``dim_date`` is always in the first level, with the other dimensions.
+    """
+    levels: dict[str, int] = {"dim_date": 0}
+
+    def level_of(name: str) -> int:
+        if name not in levels:
+            levels[name] = 1 + max((level_of(dependency) for dependency in table_dependencies(STAR_TABLES_BY_NAME[name])), default=-1)
+        return levels[name]
+
+    for table in tables:
+        level_of(table.name)
+    grouped: list[list[str]] = [[] for _ in range(max(levels.values()) + 1)]
+    for name, level in levels.items():
+        grouped[level].append(name)
+    return grouped
+
+
+# ----------------------------
+# CATALOG AND STATE
+# ----------------------------
+def fetch_warehouse_columns(conn: Any) -> dict[str, dict[str, tuple[str, bool]]]:
+    """Return {table: {column: (SQL type, is_serial)}} for the warehouse schema in one query."""
+    tables: dict[str, dict[str, tuple[str, bool]]] = {}
+    with conn.cursor() as cur:
+        cur.execute(WAREHOUSE_COLUMNS_SQL)
+        for table_name, column_name, data_type, is_serial in cur.fetchall():
+            tables.setdefault(table_name, {})[column_name] = (data_type, bool(is_serial))
+    return tables
+
+
+def ensure_loaded_at_columns(conn: Any, staging_catalog: dict[str, dict[str, Any]], sources: list[str]) -> list[str]:
+    """Add ``loaded_at`` to staging tables that lack it; returns the tables altered."""
+    altered = [
+        source for source in sources
+        if source in staging_catalog and "loaded_at" not in staging_catalog[source]["columns"]
+    ]
+    if altered:
+        with conn.cursor() as cur:
+            for source in altered:
+                cur.execute(LOADED_AT_DDL.format(table=source))
+    return altered
+
+
+def ensure_hash_columns(conn: Any, warehouse_catalog: dict[str, dict[str, tuple[str, bool]]]) -> list[str]:
+    """Add HASH_COLUMN to SCD2 tables that lack it; returns the tables altered."""
+    altered = [
+        table.name for table in STAR_TABLES
+        if table.scd2 and table.name in warehouse_catalog and HASH_COLUMN not in warehouse_catalog[table.name]
+    ]
+    if altered:
+        with conn.cursor() as cur:
+            for name in altered:
+                cur.execute(HASH_DDL.format(table=name))
+    return altered
+
+
+def backfill_hashes(conn: Any, plan: TablePlan) -> int:
+    """Hash the rows an SCD2 table already holds, so they are compared rather than treated as changed."""
+    table = plan.table
+    with conn.cursor() as cur:
+        cur.execute(
+            f"""
+            UPDATE warehouse.{table.name} d
+            SET {HASH_COLUMN} = {scd2_hash_sql("d", plan.hash_columns, dict(plan.hash_columns))}
+            WHERE d.{HASH_COLUMN} IS NULL
+            """
+        )
+        return cur.rowcount
+
+
+def ensure_state_table(conn: Any) -> None:
+    with conn.cursor() as cur:
+        cur.execute(STATE_DDL)
+    conn.commit()
+
+
+def load_state(conn: Any) -> dict[str, Any]:
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT target_table, high_water_loaded_at FROM {STATE_TABLE}")
+        marks = dict(cur.fetchall())
+    conn.commit()
+    return marks
+
+
+# ----------------------------
+# SET-BASED MERGES
+# ----------------------------
+def increment_filter(since: Any) -> tuple[str, tuple]:
+    """Rows after ``since``, less WAREHOUSE_LOAD_LAG for staging transactions that committed late."""
+    where = "NOT COALESCE(s.is_dirty, FALSE)"
+    if since is None:
+        return where, ()
+    return f"{where} AND s.loaded_at > %s", (since - WAREHOUSE_LOAD_LAG,)
+
+
+def stage_increment(cur: Any, plan: TablePlan, since: Any) -> str:
+    """Copy the table's new staging rows, newest per natural key, into a temp table; returns its name."""
+    table = plan.table
+    temp_table = f"wh_stage_{table.name}"
+    select_list = ", ".join(
+        f"({expression})::{data_type} AS {quote_ident(column, cur)}" if data_type else f"({expression}) AS {quote_ident(column, cur)}"
+        for column, (expression, data_type) in plan.staged.items()
+    )
+    natural_key = quote_ident(table.natural_key, cur)
+    where, params = increment_filter(since)
+    row_hash = ""
+    if plan.hash_columns:
+        staged_types = {column: data_type for column, (_, data_type) in plan.staged.items() if data_type}
+        row_hash = f", {scd2_hash_sql('x', plan.hash_columns, staged_types)} AS {HASH_COLUMN}"
+    cur.execute(f"DROP TABLE IF EXISTS pg_temp.{temp_table}")
+    cur.execute(
+        f"""
+        CREATE TEMP TABLE {temp_table} ON COMMIT DROP AS
+        SELECT DISTINCT ON (x.{natural_key}) *{row_hash}
+        FROM (
+            SELECT {select_list}, s.loaded_at AS etl_loaded_at
+            FROM staging.{table.source} s
+            WHERE {where}
+        ) x
+        WHERE x.{natural_key} IS NOT NULL
+        ORDER BY x.{natural_key}, x.etl_loaded_at DESC
+        """,
+        params,
+    )
+    cur.execute(f"ANALYZE {temp_table}")
+    return temp_table
+
+
+def dimension_source(lookup: Lookup) -> DimensionSource | None:
+    """The key map a lookup reads from the resolver; lookups into fact tables are left to SQL."""
+    if not lookup.dimension.startswith("dim_"):
+        return None
+    return DimensionSource(lookup.dimension, lookup.natural_column, lookup.dimension_key, lookup.current_only)
+
+
+def lookup_source(cur: Any, lookup: Lookup) -> str:
+    source = f"t.{quote_ident(lookup.source, cur)}"
+    return f"{source}::date" if lookup.dimension == "dim_date" else source
+
+
+def resolved_keys_join(cur: Any, lookup: Lookup, alias: str, plan: TablePlan, temp_table: str, resolver: SurrogateKeyResolver) -> str:
+    """Resolve the batch's distinct natural IDs in memory and join them back through a small temp table."""
+    source = lookup_source(cur, lookup)
+    cur.execute(f"SELECT DISTINCT {source} FROM {temp_table} t WHERE {plan.valid} AND {source} IS NOT NULL")
+    natural_ids = [row[0] for row in cur.fetchall()]
+    keys = resolver.resolve(cur, dimension_source(lookup), natural_ids)
+    found = keys != MISSING_KEY
+    key_table = f"wh_keys_{plan.table.name}_{alias}"
+    natural_type = "date" if lookup.dimension == "dim_date" else "text"
+    cur.execute(f"DROP TABLE IF EXISTS pg_temp.{key_table}")
+    cur.execute(
+        f"""
+        CREATE TEMP TABLE {key_table} ON COMMIT DROP AS
+        SELECT * FROM unnest(%s::{natural_type}[], %s::bigint[]) AS k(natural_id, surrogate_key)
+        """,
+        ([natural_id for natural_id, hit in zip(natural_ids, found) if hit], keys[found].tolist()),
+    )
+    cur.execute(f"ANALYZE {key_table}")
+    return f"LEFT JOIN {key_table} {alias} ON {alias}.natural_id = {source}"
+
+
+def lookup_join(cur: Any, lookup: Lookup, alias: str) -> str:
+    natural = quote_ident(lookup.natural_column, cur)
+    dimension_key = quote_ident(lookup.dimension_key, cur)
+    source = f"t.{quote_ident(lookup.source, cur)}"
+    if lookup.dimension == "dim_date":
+        return f"LEFT JOIN warehouse.dim_date {alias} ON {alias}.{natural} = {source}::date"
+    if lookup.current_only:
+        # SCD2 dimensions can hold several rows per natural key; join the newest current one.
+        return (
+            f"LEFT JOIN (SELECT DISTINCT ON ({natural}) {natural}, {dimension_key} FROM warehouse.{lookup.dimension}"
+            f" WHERE is_current ORDER BY {natural}, {dimension_key} DESC) {alias} ON {alias}.{natural} = {source}"
+        )
+    return f"LEFT JOIN warehouse.{lookup.dimension} {alias} ON {alias}.{natural} = {source}"
+
+
+def merge_increment(cur: Any, plan: TablePlan, temp_table: str, resolver: SurrogateKeyResolver | None = None) -> int:
+    """Insert or update the staged rows with one INSERT ... SELECT ... ON CONFLICT; returns rows written.
+
+    With a ``resolver``, dimension keys come from its in-memory maps instead
+    of joins to the dimension tables.
+    """
+    table = plan.table
+    columns = [quote_ident(column, cur) for column in plan.insert_columns]
+    select_list = [f"t.{column}" for column in columns]
+    joins = []
+    for position, lookup in enumerate(plan.lookups):
+        alias = f"l{position}"
+        columns.append(quote_ident(lookup.key_column, cur))
+        if plan.computed_date_keys and lookup.dimension == "dim_date":
+            select_list.append(date_key_sql(lookup_source(cur, lookup)))
+        elif resolver is not None and dimension_source(lookup) is not None:
+            select_list.append(f"{alias}.surrogate_key")
+            joins.append(resolved_keys_join(cur, lookup, alias, plan, temp_table, resolver))
+        else:
+            select_list.append(f"{alias}.{quote_ident(lookup.dimension_key, cur)}")
+            joins.append(lookup_join(cur, lookup, alias))
+
+    natural_key = quote_ident(table.natural_key, cur)
+    where = plan.valid
+    if table.scd2:
+        # Runs after close_changed_versions: members without a current row are
+        # new, or had their current row closed, and get a version here.
+        where += (
+            f" AND NOT EXISTS (SELECT 1 FROM warehouse.{table.name} d"
+            f" WHERE d.{natural_key} = t.{natural_key} AND d.is_current)"
+        )
+        # A member with history starts its new version on the day staging received the change.
+        select_list[columns.index('"effective_date"')] = (
+            f"CASE WHEN EXISTS (SELECT 1 FROM warehouse.{table.name} h WHERE h.{natural_key} = t.{natural_key})"
+            " THEN t.etl_loaded_at::date ELSE t.effective_date END"
+        )
+        conflict = "ON CONFLICT DO NOTHING"
+    else:
+        updates = ", ".join(f"{column} = EXCLUDED.{column}" for column in columns if column != natural_key)
+        conflict = f"ON CONFLICT ({natural_key}) DO UPDATE SET {updates}"
+
+    cur.execute(
+        f"""
+        INSERT INTO warehouse.{table.name} ({', '.join(columns)})
+        SELECT {', '.join(select_list)}
+        FROM {temp_table} t
+        {' '.join(joins)}
+        WHERE {where}
+        {conflict}
+        """
+    )
+    return cur.rowcount
+
+
+def close_changed_versions(cur: Any, plan: TablePlan, temp_table: str) -> tuple[int, int]:
+    """Compare staged hashes with the current rows in one UPDATE; returns (closed, overwritten).
+
+    A current row whose hash differs is closed: ``is_current`` becomes false
+    and ``expiry_date`` the day before the change date (the staging
+    ``loaded_at`` day). ``merge_increment`` then inserts the new version.
+    A current row that already starts on or after the change date would make
+    a zero-length version, so it takes the new attributes in place instead.
+    """
+    table = plan.table
+    natural_key = quote_ident(table.natural_key, cur)
+    in_place = "d.effective_date >= c.change_date"
+    attributes = [
+        quote_ident(column, cur) for column in plan.insert_columns
+        if column != table.natural_key and column not in SCD2_BOOKKEEPING_COLUMNS
+    ] + [HASH_COLUMN]
+    assignments = ",\n".join(
+        f"{column} = CASE WHEN {in_place} THEN c.{column} ELSE d.{column} END" for column in attributes
+    )
+    cur.execute(
+        f"""
+        WITH changed AS (
+            UPDATE warehouse.{table.name} d
+            SET
+                is_current = {in_place},
+                expiry_date = CASE WHEN {in_place} THEN NULL ELSE c.change_date - 1 END,
+                {assignments}
+            FROM (SELECT t.*, t.etl_loaded_at::date AS change_date FROM {temp_table} t WHERE {plan.valid}) c
+            WHERE d.{natural_key} = c.{natural_key}
+            AND d.is_current
+            AND d.{HASH_COLUMN} IS DISTINCT FROM c.{HASH_COLUMN}
+            RETURNING d.is_current
+        )
+        SELECT count(*) FILTER (WHERE NOT is_current), count(*) FILTER (WHERE is_current) FROM changed
+        """
+    )
+    return cur.fetchone()
+
+
+def load_table(conn_string: str, plan: TablePlan, since: Any, resolver: SurrogateKeyResolver | None = None) -> dict[str, Any]:
+    """Stage, merge, and advance the mark for one table in a single transaction."""
+    table = plan.table
+    started_at = perf_counter()
+    conn = psycopg2.connect(conn_string)
+    try:
+        with conn.cursor() as cur:
+            temp_table = stage_increment(cur, plan, since)
+            cur.execute(f"SELECT count(*), count(*) FILTER (WHERE NOT ({plan.valid})), max(etl_loaded_at) FROM {temp_table} t")
+            rows_staged, rows_rejected, high_water = cur.fetchone()
+            rows_closed = rows_overwritten = 0
+            if rows_staged and table.scd2:
+                rows_closed, rows_overwritten = close_changed_versions(cur, plan, temp_table)
+            rows_loaded = merge_increment(cur, plan, temp_table, resolver) if rows_staged else 0
+            if high_water is not None:
+                cur.execute(STATE_UPSERT_SQL, (table.name, table.source, high_water, rows_loaded))
+        conn.commit()
+        if rows_loaded and table.name in LOOKUP_TARGETS:
+            # Fresh statistics let the next level's lookups plan hash joins instead of nested loops.
+            with conn.cursor() as cur:
+                cur.execute(f"ANALYZE warehouse.{table.name}")
+            conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    result = {
+        "table": table.name,
+        "source": table.source,
+        "rows_staged": rows_staged,
+        "rows_loaded": rows_loaded,
+        "rows_rejected": rows_rejected,
+        "processing_time_seconds": round(perf_counter() - started_at, 3),
+        "error": None,
+    }
+    if table.scd2:
+        result["versions_closed"] = rows_closed
+        result["versions_updated_in_place"] = rows_overwritten
+    LOGGER.info(
+        "Warehouse table loaded | table=%s | source=%s | rows_staged=%s | rows_loaded=%s | rows_rejected=%s | versions_closed=%s | processing_time_seconds=%s",
+        table.name,
+        table.source,
+        rows_staged,
+        rows_loaded,
+        rows_rejected,
+        rows_closed,
+        result["processing_time_seconds"],
+    )
+    return result
+
+
+def date_sources(plans: dict[str, TablePlan], marks: dict[str, Any]) -> tuple[list[str], list[Any]]:
+    """One SELECT of new dates per fact date lookup, filtered by that fact's own mark."""
+    selects: list[str] = []
+    params: list[Any] = []
+    for plan in plans.values():
+        for lookup in plan.lookups:
+            if lookup.dimension != "dim_date":
+                continue
+            expression, _ = plan.staged[lookup.source]
+            where, where_params = increment_filter(marks.get(plan.table.name))
+            selects.append(f"SELECT ({expression})::date AS date_actual FROM staging.{plan.table.source} s WHERE {where}")
+            params.extend(where_params)
+    return selects, params
+
+
+def load_dim_date(conn_string: str, plans: dict[str, TablePlan], marks: dict[str, Any]) -> dict[str, Any]:
+    """Extend the calendar to cover the configured range and every date the pending fact rows refer to."""
+    started_at = perf_counter()
+    selects, params = date_sources(plans, marks)
+    rows_loaded = 0
+    conn = psycopg2.connect(conn_string)
+    try:
+        first, last = WAREHOUSE_CALENDAR_START, WAREHOUSE_CALENDAR_END
+        if selects:
+            with conn.cursor() as cur:
+                cur.execute(f"SELECT min(date_actual), max(date_actual) FROM ({' UNION ALL '.join(selects)}) dates", params)
+                pending_first, pending_last = cur.fetchone()
+            if pending_first is not None:
+                first, last = min(first, pending_first), max(last, pending_last)
+        rows_loaded = extend_calendar(conn, first, last)
+        conn.commit()
+        if rows_loaded:
+            with conn.cursor() as cur:
+                cur.execute("ANALYZE warehouse.dim_date")
+            conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    result = {
+        "table": "dim_date",
+        "source": None,
+        "rows_staged": rows_loaded,
+        "rows_loaded": rows_loaded,
+        "rows_rejected": 0,
+        "processing_time_seconds": round(perf_counter() - started_at, 3),
+        "error": None,
+    }
+    LOGGER.info(
+        "Warehouse table loaded | table=dim_date | calendar_start=%s | calendar_end=%s | rows_loaded=%s | processing_time_seconds=%s",
+        first,
+        last,
+        rows_loaded,
+        result["processing_time_seconds"],
+    )
+    return result
+
+
+def run_step(
+    name: str,
+    conn_string: str,
+    plans: dict[str, TablePlan],
+    marks: dict[str, Any],
+    resolver: SurrogateKeyResolver | None = None,
+) -> dict[str, Any]:
+    try:
+        if name == "dim_date":
+            return load_dim_date(conn_string, plans, marks)
+        return load_table(conn_string, plans[name], marks.get(name), resolver)
+    except Exception as exc:
+        LOGGER.exception("Warehouse table failed | table=%s | error=%s", name, exc)
+        return {"table": name, "rows_loaded": 0, "error": str(exc)}
+
+
+# ----------------------------
+# STAR SCHEMA LOAD
+# ----------------------------
+def load_star_schema(
+    conn_string: str,
+    workers: int = WAREHOUSE_LOAD_WORKERS,
+    full: bool = False,
+    key_cache_entries: int = WAREHOUSE_KEY_CACHE_ENTRIES,
+) -> dict[str, Any]:
+    """Promote new staging rows into every warehouse table, dimensions before facts.
+
+    With ``key_cache_entries``, fact surrogate keys are resolved from
+    in-memory dimension maps of that many entries each. The maps are loaded
+    once at the start and refreshed after every level that added rows.
+    """
+    started_at = perf_counter()
+    summary: dict[str, Any] = {
+        "pipeline_name": "automotive_finance_pipeline",
+        "stage": "warehouse_load",
+        "tables_loaded": 0,
+        "rows_loaded": 0,
+        "processing_time_seconds": 0.0,
+        "tables": [],
+        "errors": [],
+    }
+
+    conn = psycopg2.connect(conn_string)
+    try:
+        staging_catalog = fetch_catalog(conn, "staging")
+        if ensure_loaded_at_columns(conn, staging_catalog, [table.source for table in STAR_TABLES]):
+            conn.commit()
+            staging_catalog = fetch_catalog(conn, "staging")
+        warehouse_catalog = fetch_warehouse_columns(conn)
+        hashed_tables = ensure_hash_columns(conn, warehouse_catalog)
+        if hashed_tables:
+            warehouse_catalog = fetch_warehouse_columns(conn)
+        conn.commit()
+        ensure_state_table(conn)
+        marks = {} if full else load_state(conn)
+
+        plans: dict[str, TablePlan] = {}
+        for table in STAR_TABLES:
+            if table.source not in staging_catalog or table.name not in warehouse_catalog:
+                summary["errors"].append({"table": table.name, "error": f"staging.{table.source} or warehouse.{table.name} does not exist"})
+                continue
+            try:
+                plans[table.name] = plan_table(table, staging_catalog[table.source]["columns"], warehouse_catalog[table.name])
+            except ValueError as exc:
+                summary["errors"].append({"table": table.name, "error": str(exc)})
+                continue
+            if table.name in hashed_tables:
+                LOGGER.info("Attribute hashes backfilled | table=%s | rows=%s", table.name, backfill_hashes(conn, plans[table.name]))
+        conn.commit()
+
+        if has_deterministic_keys(conn):
+            for plan in plans.values():
+                plan.computed_date_keys = True
+        else:
+            LOGGER.warning("dim_date holds keys other than yyyymmdd; date keys are resolved by joins")
+        conn.commit()
+
+        resolver = None
+        if key_cache_entries:
+            resolver = SurrogateKeyResolver(key_cache_entries)
+            for plan in plans.values():
+                for lookup in plan.lookups:
+                    if dimension_source(lookup) is not None and not (plan.computed_date_keys and lookup.dimension == "dim_date"):
+                        resolver.register(dimension_source(lookup))
+            resolver.load(conn)
+    finally:
+        conn.close()
+
+    failed = {item["table"] for item in summary["errors"]}
+    pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="warehouse-load")
+    try:
+        for level in dependency_levels(STAR_TABLES):
+            runnable = []
+            for name in level:
+                if name in failed:
+                    continue
+                blocked = table_dependencies(STAR_TABLES_BY_NAME[name]) & failed if name != "dim_date" else set()
+                if blocked:
+                    failed.add(name)
+                    summary["errors"].append({"table": name, "error": f"skipped because {sorted(blocked)} failed"})
+                    continue
+                runnable.append(name)
+            grown = []
+            for result in pool.map(lambda name: run_step(name, conn_string, plans, marks, resolver), runnable):
+                summary["tables"].append(result)
+                if result["error"]:
+                    failed.add(result["table"])
+                    summary["errors"].append({"table": result["table"], "error": result["error"]})
+                else:
+                    summary["tables_loaded"] += 1
+                    summary["rows_loaded"] += result["rows_loaded"]
+                    if result["rows_loaded"]:
+                        grown.append(result["table"])
+            if resolver is not None and grown:
+                conn = psycopg2.connect(conn_string)
+                try:
+                    resolver.refresh(conn, grown)
+                finally:
+                    conn.close()
+    finally:
+        pool.shutdown(wait=True)
+
+    if resolver is not None:
+        summary["key_cache"] = resolver.stats()
+
+    summary["processing_time_seconds"] = round(perf_counter() - started_at, 2)
+    return summary
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Promote staging rows into the warehouse star schema")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="ignore the stored load marks and re-merge every staging row",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    LOGGER.info("Warehouse load start | stage=warehouse_load | workers=%s | full=%s", WAREHOUSE_LOAD_WORKERS, args.full)
+    summary = load_star_schema(WAREHOUSE_CONN, WAREHOUSE_LOAD_WORKERS, args.full)
+    LOGGER.info(
+        "Warehouse load completion | stage=warehouse_load | tables_loaded=%s | rows_loaded=%s | processing_time_seconds=%.2f | errors=%s",
+        summary["tables_loaded"],
+        summary["rows_loaded"],
+        summary["processing_time_seconds"],
+        len(summary["errors"]),
+    )
+    print(f"ETL_SUMMARY::{json.dumps(summary)}")
+
+    if summary["errors"]:
+        raise RuntimeError(
+            "Warehouse load failed: " + "; ".join(f"{item['table']}: {item['error']}" for item in summary["errors"])
+        )
+
+
+if __name__ == "__main__":
+    main()
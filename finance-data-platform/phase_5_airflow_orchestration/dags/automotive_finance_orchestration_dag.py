@@ -74,12 +74,19 @@ AIRFLOW_HOME = os.getenv("AIRFLOW_HOME", "/opt/airflow")
 PROJECT_ROOT = os.getenv("PIPELINE_PROJECT_ROOT", "/opt/airflow/project")
 PHASE_3_SCRIPT = os.path.join(PROJECT_ROOT, "phase_3_shell_ingestion", "ingest.py")
 PHASE_4_SCRIPT = os.path.join(PROJECT_ROOT, "phase_4_python_etl", "etl_main.py")
+PHASE_4_WAREHOUSE_SCRIPT = os.path.join(PROJECT_ROOT, "phase_4_python_etl", "warehouse_loader.py")
 PHASE_8_PIPELINE_METRICS_SQL = os.path.join(
     PROJECT_ROOT,
     "phase_8_monitoring_logging",
     "sql",
     "create_pipeline_metrics_table.sql",
 )
+PHASE_8_PIPELINE_STAGE_METRICS_SQL = os.path.join(
+    PROJECT_ROOT,
+    "phase_8_monitoring_logging",
+    "sql",
+    "create_pipeline_stage_metrics_table.sql",
+)
 PIPELINE_NAME = "automotive_finance_pipeline"
 
 AWS_REGION = get_env_value(
@@ -160,13 +167,15 @@ def get_warehouse_connection() -> Any:
 
 
 def ensure_pipeline_metrics_table() -> None:
-    sql_path = Path(PHASE_8_PIPELINE_METRICS_SQL)
-    if not sql_path.exists():
-        raise AirflowException(f"Pipeline metrics SQL file not found: {sql_path}")
+    sql_paths = [Path(PHASE_8_PIPELINE_METRICS_SQL), Path(PHASE_8_PIPELINE_STAGE_METRICS_SQL)]
+    for sql_path in sql_paths:
+        if not sql_path.exists():
+            raise AirflowException(f"Pipeline metrics SQL file not found: {sql_path}")
 
     with get_warehouse_connection() as conn:
         with conn.cursor() as cursor:
-            cursor.execute(sql_path.read_text(encoding="utf-8"))
+            for sql_path in sql_paths:
+                cursor.execute(sql_path.read_text(encoding="utf-8"))
         conn.commit()
 
 
@@ -205,6 +214,7 @@ def collect_pipeline_metrics_payload(context: Any, status: str) -> dict[str, Any
         "processing_time_seconds": compute_dag_processing_time_seconds(context),
         "status": status,
         "run_timestamp": context["logical_date"],
+        "stage_metrics": phase_4_summary.get("stage_metrics") or {},
     }
 
 
@@ -241,9 +251,48 @@ def persist_pipeline_metrics(context: Any, status: str) -> dict[str, Any]:
                     payload["run_timestamp"],
                 ),
             )
+            cursor.execute(
+                "DELETE FROM pipeline_stage_metrics WHERE dag_id = %s AND run_timestamp = %s",
+                (payload["dag_id"], payload["run_timestamp"]),
+            )
+            if payload["stage_metrics"]:
+                cursor.executemany(
+                    """
+                    INSERT INTO pipeline_stage_metrics (
+                        pipeline_name,
+                        dag_id,
+                        run_timestamp,
+                        stage,
+                        calls,
+                        wall_seconds,
+                        cpu_seconds,
+                        peak_rss_delta_bytes,
+                        rows_in,
+                        rows_out,
+                        bytes_read
+                    )
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                    """,
+                    [
+                        (
+                            payload["pipeline_name"],
+                            payload["dag_id"],
+                            payload["run_timestamp"],
+                            stage,
+                            int(metrics.get("calls") or 0),
+                            float(metrics.get("wall_seconds") or 0),
+                            float(metrics.get("cpu_seconds") or 0),
+                            int(metrics.get("peak_rss_delta_bytes") or 0),
+                            int(metrics.get("rows_in") or 0),
+                            int(metrics.get("rows_out") or 0),
+                            int(metrics.get("bytes_read") or 0),
+                        )
+                        for stage, metrics in payload["stage_metrics"].items()
+                    ],
+                )
         conn.commit()
 
-    LOGGER.info("Pipeline metrics stored | status=%s | files_processed=%s | rows_loaded=%s | processing_time_seconds=%.2f", payload["status"], payload["files_processed"], payload["rows_loaded"], payload["processing_time_seconds"])
+    LOGGER.info("Pipeline metrics stored | status=%s | files_processed=%s | rows_loaded=%s | processing_time_seconds=%.2f | stages=%s", payload["status"], payload["files_processed"], payload["rows_loaded"], payload["processing_time_seconds"], len(payload["stage_metrics"]))
     return payload
 
 
@@ -491,6 +540,7 @@ def run_phase_4_etl(**context: Any) -> dict[str, Any]:
         extra_env={
             "STAGING_BUCKET": S3_STAGING_BUCKET or "",
             "CURRENT_RUN_STAGING_KEYS": json.dumps(staging_keys),
+            "ETL_RUN_ID": str(context.get("run_id") or ""),
         },
     )
     summary = script_result.get("summary") or {}
@@ -503,6 +553,20 @@ def run_phase_4_etl(**context: Any) -> dict[str, Any]:
     }
 
 
+def run_warehouse_load(**context: Any) -> dict[str, Any]:
+    # Incremental on staging load timestamps, so it also runs when Phase 4 had no files:
+    # rows left behind by an earlier failed promotion are picked up here.
+    script_result = run_python_script(PHASE_4_WAREHOUSE_SCRIPT, "Phase 4 warehouse load")
+    summary = script_result.get("summary") or {}
+    return {
+        "status": "success",
+        "tables_loaded": summary.get("tables_loaded", 0),
+        "rows_loaded": summary.get("rows_loaded", 0),
+        "script_result": script_result,
+        "summary": summary,
+    }
+
+
 def archive_processed_staging_files(**context: Any) -> dict[str, Any]:
     staging_keys = context["task_instance"].xcom_pull(
         task_ids="run_phase_3_shell_ingestion",
@@ -600,6 +664,7 @@ def send_phase_5_airflow_notification(**context: Any) -> dict[str, Any]:
     raw_files = context["task_instance"].xcom_pull(task_ids="monitor_raw_bucket", key="raw_files") or []
     phase_3_result = context["task_instance"].xcom_pull(task_ids="run_phase_3_shell_ingestion") or {}
     phase_4_result = context["task_instance"].xcom_pull(task_ids="run_phase_4_etl") or {}
+    warehouse_result = context["task_instance"].xcom_pull(task_ids="run_warehouse_load") or {}
     archive_result = context["task_instance"].xcom_pull(task_ids="archive_processed_staging_files") or {}
     dag_duration_seconds = compute_dag_processing_time_seconds(context)
 
@@ -614,6 +679,7 @@ def send_phase_5_airflow_notification(**context: Any) -> dict[str, Any]:
         f"Raw files detected: {len(raw_files)}\n"
         f"Phase 3 status: {phase_3_result.get('status', 'unknown')}\n"
         f"Phase 4 status: {phase_4_result.get('status', 'unknown')}\n"
+        f"Warehouse rows loaded: {warehouse_result.get('rows_loaded', 0)}\n"
         f"Archived files: {archive_result.get('archived_count', 0)}\n\n"
         f"Processing time (seconds): {dag_duration_seconds}\n\n"
         "Flow executed:\n"
@@ -621,8 +687,9 @@ def send_phase_5_airflow_notification(**context: Any) -> dict[str, Any]:
         "2. Phase 3 shell ingestion moved data from raw to staging\n"
         "3. Phase 3 notifications were handled by the shell ingestion step\n"
         "4. Phase 4 ETL processed files from staging\n"
-        "5. Airflow archived the processed staging files\n"
-        "6. Phase 5 Airflow notification sent\n"
+        "5. Phase 4 warehouse load promoted staging rows into the star schema\n"
+        "6. Airflow archived the processed staging files\n"
+        "7. Phase 5 Airflow notification sent\n"
     )
 
     send_email("Automotive Finance Orchestration Complete", email_body)
@@ -633,6 +700,7 @@ def send_phase_5_airflow_notification(**context: Any) -> dict[str, Any]:
             {"title": "Raw files", "value": str(len(raw_files))},
             {"title": "Phase 3", "value": str(phase_3_result.get("status", "unknown"))},
             {"title": "Phase 4", "value": str(phase_4_result.get("status", "unknown"))},
+            {"title": "Warehouse rows", "value": str(warehouse_result.get("rows_loaded", 0))},
             {"title": "Archived", "value": str(archive_result.get("archived_count", 0))},
             {"title": "Duration", "value": f"{dag_duration_seconds} seconds"},
         ],
@@ -647,6 +715,7 @@ def send_phase_5_airflow_notification(**context: Any) -> dict[str, Any]:
             "raw_files": len(raw_files),
             "phase_3": phase_3_result.get("status", "unknown"),
             "phase_4": phase_4_result.get("status", "unknown"),
+            "warehouse_load": warehouse_result.get("status", "unknown"),
             "archived_count": archive_result.get("archived_count", 0),
             "processing_time_seconds": dag_duration_seconds,
         },
@@ -691,6 +760,11 @@ with DAG(
         python_callable=run_phase_4_etl,
     )
 
+    warehouse_load = PythonOperator(
+        task_id="run_warehouse_load",
+        python_callable=run_warehouse_load,
+    )
+
     archive_processed = PythonOperator(
         task_id="archive_processed_staging_files",
         python_callable=archive_processed_staging_files,
@@ -701,4 +775,4 @@ with DAG(
         python_callable=send_phase_5_airflow_notification,
     )
 
-    monitor_raw >> phase_3_shell_ingestion >> phase_4_etl >> archive_processed >> phase_5_notification
\ No newline at end of file
+    monitor_raw >> phase_3_shell_ingestion >> phase_4_etl >> warehouse_load >> archive_processed >> phase_5_notification
\ No newline at end of file
@@ -45,13 +45,14 @@ def log_quality_metrics(
     metrics: dict[str, Any],
 ) -> None:
     logger.info(
-        "Data quality metrics | file_name=%s | file_type=%s | table_name=%s | row_count=%s | total_null_values=%s | duplicate_records=%s | schema_valid=%s | missing_required_columns=%s | validation_errors=%s",
+        "Data quality metrics | file_name=%s | file_type=%s | table_name=%s | row_count=%s | total_null_values=%s | duplicate_records=%s | duplicate_key_records=%s | schema_valid=%s | missing_required_columns=%s | validation_errors=%s",
         file_name,
         file_type,
         table_name,
         metrics.get("row_count", 0),
         metrics.get("total_null_values", 0),
         metrics.get("duplicate_records", 0),
+        metrics.get("duplicate_key_records", 0),
         metrics.get("schema_validation", {}).get("is_valid", False),
         metrics.get("schema_validation", {}).get("missing_required_columns", []),
         metrics.get("validation_errors", []),
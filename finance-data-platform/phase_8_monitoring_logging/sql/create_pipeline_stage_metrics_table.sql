@@ -0,0 +1,20 @@
+CREATE TABLE IF NOT EXISTS pipeline_stage_metrics (
+    id BIGSERIAL PRIMARY KEY,
+    pipeline_name VARCHAR(255) NOT NULL,
+    dag_id VARCHAR(255) NOT NULL,
+    run_timestamp TIMESTAMP NOT NULL,
+    stage VARCHAR(50) NOT NULL,
+    calls INTEGER NOT NULL DEFAULT 0,
+    wall_seconds NUMERIC(12, 4) NOT NULL DEFAULT 0,
+    cpu_seconds NUMERIC(12, 4) NOT NULL DEFAULT 0,
+    peak_rss_delta_bytes BIGINT NOT NULL DEFAULT 0,
+    rows_in BIGINT NOT NULL DEFAULT 0,
+    rows_out BIGINT NOT NULL DEFAULT 0,
+    bytes_read BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS idx_pipeline_stage_metrics_run
+    ON pipeline_stage_metrics (dag_id, run_timestamp);
+
+CREATE INDEX IF NOT EXISTS idx_pipeline_stage_metrics_stage
+    ON pipeline_stage_metrics (stage, run_timestamp DESC);
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""Benchmark of the extract-time dtype plan: frame memory, peak RSS, and time through the prepare path."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from pathlib import Path
+import resource
+import subprocess
+import sys
+import tempfile
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+# Staging column types as information_schema reports them (staging_schema.sql).
+COLUMN_TYPES = {
+    "stg_telemetry": {
+        "telemetry_id": "character varying",
+        "vehicle_id": "character varying",
+        "timestamp": "timestamp without time zone",
+        "sensor_type": "character varying",
+        "sensor_value": "character varying",
+        "location": "character varying",
+    },
+    "stg_payments": {
+        "payment_id": "character varying",
+        "sale_id": "character varying",
+        "customer_id": "character varying",
+        "payment_date": "timestamp without time zone",
+        "amount": "numeric",
+        "payment_method": "character varying",
+        "status": "character varying",
+    },
+    "stg_customers": {
+        "customer_id": "character varying",
+        "first_name": "character varying",
+        "last_name": "character varying",
+        "email": "character varying",
+        "city": "character varying",
+        "state": "character varying",
+        "date_of_birth": "date",
+        "created_at": "timestamp without time zone",
+    },
+}
+
+
+def build_frame(table_key: str, rows: int, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    ids = np.arange(rows).astype(str)
+    stamps = (pd.Timestamp("2026-01-01") + pd.to_timedelta(rng.integers(0, 86_400 * 365, rows), unit="s")).strftime("%Y-%m-%d %H:%M:%S")
+    if table_key == "stg_telemetry":
+        return pd.DataFrame({
+            "telemetry_id": np.char.add("TEL", ids),
+            "vehicle_id": np.char.add("VEH", rng.integers(0, 5_000, rows).astype(str)),
+            "timestamp": stamps,
+            "sensor_type": rng.choice(["speed", "fuel_level", "engine_temperature"], rows),
+            "sensor_value": rng.integers(0, 180, rows),
+            "location": rng.choice(["Johannesburg", "Cape Town", "Durban", "Pretoria"], rows),
+        })
+    if table_key == "stg_payments":
+        return pd.DataFrame({
+            "payment_id": np.char.add("PAY", ids),
+            "sale_id": np.char.add("SALE", ids),
+            "customer_id": np.char.add("CUST", rng.integers(0, 50_000, rows).astype(str)),
+            "payment_date": stamps,
+            "amount": rng.integers(1_000, 500_000, rows) / 100,
+            "payment_method": rng.choice(["Credit Card", "Debit Card", "Cash", "Bank Transfer", "Financing"], rows),
+            "status": rng.choice(["completed", "pending", "failed"], rows),
+        })
+    births = (pd.Timestamp("1950-01-01") + pd.to_timedelta(rng.integers(0, 365 * 50, rows), unit="D")).strftime("%Y-%m-%d")
+    return pd.DataFrame({
+        "customer_id": np.char.add("CUST", ids),
+        "first_name": rng.choice(["Thabo", "Lerato", "Sipho", "Naledi", "Anele"], rows),
+        "last_name": rng.choice(["Mokoena", "Naidoo", "Dlamini", "van der Merwe"], rows),
+        "email": np.char.add(np.char.add("user", ids), "@example.com"),
+        "city": rng.choice(["Johannesburg", "Cape Town", "Durban", "Pretoria", "Gqeberha"], rows),
+        "state": rng.choice(["Gauteng", "Western Cape", "KwaZulu-Natal", "Eastern Cape"], rows),
+        "date_of_birth": births,
+        "created_at": stamps,
+    })
+
+
+def peak_rss_bytes() -> int:
+    # Linux carries ru_maxrss over from the parent across exec, so read this
+    # process's own high-water mark there; ru_maxrss is in bytes on macOS.
+    status = Path("/proc/self/status")
+    if status.exists():
+        for line in status.read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) * 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def run_prepare(path: str, table_key: str, plan: bool) -> dict:
+    """Child process: the prepare_file stages on one CSV, with the dtype plan on or off."""
+    os.environ["ETL_DTYPE_PLAN"] = "true" if plan else "false"
+    os.environ.setdefault("WAREHOUSE_CONN", "offline")
+    from phase_4_python_etl import etl_main
+    from phase_4_python_etl.categorical_validation import CategoricalReport
+    from phase_4_python_etl.file_readers import read_csv
+
+    column_types = COLUMN_TYPES[table_key]
+    baseline = peak_rss_bytes()
+    started_at = perf_counter()
+    with open(path, "rb") as body:
+        raw_df = read_csv(body)
+    df, report = etl_main.plan_dtypes(etl_main.normalize_column_aliases(raw_df, table_key), table_key, column_types)
+    del raw_df
+    frame_bytes = int(df.memory_usage(deep=True).sum())
+    _, duplicate_rows = etl_main.evaluate_data_quality(df, table_key, list(column_types))
+    transformed = etl_main.transform(df, table_key, CategoricalReport(), duplicate_rows)
+    coerced = etl_main.coerce_to_column_types(transformed, column_types)
+    etl_main.encode_copy_rows(coerced.iloc[:etl_main.COPY_BATCH_ROWS])
+    return {
+        "seconds": perf_counter() - started_at,
+        "peak_rss_growth": peak_rss_bytes() - baseline,
+        "frame_bytes": frame_bytes,
+        "bytes_saved": report.bytes_saved,
+    }
+
+
+def measure(path: str, table_key: str, plan: bool) -> dict:
+    # A fresh process per run, so each peak RSS starts from the same baseline.
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", path, table_key, "on" if plan else "off"],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="rows in each synthetic staging file")
+    parser.add_argument("--tables", nargs="+", default=list(COLUMN_TYPES), choices=list(COLUMN_TYPES))
+    parser.add_argument("--child", nargs=3, metavar=("PATH", "TABLE", "PLAN"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        path, table_key, plan = args.child
+        print(json.dumps(run_prepare(path, table_key, plan == "on")))
+        return 0
+
+    print(f"Extract -> quality -> transform -> coerce on {args.rows:,}-row CSV files (dtype plan off / on)")
+    print(f"{'table':<16}{'frame MB':>18}{'peak RSS MB':>18}{'seconds':>16}  bytes saved")
+    with tempfile.TemporaryDirectory() as directory:
+        for table_key in args.tables:
+            path = str(Path(directory) / f"{table_key}.csv")
+            build_frame(table_key, args.rows).to_csv(path, index=False)
+            off = measure(path, table_key, plan=False)
+            on = measure(path, table_key, plan=True)
+            print(
+                f"{table_key:<16}"
+                f"{off['frame_bytes'] / 2**20:>9.1f} / {on['frame_bytes'] / 2**20:<6.1f}"
+                f"{off['peak_rss_growth'] / 2**20:>9.1f} / {on['peak_rss_growth'] / 2**20:<6.1f}"
+                f"{off['seconds']:>8.2f} / {on['seconds']:<5.2f}"
+                f"  {on['bytes_saved']:,}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
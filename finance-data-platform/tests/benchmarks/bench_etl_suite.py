@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""Offline micro-benchmarks of the Phase 4 hot functions, with JSON baselines and regression checks.
+
+    python tests/benchmarks/bench_etl_suite.py run --output baseline.json
+    python tests/benchmarks/bench_etl_suite.py run --baseline baseline.json
+    python tests/benchmarks/bench_etl_suite.py compare baseline.json current.json
+"""
+
+from __future__ import annotations
+
+import argparse
+from datetime import datetime, timezone
+import json
+import logging
+import os
+from pathlib import Path
+import platform
+import re
+import sys
+from time import perf_counter
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+# Nothing here connects to S3 or Postgres; the connection string only has to be set.
+os.environ.setdefault("WAREHOUSE_CONN", "offline")
+
+from phase_4_python_etl import etl_main  # noqa: E402
+from phase_4_python_etl.categorical_validation import CategoricalReport  # noqa: E402
+from phase_4_python_etl.quality_rules import RuleReport  # noqa: E402
+
+STAGING_SCHEMA = PROJECT_ROOT / "phase_1_data_warehouse_design" / "staging_schema.sql"
+FUNCTIONS = ("infer_table", "normalize_column_aliases", "evaluate_data_quality", "transform", "upsert_values")
+DEFAULT_ROWS = (10_000, 100_000, 1_000_000)
+CALIBRATION_ROWS = 200_000
+# Fast functions are run again until this much time has been measured, so
+# their best time is not one lucky or unlucky scheduler slice. Extra runs stop
+# after MAX_RUNS or MAX_EXTRA_SECONDS, counting untimed setup.
+MIN_TIMED_SECONDS = 0.5
+MAX_RUNS = 50
+MAX_EXTRA_SECONDS = 2.0
+
+# Staging DDL types as information_schema reports them, which is what etl_main reads.
+SQL_TYPES = {
+    "VARCHAR": "character varying",
+    "DECIMAL": "numeric",
+    "INT": "integer",
+    "TIMESTAMP": "timestamp without time zone",
+    "DATE": "date",
+    "BOOLEAN": "boolean",
+}
+
+FIRST_NAMES = np.array(["Thabo", "Lerato", "Sipho", "Naledi", "Anele", " Zanele", "Pieter "], dtype=object)
+LAST_NAMES = np.array(["Mokoena", "Naidoo", "Dlamini", "van der Merwe", "Botha"], dtype=object)
+CITIES = np.array(["Johannesburg", "Cape Town", "Durban", "Pretoria", "Gqeberha"], dtype=object)
+STATES = np.array(["Gauteng", "Western Cape", "KwaZulu-Natal", "Eastern Cape"], dtype=object)
+SENSOR_TYPES = np.array(["speed", "fuel_level", "engine_temperature"], dtype=object)
+
+
+# ----------------------------
+# SYNTHETIC FRAMES
+# ----------------------------
+def load_column_types(path: Path = STAGING_SCHEMA) -> dict[str, dict[str, str]]:
+    """Column types of each staging table, read from the staging DDL instead of information_schema."""
+    table_keys = {table_name: table_key for table_key, table_name in etl_main.TABLE_MAP.items()}
+    column_types = {}
+    for table_name, body in re.findall(r"CREATE TABLE (staging_\w+) \((.*?)\n\);", path.read_text(encoding="utf-8"), re.S):
+        if table_name not in table_keys:
+            continue
+        columns = {}
+        for line in body.splitlines():
+            match = re.match(r"\s*(\w+)\s+([A-Z]+)", line)
+            if match:
+                columns[match.group(1)] = SQL_TYPES[match.group(2)]
+        column_types[table_keys[table_name]] = columns
+    return column_types
+
+
+COLUMN_TYPES = load_column_types()
+
+
+def source_column(table_key: str, column: str) -> str:
+    """The name a source file uses for a staging column, so alias renames are part of the run."""
+    for source_name, target_name in etl_main.COLUMN_ALIASES.get(table_key, {}).items():
+        if target_name == column:
+            return source_name
+    return column
+
+
+def with_nulls(values: np.ndarray, rng: np.random.Generator, fraction: float = 0.02) -> np.ndarray:
+    values = values.astype(object)
+    values[rng.random(len(values)) < fraction] = None
+    return values
+
+
+def column_values(table_key: str, column: str, data_type: str, rows: int, rng: np.random.Generator) -> np.ndarray:
+    """Values shaped like the generator output for one column, with the faults the ETL has to handle."""
+    ids = np.arange(rows).astype(str)
+    allowed = {**etl_main.CATEGORICAL_RULES, **etl_main.TABLE_CATEGORICAL_OVERRIDES.get(table_key, {})}
+    if column == "status" and table_key in etl_main.STATUS_MAPS:
+        return rng.choice(np.array(list(etl_main.STATUS_MAPS[table_key]) + ["Unknown"], dtype=object), rows)
+    if column in allowed:
+        return rng.choice(np.array(allowed[column] + ["Unknown", None], dtype=object), rows)
+    if column.endswith("_id"):
+        prefix = column[:-3].upper()[:4]
+        if column == next(iter(COLUMN_TYPES[table_key])):
+            return np.char.add(prefix, ids).astype(object)
+        return with_nulls(np.char.add(prefix, rng.integers(0, 5_000, rows).astype(str)), rng)
+    if "email" in column:
+        return with_nulls(np.char.add(np.char.add(" User", ids), "@Example.com"), rng)
+    if column == "vin":
+        return np.char.add("1HGCM82633A", rng.integers(100_000, 999_999, rows).astype(str)).astype(object)
+    if column == "sensor_value":
+        return with_nulls(rng.normal(80, 25, rows).round(1).astype(str), rng)
+    if column == "sensor_type":
+        return rng.choice(SENSOR_TYPES, rows)
+    if column == "city":
+        return with_nulls(rng.choice(CITIES, rows), rng)
+    if column == "state":
+        return with_nulls(rng.choice(STATES, rows), rng)
+    if data_type == "timestamp without time zone":
+        stamps = pd.Timestamp("2026-01-01") + pd.to_timedelta(rng.integers(0, 86_400 * 365, rows), unit="s")
+        return with_nulls(stamps.strftime("%Y-%m-%d %H:%M:%S").to_numpy(), rng)
+    if data_type == "date":
+        days = pd.Timestamp("1950-01-01") + pd.to_timedelta(rng.integers(0, 365 * 50, rows), unit="D")
+        return with_nulls(days.strftime("%Y-%m-%d").to_numpy(), rng)
+    if data_type == "integer":
+        return rng.integers(2015, 2027, rows) if column == "year" else rng.integers(1, 500, rows)
+    if data_type == "numeric":
+        values = rng.integers(1_000, 5_000_000, rows) / 100
+        values[rng.random(rows) < 0.02] *= -1
+        return values
+    return with_nulls(rng.choice(np.char.add(rng.choice(LAST_NAMES, 64).astype(str), np.arange(64).astype(str)), rows), rng)
+
+
+def build_frame(table_key: str, rows: int, seed: int = 7) -> pd.DataFrame:
+    """A raw extracted frame for ``table_key``: source column names, text dates, nulls, bad values, and 1% repeated rows."""
+    rng = np.random.default_rng(seed)
+    data = {}
+    for column, data_type in COLUMN_TYPES[table_key].items():
+        if column == "is_dirty":
+            continue
+        if table_key == "stg_customers" and column in ("first_name", "last_name"):
+            continue
+        data[source_column(table_key, column)] = column_values(table_key, column, data_type, rows, rng)
+    if table_key == "stg_customers":
+        data["name"] = np.char.add(np.char.add(rng.choice(FIRST_NAMES, rows).astype(str), " "), rng.choice(LAST_NAMES, rows).astype(str)).astype(object)
+    # Each sampled row repeats the one sampled before it.
+    order = np.arange(rows)
+    repeated = rng.choice(rows, rows // 100, replace=False)
+    order[repeated[1:]] = repeated[:-1]
+    return pd.DataFrame(data).take(order).reset_index(drop=True)
+
+
+def build_keys(table_key: str, count: int, seed: int = 7) -> list[str]:
+    """Staging keys in the shapes the ingestion phases write: plain, timestamped, and aliased names."""
+    rng = np.random.default_rng(seed)
+    names = [table_key[len("stg_"):], *etl_main.TABLE_ALIASES.get(table_key, ())]
+    suffixes = ["", "_20260301", "_20260301120000", "_auto", "_consolidated"]
+    extensions = [".csv", ".json", ".xlsx", ".parquet"]
+    return [
+        f"ingested/{names[index % len(names)]}_{index:04d}{suffixes[int(suffix)]}{extensions[int(extension)]}"
+        for index, suffix, extension in zip(range(count), rng.integers(0, len(suffixes), count), rng.integers(0, len(extensions), count))
+    ]
+
+
+# ----------------------------
+# TIMING
+# ----------------------------
+def best_of(func: Callable[[Any], Any], setup: Callable[[], Any], repeat: int) -> tuple[float, Any]:
+    """Best time of ``func(setup())`` over at least ``repeat`` runs; ``setup`` is not timed.
+
+    Runs continue past ``repeat`` until MIN_TIMED_SECONDS have been timed,
+    within MAX_RUNS and MAX_EXTRA_SECONDS.
+    """
+    best = float("inf")
+    timed = 0.0
+    runs = 0
+    result = None
+    deadline = None
+    while True:
+        if runs >= repeat:
+            deadline = deadline or perf_counter() + MAX_EXTRA_SECONDS
+            if timed >= MIN_TIMED_SECONDS or runs >= MAX_RUNS or perf_counter() >= deadline:
+                break
+        argument = setup()
+        started_at = perf_counter()
+        result = func(argument)
+        elapsed = perf_counter() - started_at
+        best = min(best, elapsed)
+        timed += elapsed
+        runs += 1
+    return best, result
+
+
+def encode_upsert_values(df: pd.DataFrame) -> int:
+    """What ``upsert()`` materializes before COPY: the clean staging columns, encoded batch by batch."""
+    encoded = 0
+    for start in range(0, len(df), etl_main.COPY_BATCH_ROWS):
+        encoded += len(etl_main.encode_copy_rows(df.iloc[start:start + etl_main.COPY_BATCH_ROWS]))
+    return encoded
+
+
+def run_table(table_key: str, rows: int, functions: tuple[str, ...], repeat: int) -> dict[str, float]:
+    """Seconds per function for one table and size, each step fed the previous step's output as in prepare_file."""
+    column_types = COLUMN_TYPES[table_key]
+    target_columns = list(column_types)
+    raw = build_frame(table_key, rows)
+    timings = {}
+
+    seconds, normalized = best_of(lambda df: etl_main.normalize_column_aliases(df, table_key), raw.copy, repeat)
+    timings["normalize_column_aliases"] = seconds
+    df, _ = etl_main.plan_dtypes(normalized, table_key, column_types)
+    del raw, normalized
+
+    seconds, (_, duplicate_rows) = best_of(
+        lambda profile: etl_main.evaluate_data_quality(df, table_key, target_columns, profile),
+        lambda: etl_main.new_table_profile(column_types),
+        repeat,
+    )
+    timings["evaluate_data_quality"] = seconds
+
+    seconds, transformed = best_of(
+        lambda frame: etl_main.transform(frame, table_key, CategoricalReport(), duplicate_rows, rule_report=RuleReport()),
+        df.copy,
+        repeat,
+    )
+    timings["transform"] = seconds
+
+    if "upsert_values" in functions:
+        coerced = etl_main.coerce_to_column_types(transformed, column_types)
+        clean = coerced[coerced["is_dirty"] == False] if "is_dirty" in coerced.columns else coerced  # noqa: E712
+        aligned = clean[[column for column in clean.columns if column in column_types]]
+        timings["upsert_values"], _ = best_of(encode_upsert_values, lambda: aligned, repeat)
+    return {function: seconds for function, seconds in timings.items() if function in functions}
+
+
+def calibrate(repeat: int) -> float:
+    """Best time of a fixed workload that uses none of the ETL code: how fast the machine is right now.
+
+    Laptops and shared runners drift by 10-20% between runs (thermal limits,
+    other load), evenly across every function; comparing calibrations takes
+    that drift out of the comparison.
+    """
+    rng = np.random.default_rng(0)
+    text = pd.Series(np.char.add("Key_", rng.integers(0, 50_000, CALIBRATION_ROWS).astype(str)), dtype=object)
+    stamps = pd.Series(pd.Timestamp("2026-01-01") + pd.to_timedelta(rng.integers(0, 86_400 * 365, CALIBRATION_ROWS), unit="s")).dt.strftime("%Y-%m-%d %H:%M:%S")
+    suffix = re.compile(r"_[0-9]{4,14}$")
+
+    def workload(_: Any) -> None:
+        text.str.strip().str.lower()
+        pd.util.hash_pandas_object(text, index=False)
+        pd.to_datetime(stamps, format="%Y-%m-%d %H:%M:%S")
+        [suffix.sub("", key) for key in text.iloc[:CALIBRATION_ROWS // 10]]
+
+    # At least five runs: one slow run here would skew every result of the table.
+    return best_of(workload, lambda: None, max(repeat, 5))[0]
+
+
+def environment() -> dict[str, Any]:
+    """What a result depends on besides the code: interpreter, libraries, machine, and ETL settings."""
+    return {
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "etl_dtype_plan": etl_main.ETL_DTYPE_PLAN,
+        "etl_profile": etl_main.ETL_PROFILE,
+        "etl_quality_rules": os.getenv("ETL_QUALITY_RULES", "default"),
+    }
+
+
+def result_key(table_key: str, function: str, rows: int) -> str:
+    return f"{table_key}/{function}/{rows}"
+
+
+def run_suite(tables: list[str], sizes: list[int], functions: tuple[str, ...], repeat: int, keys: int) -> dict[str, Any]:
+    results = {}
+    calibrations = {}
+    print(f"{'table':<18}{'function':<28}{'rows':>10}{'seconds':>11}{'rows/s':>17}")
+
+    def record(table_key: str, function: str, rows: int, seconds: float) -> None:
+        results[result_key(table_key, function, rows)] = {
+            "seconds": round(seconds, 6),
+            "rows_per_second": round(rows / seconds) if seconds else None,
+        }
+        print(f"{table_key:<18}{function:<28}{rows:>10,}{seconds:>10.4f}s{rows / seconds if seconds else 0:>17,.0f}")
+
+    for table_key in tables:
+        # Calibrated next to the table's own timings, so drift during a long run is tracked too.
+        calibrations[table_key] = calibrate(repeat)
+        if "infer_table" in functions:
+            # infer_table works on keys, not rows, so it runs once per table over ``keys`` keys.
+            table_keys = build_keys(table_key, keys)
+            seconds, _ = best_of(lambda batch: [etl_main.infer_table(key) for key in batch], lambda: table_keys, repeat)
+            record(table_key, "infer_table", keys, seconds)
+        for rows in sizes:
+            for function, seconds in run_table(table_key, rows, functions, repeat).items():
+                record(table_key, function, rows, seconds)
+        calibrations[table_key] = min(calibrations[table_key], calibrate(repeat))
+        print(f"{table_key:<18}{'(calibration workload)':<28}{'':>10}{calibrations[table_key]:>10.4f}s")
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "repeat": repeat,
+        "calibration_seconds": {table_key: round(seconds, 6) for table_key, seconds in calibrations.items()},
+        "environment": environment(),
+        "results": results,
+    }
+
+
+# ----------------------------
+# COMPARE
+# ----------------------------
+def compare_results(
+    baseline: dict[str, Any],
+    current: dict[str, Any],
+    threshold: float,
+    min_seconds: float,
+    calibrated: bool = True,
+) -> int:
+    """Print each shared result against the baseline; returns the number of regressions.
+
+    A result regresses when it is more than ``threshold`` slower and also
+    ``min_seconds`` slower in absolute time, so sub-millisecond timings do not
+    trip the check on scheduler noise alone. With ``calibrated``, each table's
+    current times are first scaled by how much faster or slower the
+    calibration workload ran for that table than in the baseline.
+    """
+    differing = {
+        name: (baseline["environment"].get(name), value)
+        for name, value in current["environment"].items()
+        if baseline["environment"].get(name) != value
+    }
+    for name, (before, after) in differing.items():
+        print(f"warning: {name} differs from the baseline ({before} -> {after}); timings may not be comparable")
+
+    scales = {}
+    if calibrated:
+        before_calibrations = baseline.get("calibration_seconds") or {}
+        scales = {
+            table_key: before_calibrations[table_key] / seconds
+            for table_key, seconds in (current.get("calibration_seconds") or {}).items()
+            if before_calibrations.get(table_key) and seconds
+        }
+        if scales:
+            print(f"current times scaled by the calibration workload: {min(scales.values()):.3f}-{max(scales.values()):.3f} across tables")
+
+    regressions = 0
+    print(f"{'benchmark':<52}{'baseline':>11}{'current':>11}{'change':>9}")
+    for key, result in current["results"].items():
+        before = baseline["results"].get(key)
+        seconds = result["seconds"] * scales.get(key.split("/", 1)[0], 1.0)
+        if before is None:
+            print(f"{key:<52}{'-':>11}{seconds:>10.4f}s{'new':>9}")
+            continue
+        change = seconds / before["seconds"] - 1 if before["seconds"] else 0.0
+        regressed = change > threshold and seconds - before["seconds"] > min_seconds
+        regressions += regressed
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{key:<52}{before['seconds']:>10.4f}s{seconds:>10.4f}s{change:>+9.1%}{flag}")
+    missing = sorted(set(baseline["results"]) - set(current["results"]))
+    if missing:
+        print(f"{len(missing)} baseline result(s) not in this run, e.g. {missing[0]}")
+    print(f"{regressions} regression(s) above {threshold:.0%} (and {min_seconds * 1000:g} ms) over {len(current['results'])} result(s)")
+    return regressions
+
+
+def read_results(path: str) -> dict[str, Any]:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_threshold_arguments(command: argparse.ArgumentParser) -> None:
+        command.add_argument("--threshold", type=float, default=0.15, help="slowdown ratio that counts as a regression (0.15 = 15%%)")
+        command.add_argument("--min-seconds", type=float, default=0.005, help="smallest absolute slowdown that counts as a regression")
+        command.add_argument("--no-calibrate", dest="calibrated", action="store_false", help="compare raw times, without scaling by the calibration workload")
+
+    run = commands.add_parser("run", help="time the hot functions on synthetic frames")
+    run.add_argument("--rows", type=int, nargs="+", default=list(DEFAULT_ROWS), help="frame sizes to time")
+    run.add_argument("--tables", nargs="+", default=list(etl_main.TABLE_MAP), choices=list(etl_main.TABLE_MAP))
+    run.add_argument("--functions", nargs="+", default=list(FUNCTIONS), choices=FUNCTIONS)
+    run.add_argument("--repeat", type=int, default=3, help="best-of-N timing repetitions")
+    run.add_argument("--keys", type=int, default=10_000, help="staging keys per table for infer_table")
+    run.add_argument("--output", help="write the results to this JSON file, to use as a baseline")
+    run.add_argument("--baseline", help="compare the results with this baseline and exit 1 on regressions")
+    add_threshold_arguments(run)
+
+    compare = commands.add_parser("compare", help="compare two result files")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    add_threshold_arguments(compare)
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        return 1 if compare_results(read_results(args.baseline), read_results(args.current), args.threshold, args.min_seconds, args.calibrated) else 0
+
+    # Per-file INFO lines (categorical violations, rule reports) would drown the table.
+    logging.getLogger(etl_main.LOGGER.name).setLevel(logging.WARNING)
+    results = run_suite(args.tables, args.rows, tuple(args.functions), args.repeat, args.keys)
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"results written to {args.output}")
+    if args.baseline:
+        return 1 if compare_results(read_results(args.baseline), results, args.threshold, args.min_seconds, args.calibrated) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
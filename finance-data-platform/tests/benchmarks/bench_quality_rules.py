@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Benchmark of the compiled quality rules against the equivalent hand-written pandas checks."""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import sys
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from phase_4_python_etl.categorical_validation import validate_categoricals  # noqa: E402
+from phase_4_python_etl.etl_main import CATEGORICAL_RULES  # noqa: E402
+from phase_4_python_etl.quality_rules import DEFAULT_RULES_PATH, compile_rule_spec, evaluate_rules, load_rules  # noqa: E402
+
+ENUM_COLUMNS = ("payment_method", "sale_channel", "sale_status")
+
+
+def build_sales_frame(rows: int, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    prices = rng.integers(10_000, 50_000, rows).astype(float)
+    # Same faults as the ERP generator: some prices negated, some multiplied by 100.
+    faults = rng.random(rows)
+    prices[faults < 0.05] *= -1
+    prices[(faults >= 0.05) & (faults < 0.1)] *= 100
+    frame = pd.DataFrame({
+        "sale_id": np.char.add("SALE", np.arange(rows).astype(str)).astype(object),
+        "sale_price": prices,
+    })
+    for column in ENUM_COLUMNS:
+        frame[column] = rng.choice(CATEGORICAL_RULES[column] + ["Unknown"], rows).astype(object)
+    return frame
+
+
+def build_telemetry_frame(rows: int, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    sensor_type = rng.choice(["speed", "engine_temperature", "fuel_level"], rows)
+    values = np.where(sensor_type == "speed", rng.integers(0, 180, rows), rng.integers(70, 110, rows))
+    # Same faults as the IoT generator: -50/9999 km/h and -10/200 degrees.
+    faulty = rng.random(rows) < 0.2
+    values = np.where(faulty & (sensor_type == "speed"), rng.choice([-50, 9999], rows), values)
+    values = np.where(faulty & (sensor_type == "engine_temperature"), rng.choice([-10, 200], rows), values)
+    return pd.DataFrame({
+        "telemetry_id": np.char.add("TEL", np.arange(rows).astype(str)).astype(object),
+        "sensor_type": sensor_type.astype(object),
+        "sensor_value": values.astype(str).astype(object),
+    })
+
+
+def build_vehicles_frame(rows: int, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    vins = np.char.add("VIN", rng.integers(1_000_000_000, 9_999_999_999, rows).astype(str)).astype(object)
+    truncated = rng.random(rows) < 0.05
+    vins[truncated] = [vin[:5] for vin in vins[truncated]]
+    return pd.DataFrame({
+        "vehicle_id": np.char.add("VEH", np.arange(rows).astype(str)).astype(object),
+        "vin": vins,
+        "year": rng.choice([2024, 2025, 2026, -2025], rows),
+    })
+
+
+def hand_written_rules(table_key: str, frame: pd.DataFrame) -> np.ndarray:
+    """The shipped rules for a table, written the way they would be added to transform()."""
+    if table_key == "stg_sales":
+        price = pd.to_numeric(frame["sale_price"], errors="coerce")
+        return (frame["sale_price"].notna() & ~price.between(0.01, 500_000)).to_numpy()
+    if table_key == "stg_telemetry":
+        value = pd.to_numeric(frame["sensor_value"], errors="coerce")
+        speed = (frame["sensor_type"] == "speed") & ~value.between(0, 300)
+        temperature = (frame["sensor_type"] == "engine_temperature") & ~value.between(0, 150)
+        return (frame["sensor_value"].notna() & (speed | temperature)).to_numpy()
+    vin = frame["vin"]
+    bad_vin = vin.notna() & ~vin.astype(str).str.fullmatch(r"[A-Za-z0-9]{9,17}")
+    repeated_vin = vin.notna() & vin.duplicated()
+    bad_year = frame["year"].notna() & ~frame["year"].between(1900, 2100)
+    return (bad_vin | repeated_vin | bad_year).to_numpy()
+
+
+def best_of(func, repeat: int) -> tuple[float, object]:
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started_at = perf_counter()
+        result = func()
+        best = min(best, perf_counter() - started_at)
+    return best, result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="rows in each synthetic frame")
+    parser.add_argument("--repeat", type=int, default=3, help="best-of-N timing repetitions")
+    parser.add_argument("--rules", default=str(DEFAULT_RULES_PATH), help="rule spec to benchmark")
+    args = parser.parse_args()
+
+    rules = load_rules(args.rules)
+    print(f"Quality checks on {args.rows:,} rows per table (best of {args.repeat})")
+    print(f"{'checks':<36}{'hand-written':>14}{'compiled':>12}{'ratio':>8}  violations by rule")
+
+    # Enum rules: today's validate_categoricals against the same rules compiled from a spec.
+    sales = build_sales_frame(args.rows)
+    enum_rules = compile_rule_spec({
+        "stg_sales": [{"name": column, "kind": "enum", "column": column, "values": CATEGORICAL_RULES[column]} for column in ENUM_COLUMNS]
+    })["stg_sales"]
+    checks = [(column, sales[column], tuple(CATEGORICAL_RULES[column])) for column in ENUM_COLUMNS]
+    legacy_seconds, (legacy_rows, _, _) = best_of(lambda: validate_categoricals(checks, len(sales)), args.repeat)
+    compiled_seconds, (compiled_rows, report) = best_of(lambda: evaluate_rules(enum_rules, sales.__getitem__, len(sales)), args.repeat)
+    assert np.array_equal(legacy_rows, compiled_rows)
+    print(f"{'stg_sales categorical enums':<36}{legacy_seconds:>13.3f}s{compiled_seconds:>11.3f}s{compiled_seconds / legacy_seconds:>8.2f}  {report.violations}")
+
+    frames = {
+        "stg_sales": sales,
+        "stg_telemetry": build_telemetry_frame(args.rows),
+        "stg_vehicles": build_vehicles_frame(args.rows),
+    }
+    for table_key, frame in frames.items():
+        table_rules = [rule for rule in rules.get(table_key, ()) if all(column in frame for column in rule.referenced_columns)]
+        legacy_seconds, legacy_rows = best_of(lambda: hand_written_rules(table_key, frame), args.repeat)
+        compiled_seconds, (compiled_rows, report) = best_of(
+            lambda: evaluate_rules(table_rules, frame.__getitem__, len(frame)), args.repeat
+        )
+        assert np.array_equal(legacy_rows, compiled_rows), table_key
+        label = f"{table_key} spec rules ({len(table_rules)})"
+        print(f"{label:<36}{legacy_seconds:>13.3f}s{compiled_seconds:>11.3f}s{compiled_seconds / legacy_seconds:>8.2f}  {report.violations}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Micro-benchmark for the Phase 4 load-path value encoding."""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import sys
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+
+ETL_DIR = Path(__file__).resolve().parents[2] / "phase_4_python_etl"
+if str(ETL_DIR) not in sys.path:
+    sys.path.insert(0, str(ETL_DIR))
+
+from etl_main import encode_copy_rows  # noqa: E402
+
+
+def build_telemetry_frame(rows: int, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    timestamps = pd.Timestamp("2026-01-01") + pd.to_timedelta(rng.integers(0, 86_400 * 365, rows), unit="s")
+    frame = pd.DataFrame(
+        {
+            "telemetry_id": np.char.add("TEL", np.arange(rows).astype(str)).astype(object),
+            "vehicle_id": np.char.add("VEH", rng.integers(0, 5_000, rows).astype(str)).astype(object),
+            "timestamp": timestamps,
+            "sensor_type": rng.choice(["speed", "fuel_level", "engine_temperature"], rows).astype(object),
+            "sensor_value": rng.normal(80, 25, rows).round(2),
+            "location": rng.choice(["Johannesburg", "Cape Town", "Durban", None], rows),
+            "is_dirty": np.zeros(rows, dtype=bool),
+        }
+    )
+    # Sprinkle nulls so NaN/NaT handling is part of the measurement.
+    frame.loc[frame.sample(frac=0.02, random_state=seed).index, "sensor_value"] = np.nan
+    frame.loc[frame.sample(frac=0.01, random_state=seed + 1).index, "timestamp"] = pd.NaT
+    return frame
+
+
+def legacy_values(frame: pd.DataFrame) -> list[tuple]:
+    return [tuple(None if pd.isna(x) else x for x in row) for row in frame.to_numpy()]
+
+
+def time_call(func, frame: pd.DataFrame, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started_at = perf_counter()
+        func(frame)
+        best = min(best, perf_counter() - started_at)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="rows in the synthetic telemetry frame")
+    parser.add_argument("--repeat", type=int, default=3, help="best-of-N timing repetitions")
+    args = parser.parse_args()
+
+    frame = build_telemetry_frame(args.rows)
+    print(f"Encoding {len(frame):,} telemetry rows x {frame.shape[1]} columns (best of {args.repeat})")
+
+    legacy_seconds = time_call(legacy_values, frame, args.repeat)
+    vectorized_seconds = time_call(encode_copy_rows, frame, args.repeat)
+
+    print(f"legacy generator expression : {legacy_seconds:8.3f}s")
+    print(f"vectorized COPY encoder     : {vectorized_seconds:8.3f}s")
+    print(f"speedup                     : {legacy_seconds / vectorized_seconds:8.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,15 @@
+"""Unit tests import the phases as packages from the project root, as the benchmarks do."""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+import sys
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+# Importing etl_main needs a connection string but never connects at import time.
+os.environ.setdefault("WAREHOUSE_CONN", "offline")
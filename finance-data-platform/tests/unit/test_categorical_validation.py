@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from phase_4_python_etl.categorical_validation import validate_categoricals
+
+
+def test_violations_are_counted_per_rule_with_nulls_as_offenders():
+    values = pd.Series(["Cash", "Bitcoin", None, "Cash", "Bitcoin"], dtype=object)
+    dirty_rows, report, categoricals = validate_categoricals([("payment_method", values, ("Cash",))], len(values))
+    assert dirty_rows.tolist() == [False, True, True, False, True]
+    assert report.violations == {"payment_method": 3}
+    assert report.offenders["payment_method"] == {"Bitcoin": 2, None: 1}
+    assert list(categoricals["payment_method"].categories) == ["Cash", "Bitcoin"]
+
+
+def test_all_null_columns_are_not_categorized():
+    values = pd.Series([None] * 4, dtype=object)
+    dirty_rows, report, categoricals = validate_categoricals([("payment_method", values, ("Cash",))], len(values))
+    assert dirty_rows.all()
+    assert report.violations == {"payment_method": 4}
+    assert "payment_method" not in categoricals
+
+
+def test_counted_rows_limit_the_report_but_not_the_mask():
+    values = pd.Series(["Bitcoin", "Bitcoin", "Cash"], dtype=object)
+    counted = np.array([True, False, True])
+    dirty_rows, report, _ = validate_categoricals([("payment_method", values, ("Cash",))], len(values), counted_rows=counted)
+    assert dirty_rows.tolist() == [True, True, False]
+    assert report.violations == {"payment_method": 1}
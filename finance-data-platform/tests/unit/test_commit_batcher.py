@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+
+from phase_4_python_etl import etl_main
+from phase_4_python_etl.etl_main import CommitBatcher
+from phase_4_python_etl.stage_metrics import StageMetrics
+
+
+class FakeCursor:
+    def __init__(self, conn: "FakeConnection") -> None:
+        self.conn = conn
+
+    def __enter__(self) -> "FakeCursor":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        return None
+
+    def execute(self, sql: str, params=None) -> None:
+        self.conn.log.append(sql)
+
+
+class FakeConnection:
+    """Records savepoint statements, commits, and rollbacks in order."""
+
+    def __init__(self, fail_commit: bool = False) -> None:
+        self.log: list[str] = []
+        self.fail_commit = fail_commit
+
+    def cursor(self) -> FakeCursor:
+        return FakeCursor(self)
+
+    def commit(self) -> None:
+        if self.fail_commit:
+            raise RuntimeError("connection lost")
+        self.log.append("COMMIT")
+
+    def rollback(self) -> None:
+        self.log.append("ROLLBACK")
+
+
+@pytest.fixture(autouse=True)
+def recorded_metadata(monkeypatch):
+    """Metadata writes go to a list instead of execute_values."""
+    written = []
+
+    def write_metadata(entries, conn):
+        written.append(dict(entries))
+        conn.log.append("METADATA")
+
+    def update_metadata(table_key, row_count, conn, watermark=None):
+        written.append({table_key: (row_count, watermark)})
+        conn.log.append("METADATA")
+        conn.commit()
+
+    monkeypatch.setattr(etl_main, "write_metadata", write_metadata)
+    monkeypatch.setattr(etl_main, "update_metadata", update_metadata)
+    return written
+
+
+def load_file(batch: CommitBatcher, table_key: str, rows: int, watermark=None, fail: bool = False):
+    outcome = etl_main.new_file_outcome(f"ingested/{table_key}.csv", table_key)
+    batch.begin_table(table_key)
+    batch.begin_file()
+    if fail:
+        batch.rollback_file()
+        return outcome
+    batch.finish_file(table_key, rows, watermark)
+    outcome["rows_processed"] = rows
+    batch.file_loaded(outcome)
+    return outcome
+
+
+def test_file_policy_commits_each_file_without_savepoints(recorded_metadata):
+    conn = FakeConnection()
+    batch = CommitBatcher(conn, policy="file")
+    load_file(batch, "stg_sales", 10)
+    load_file(batch, "stg_sales", 5, fail=True)
+    batch.close()
+    assert conn.log == ["METADATA", "COMMIT", "ROLLBACK"]
+    assert recorded_metadata == [{"stg_sales": (10, None)}]
+
+
+def test_failed_file_rolls_back_to_its_savepoint_only(recorded_metadata):
+    conn = FakeConnection()
+    batch = CommitBatcher(conn, policy="table")
+    load_file(batch, "stg_sales", 10, watermark=("2026-01-02", "S9"))
+    load_file(batch, "stg_sales", 5, fail=True)
+    load_file(batch, "stg_sales", 7, watermark=("2026-01-01", "S1"))
+    batch.close()
+    assert conn.log == [
+        "SAVEPOINT etl_file",
+        "RELEASE SAVEPOINT etl_file",
+        "SAVEPOINT etl_file",
+        "ROLLBACK TO SAVEPOINT etl_file",
+        "RELEASE SAVEPOINT etl_file",
+        "SAVEPOINT etl_file",
+        "RELEASE SAVEPOINT etl_file",
+        "METADATA",
+        "COMMIT",
+    ]
+    # One metadata row per table: the last file's row count and the highest watermark.
+    assert recorded_metadata == [{"stg_sales": (7, ("2026-01-02", "S9"))}]
+
+
+def test_table_policy_commits_when_the_table_changes():
+    conn = FakeConnection()
+    batch = CommitBatcher(conn, policy="table")
+    load_file(batch, "stg_sales", 10)
+    assert "COMMIT" not in conn.log
+    load_file(batch, "stg_customers", 3)
+    assert conn.log.count("COMMIT") == 1
+    batch.close()
+    assert conn.log.count("COMMIT") == 2
+
+
+def test_rows_policy_commits_once_enough_rows_are_pending():
+    conn = FakeConnection()
+    batch = CommitBatcher(conn, policy="rows", commit_rows=15)
+    load_file(batch, "stg_sales", 10)
+    load_file(batch, "stg_customers", 3)
+    assert "COMMIT" not in conn.log
+    load_file(batch, "stg_sales", 4)
+    assert conn.log.count("COMMIT") == 1
+    assert batch.pending_outcomes == []
+
+
+def test_failed_group_commit_marks_every_file_in_the_group_failed():
+    conn = FakeConnection(fail_commit=True)
+    batch = CommitBatcher(conn, policy="table")
+    outcomes = [load_file(batch, "stg_sales", 10), load_file(batch, "stg_sales", 5)]
+    batch.close()
+    assert conn.log[-1] == "ROLLBACK"
+    assert [outcome["error"] for outcome in outcomes] == ["Group commit failed: connection lost"] * 2
+
+
+def test_failed_ledger_write_rolls_back_to_its_own_savepoint(monkeypatch):
+    def record_loaded_objects(conn, entries, commit=True):
+        raise RuntimeError("ledger table missing")
+
+    monkeypatch.setattr(etl_main, "record_loaded_objects", record_loaded_objects)
+    conn = FakeConnection()
+    batch = CommitBatcher(conn, policy="table")
+    with pytest.raises(RuntimeError, match="ledger table missing"):
+        batch.record_ledger([("ingested/sales.csv", ("etag", 10), "staging_sales", 10)])
+    assert conn.log == ["SAVEPOINT etl_ledger", "ROLLBACK TO SAVEPOINT etl_ledger", "RELEASE SAVEPOINT etl_ledger"]
+
+
+def test_coalesced_batch_of_failed_files_writes_no_metadata(recorded_metadata, monkeypatch):
+    monkeypatch.setattr(etl_main, "rows_to_load", lambda df, table_key, conn: df)
+    monkeypatch.setattr(etl_main, "write_rows", lambda df, table_key, conn: len(df))
+    column_types = {"customer_id": "character varying", "email": "character varying"}
+    reads = [
+        {
+            "key": f"ingested/customers_{index}.csv",
+            "started_at": 0.0,
+            # Both rows repeat, so the duplicate check fails each file.
+            "frame": pd.DataFrame({"customer_id": ["CUST1", "CUST1"], "email": ["a@example.com", "a@example.com"]}),
+            "read_skipped_rows": 0,
+            "dtype_plan": None,
+            "stages": StageMetrics(),
+            "error": None,
+        }
+        for index in range(2)
+    ]
+    conn = FakeConnection()
+    batch = CommitBatcher(conn, policy="file")
+    batch.begin_table("stg_customers")
+    outcomes = etl_main.load_coalesced_batch(reads, "stg_customers", column_types, batch)
+    batch.close()
+    assert all(outcome["error"].startswith("Data quality validation failed") for outcome in outcomes)
+    assert recorded_metadata == []
+    assert "METADATA" not in conn.log
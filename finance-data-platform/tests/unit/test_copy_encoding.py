@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from phase_4_python_etl.etl_main import COPY_NULL, encode_copy_column, encode_copy_rows
+
+
+def test_categorical_without_categories_encodes_as_nulls():
+    values = pd.Series(pd.Categorical([None, None, None], categories=[]))
+    assert list(encode_copy_column(values)) == [COPY_NULL] * 3
+
+
+def test_all_null_categorical_with_categories_encodes_as_nulls():
+    values = pd.Series(pd.Categorical([None, None], categories=["Durban"]))
+    assert list(encode_copy_column(values)) == [COPY_NULL] * 2
+
+
+def test_categorical_with_nulls_encodes_categories_and_nulls():
+    values = pd.Series(pd.Categorical(["Cape Town", None, "Durban, KZN"]))
+    assert list(encode_copy_column(values)) == ['"Cape Town"', COPY_NULL, '"Durban, KZN"']
+
+
+def test_empty_categorical_column_in_a_frame():
+    frame = pd.DataFrame({
+        "customer_id": ["CUST1", "CUST2"],
+        "city": pd.Categorical([None, None], categories=[]),
+        "year": np.array([2024, 2025]),
+    })
+    assert encode_copy_rows(frame) == f"CUST1,{COPY_NULL},2024\nCUST2,{COPY_NULL},2025\n"
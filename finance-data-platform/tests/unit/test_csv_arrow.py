@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from io import BytesIO
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from phase_4_python_etl import file_readers  # noqa: E402
+
+SALES_CSV = (
+    "sale_id,sale_date,notes,sale_price,exported_at\n"
+    "S1,2026-01-05,first,10.5,2026-01-06 08:00\n"
+    "S2,2026-01-05,,20,2026-01-06 08:00\n"
+    "S3,2026-01-06,\"a, b\",30,2026-01-07 08:00\n"
+).encode()
+PROJECTION = frozenset({"sale_id", "sale_date", "sale_price", "payment_method"})
+
+
+def test_read_returns_only_projected_columns():
+    frame = file_readers.read_csv_arrow(BytesIO(SALES_CSV), PROJECTION)
+    # Header order is kept, and projected columns the file lacks are not invented.
+    assert list(frame.columns) == ["sale_id", "sale_date", "sale_price"]
+    assert frame["sale_price"].tolist() == ["10.5", "20", "30"]
+
+
+def test_chunks_return_only_projected_columns():
+    chunks = list(file_readers.iter_csv_chunks_arrow(BytesIO(SALES_CSV), 2, PROJECTION))
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+    assert all(list(chunk.columns) == ["sale_id", "sale_date", "sale_price"] for chunk in chunks)
+
+
+def test_every_column_is_read_without_a_projection():
+    frame = file_readers.read_csv_arrow(BytesIO(SALES_CSV))
+    assert list(frame.columns) == ["sale_id", "sale_date", "notes", "sale_price", "exported_at"]
+    assert frame["notes"].isna().tolist() == [False, True, False]
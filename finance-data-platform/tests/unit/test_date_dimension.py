@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import datetime as dt
+
+import pandas as pd
+
+from phase_4_python_etl.date_dimension import calendar_frame, date_keys, missing_ranges
+
+JAN_1 = dt.date(2026, 1, 1)
+JAN_31 = dt.date(2026, 1, 31)
+
+
+def test_missing_ranges_for_an_empty_calendar():
+    assert missing_ranges(JAN_1, JAN_31, (None, None, 0)) == [(JAN_1, JAN_31)]
+
+
+def test_missing_ranges_inside_a_gap_free_calendar():
+    assert missing_ranges(dt.date(2026, 1, 5), dt.date(2026, 1, 20), (JAN_1, JAN_31, 31)) == []
+
+
+def test_missing_ranges_extend_both_ends():
+    ranges = missing_ranges(dt.date(2025, 12, 30), dt.date(2026, 2, 2), (JAN_1, JAN_31, 31))
+    assert ranges == [
+        (dt.date(2025, 12, 30), dt.date(2025, 12, 31)),
+        (dt.date(2026, 2, 1), dt.date(2026, 2, 2)),
+    ]
+
+
+def test_missing_ranges_cover_a_calendar_with_gaps_whole():
+    # 20 rows between Jan 1 and Jan 31: some days are missing inside the extent.
+    ranges = missing_ranges(dt.date(2026, 1, 10), dt.date(2026, 2, 5), (JAN_1, JAN_31, 20))
+    assert ranges == [(JAN_1, dt.date(2026, 2, 5))]
+
+
+def test_date_keys_from_text_timestamps_and_nulls():
+    keys = date_keys(["2026-03-01 10:15:00", None, "2024-02-29", "not a date"])
+    assert keys.dtype == "Int64"
+    assert keys.isna().tolist() == [False, True, False, True]
+    assert keys.dropna().tolist() == [20260301, 20240229]
+
+
+def test_date_keys_from_datetimes():
+    keys = date_keys(pd.Series(pd.to_datetime(["1999-12-31 23:59:59", "2026-01-02 00:00:00"])))
+    assert keys.tolist() == [19991231, 20260102]
+
+
+def test_calendar_frame_keys_and_weekends():
+    frame = calendar_frame(dt.date(2026, 1, 2), dt.date(2026, 1, 4))
+    assert frame["date_key"].tolist() == [20260102, 20260103, 20260104]
+    assert frame["day_of_week"].tolist() == [5, 6, 7]
+    assert frame["is_weekend"].tolist() == ["f", "t", "t"]
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from phase_4_python_etl import etl_main
+from phase_4_python_etl.categorical_validation import CategoricalReport
+from phase_4_python_etl.dtype_planning import DtypePlanner, categorize
+
+CUSTOMER_TYPES = {
+    "customer_id": "character varying",
+    "first_name": "character varying",
+    "last_name": "character varying",
+    "email": "character varying",
+    "city": "character varying",
+    "created_at": "timestamp without time zone",
+    "is_dirty": "boolean",
+}
+
+
+def customers_frame(rows: int = 40) -> pd.DataFrame:
+    return pd.DataFrame({
+        "customer_id": [f"CUST{index}" for index in range(rows)],
+        "first_name": ["Thabo", "Lerato"] * (rows // 2),
+        "last_name": ["Mokoena", "Naidoo"] * (rows // 2),
+        "email": [f"user{index}@example.com" for index in range(rows)],
+        "city": [None] * rows,
+        "created_at": ["2026-03-01 10:00:00"] * rows,
+    })
+
+
+def test_categorize_leaves_all_null_columns_alone():
+    assert categorize(pd.Series([None, None, np.nan], dtype=object)) == (None, False)
+
+
+def test_categorize_keeps_nulls_of_low_cardinality_columns():
+    categorical, mostly_distinct = categorize(pd.Series(["Durban", None, "Durban", "Durban"], dtype=object))
+    assert not mostly_distinct
+    assert list(categorical.cat.categories) == ["Durban"]
+    assert categorical.isna().tolist() == [False, True, False, False]
+
+
+def test_planner_skips_all_null_text_columns():
+    frame, report = DtypePlanner().apply(customers_frame(), "stg_customers", CUSTOMER_TYPES)
+    assert frame["city"].dtype == object
+    assert "city" not in report.columns
+    assert isinstance(frame["first_name"].dtype, pd.CategoricalDtype)
+
+
+def test_planned_frame_with_empty_text_column_encodes_like_the_raw_frame():
+    def prepare(planned: bool) -> str:
+        df = customers_frame()
+        if planned:
+            df, _ = DtypePlanner().apply(df, "stg_customers", CUSTOMER_TYPES)
+        _, duplicate_rows = etl_main.evaluate_data_quality(df, "stg_customers", list(CUSTOMER_TYPES))
+        transformed = etl_main.transform(df, "stg_customers", CategoricalReport(), duplicate_rows)
+        return etl_main.encode_copy_rows(etl_main.coerce_to_column_types(transformed, CUSTOMER_TYPES))
+
+    assert prepare(planned=True) == prepare(planned=False)
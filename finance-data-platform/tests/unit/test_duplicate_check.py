@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from phase_4_python_etl import etl_main
+
+CUSTOMER_COLUMNS = ["customer_id", "first_name", "last_name", "email", "city", "created_at", "is_dirty"]
+
+
+def customers_with_export_column() -> pd.DataFrame:
+    # The two rows differ only in a column no staging table reads.
+    return pd.DataFrame({
+        "customer_id": ["CUST1", "CUST1"],
+        "first_name": ["Thabo", "Thabo"],
+        "last_name": ["Mokoena", "Mokoena"],
+        "email": ["thabo@example.com", "thabo@example.com"],
+        "city": ["Durban", "Durban"],
+        "created_at": ["2026-03-01 10:00:00", "2026-03-01 10:00:00"],
+        "exported_at": ["2026-03-02 08:00:00", "2026-03-02 09:00:00"],
+    })
+
+
+def test_whole_and_projected_reads_find_the_same_duplicates():
+    whole = customers_with_export_column()
+    projected = whole[[column for column in whole.columns if column in etl_main.projection_columns("stg_customers", CUSTOMER_COLUMNS)]]
+    assert "exported_at" not in projected.columns
+
+    whole_metrics, whole_rows = etl_main.evaluate_data_quality(whole, "stg_customers", CUSTOMER_COLUMNS)
+    projected_metrics, projected_rows = etl_main.evaluate_data_quality(projected, "stg_customers", CUSTOMER_COLUMNS)
+    assert whole_metrics["duplicate_records"] == projected_metrics["duplicate_records"] == 1
+    assert whole_rows.tolist() == projected_rows.tolist() == [False, True]
+
+
+def test_streamed_chunks_check_duplicates_over_the_same_columns():
+    frame = customers_with_export_column()
+    accumulator = etl_main.QualityAccumulator(row_columns=etl_main.duplicate_check_columns("stg_customers", CUSTOMER_COLUMNS))
+    accumulator.add(frame.iloc[:1])
+    assert accumulator.add(frame.iloc[1:]).tolist() == [True]
+    assert accumulator.has_blocking_errors("stg_customers")
+
+
+def test_every_column_counts_without_a_staging_schema():
+    frame = customers_with_export_column()
+    _, duplicate_rows = etl_main.evaluate_data_quality(frame, "stg_customers", [])
+    assert not duplicate_rows.any()
+
+
+def test_seen_hashes_find_repeats_across_several_chunks():
+    seen = etl_main.SeenHashes()
+    chunks = [[5, 3, 5], [9, 1], [3, 7, 9], [2, 1, 8, 8]]
+    masks = [seen.add(np.array(chunk, dtype=np.uint64)).tolist() for chunk in chunks]
+    assert masks == [[False, False, True], [False, False], [True, False, True], [False, True, False, True]]
+    assert seen._hashes.tolist() == [1, 2, 3, 5, 7, 8, 9]
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import json
+from io import BytesIO
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from phase_4_python_etl import file_readers  # noqa: E402
+
+TELEMETRY = [
+    {"telemetry_id": f"TEL{index:03d}", "speed": index % 180, "fuel_level": None if index % 5 == 0 else index % 100}
+    for index in range(25)
+]
+
+
+def test_frame_json_lines_keeps_offsets():
+    raw = json.dumps(TELEMETRY, indent=2).encode()
+    framed = file_readers.frame_json_lines(raw, opens_array=True, closes_array=True)
+    assert len(framed) == len(raw)
+    assert [json.loads(line) for line in framed.splitlines()] == TELEMETRY
+
+
+def test_indented_array_is_parsed_by_arrow(monkeypatch):
+    def python_decoder(*args, **kwargs):
+        raise AssertionError("fell back to the Python decoder")
+
+    monkeypatch.setattr(file_readers, "iter_json_records", python_decoder)
+    raw = json.dumps(TELEMETRY, indent=2).encode()
+    frame = file_readers.read_json_arrow(BytesIO(raw))
+    assert frame["telemetry_id"].tolist() == [record["telemetry_id"] for record in TELEMETRY]
+    chunks = list(file_readers.iter_json_chunks_arrow(BytesIO(raw), 10))
+    assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+
+
+@pytest.mark.parametrize("read_size", [3, 64, 1024 * 1024])
+def test_streamed_array_matches_python_decoder(read_size, monkeypatch):
+    records = [{"id": index, "note": "a},{b" if index == 17 else "ok", "items": [{"a": 1}, {"a": 2}]} for index in range(30)]
+    raw = json.dumps(records, indent=2).encode()
+    monkeypatch.setattr(file_readers.JsonLinesFraming.__init__, "__defaults__", (read_size,))
+    chunks = list(file_readers.iter_json_chunks_arrow(BytesIO(raw), 8))
+    assert [len(chunk) for chunk in chunks] == [8, 8, 8, 6]
+    frame = pd.concat(chunks, ignore_index=True)
+    assert frame["id"].tolist() == list(range(30))
+    assert frame["note"].tolist() == [record["note"] for record in records]
+
+
+def test_empty_array_yields_no_chunks():
+    assert list(file_readers.iter_json_chunks_arrow(BytesIO(b"[\n]\n"), 10)) == []
+    assert file_readers.read_json_arrow(BytesIO(b"[]")).empty
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from phase_4_python_etl.profiling import HyperLogLog, TableProfile, TDigest, profile_drift
+
+
+def hashes(values) -> np.ndarray:
+    return pd.util.hash_array(np.asarray(values, dtype=object))
+
+
+def test_hyperloglog_estimates_within_a_few_percent():
+    sketch = HyperLogLog()
+    sketch.add_hashes(hashes([f"CUST{index}" for index in range(50_000)]))
+    assert abs(sketch.estimate() - 50_000) / 50_000 < 0.05
+
+
+def test_hyperloglog_counts_small_sets_exactly():
+    sketch = HyperLogLog()
+    sketch.add_hashes(hashes(["Cash", "Card", "EFT", "Cash", "Card"]))
+    assert sketch.estimate() == 3
+
+
+def test_hyperloglog_merge_matches_one_sketch_over_both_inputs():
+    left, right, both = HyperLogLog(), HyperLogLog(), HyperLogLog()
+    first = hashes([f"VEH{index}" for index in range(0, 30_000)])
+    second = hashes([f"VEH{index}" for index in range(20_000, 60_000)])
+    left.add_hashes(first)
+    right.add_hashes(second)
+    both.add_hashes(np.concatenate([first, second]))
+    assert np.array_equal(left.merge(right).registers, both.registers)
+    assert abs(left.estimate() - 60_000) / 60_000 < 0.05
+
+
+def test_hyperloglog_state_round_trip():
+    sketch = HyperLogLog()
+    sketch.add_hashes(hashes(range(1000)))
+    assert HyperLogLog.from_state(sketch.to_state()).estimate() == sketch.estimate()
+
+
+def test_tdigest_quantiles_close_to_exact():
+    values = np.random.default_rng(7).normal(100.0, 15.0, 100_000)
+    digest = TDigest()
+    digest.add(values)
+    expected = np.quantile(values, [0.05, 0.5, 0.95])
+    assert np.allclose(digest.quantiles([0.05, 0.5, 0.95]), expected, atol=0.5)
+    assert digest.count == len(values)
+    assert len(digest.means) <= digest.compression
+
+
+def test_tdigest_merge_of_batches_matches_the_whole():
+    rng = np.random.default_rng(11)
+    values = rng.exponential(50.0, 60_000)
+    merged = TDigest()
+    for batch in np.array_split(values, 12):
+        part = TDigest()
+        part.add(batch)
+        merged.merge(part)
+    assert merged.count == len(values)
+    assert (merged.minimum, merged.maximum) == (values.min(), values.max())
+    expected = np.quantile(values, [0.25, 0.5, 0.75])
+    assert np.allclose(merged.quantiles([0.25, 0.5, 0.75]), expected, rtol=0.02)
+
+
+def test_tdigest_ignores_non_finite_values_and_empty_digest_has_no_quantiles():
+    digest = TDigest()
+    assert digest.quantiles([0.5]) == [None]
+    digest.add(np.array([np.nan, np.inf, 4.0, 6.0]))
+    assert digest.count == 2
+    assert digest.quantiles([0.0, 1.0]) == [4.0, 6.0]
+
+
+def test_table_profile_merge_and_drift():
+    def profile(prices) -> TableProfile:
+        table = TableProfile(["sale_price"])
+        values = pd.Series(prices, dtype="float64")
+        table.add_rows(len(values))
+        table.add_column("sale_price", values, pd.util.hash_array(values.to_numpy()), values.notna().to_numpy())
+        return table
+
+    history = profile(np.arange(1000, dtype="float64")).merge(profile(np.arange(1000, 2000, dtype="float64")))
+    assert history.row_count == 2000
+    assert history.summary()["columns"]["sale_price"]["min"] == 0.0
+    assert profile_drift(profile(np.arange(500, 1500, dtype="float64")), history) == []
+    drift = profile_drift(profile(np.arange(5000, 6000, dtype="float64")), history)
+    assert [check["check"] for check in drift] == ["median_shift"]
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from phase_4_python_etl.quality_rules import DEFAULT_RULES_PATH, compile_rule_spec, evaluate_rules, load_rules
+
+SPEC = {
+    "stg_sales": [
+        {"name": "sale_price_range", "kind": "range", "column": "sale_price", "min": 0.01, "max": 500000},
+        {"name": "sale_id_format", "kind": "regex", "column": "sale_id", "pattern": r"S\d+"},
+        {"name": "payment_method_known", "kind": "enum", "column": "payment_method", "values": ["Cash", "Card"]},
+        {"name": "delivered_after_sale", "kind": "compare", "left": "delivery_date", "operator": ">=", "right": "sale_date", "type": "date"},
+        {"name": "sale_id_unique", "kind": "unique", "column": "sale_id"},
+        {"name": "card_minimum", "kind": "range", "column": "sale_price", "min": 100, "when": {"payment_method": "Card"}},
+    ],
+}
+
+SALES = pd.DataFrame({
+    "sale_id": ["S1", "S2", "X3", "S1", None, "S6"],
+    "sale_price": ["10.5", "-1", "abc", None, "50", "60"],
+    "payment_method": ["Cash", "Bitcoin", "Card", "Bitcoin", None, "Card"],
+    "sale_date": ["2026-01-05", "2026-01-05", "2026-01-05", "2026-01-05", "2026-01-05", "2026-01-05"],
+    "delivery_date": ["2026-01-06", "2026-01-04", None, "2026-01-05", "2026-01-05", "2026-01-07"],
+})
+
+
+def evaluate(frame: pd.DataFrame, **kwargs):
+    rule_rows = {}
+    invalid, report = evaluate_rules(compile_rule_spec(SPEC)["stg_sales"], frame.__getitem__, len(frame), rule_rows=rule_rows, **kwargs)
+    return invalid, report, {name: rows.tolist() for name, rows in rule_rows.items()}
+
+
+def test_each_rule_kind_masks_its_invalid_rows():
+    invalid, report, rule_rows = evaluate(SALES)
+    assert rule_rows == {
+        "sale_price_range": [False, True, True, False, False, False],
+        "sale_id_format": [False, False, True, False, False, False],
+        "payment_method_known": [False, True, False, True, False, False],
+        "delivered_after_sale": [False, True, False, False, False, False],
+        "sale_id_unique": [False, False, False, True, False, False],
+        "card_minimum": [False, False, True, False, False, True],
+    }
+    assert invalid.tolist() == [False, True, True, True, False, True]
+    assert report.dirty_records == 4
+    assert report.offenders["payment_method_known"] == {"Bitcoin": 2}
+    assert report.offenders["sale_id_format"] == {"X3": 1}
+
+
+def test_counted_rows_limit_the_report_but_not_the_mask():
+    counted = np.array([True, False, True, True, True, True])
+    invalid, report, _ = evaluate(SALES, counted_rows=counted)
+    assert invalid.tolist() == [False, True, True, True, False, True]
+    assert report.violations["payment_method_known"] == 1
+    assert report.dirty_records == 3
+
+
+def test_unique_rules_compare_keys_within_a_group_and_across_chunks():
+    groups = np.array([0, 0, 0, 1, 1, 1])
+    _, report, rule_rows = evaluate(SALES, row_groups=groups, group_count=2)
+    # S1 repeats in another file of the batch, which is not a violation.
+    assert rule_rows["sale_id_unique"] == [False] * 6
+    assert [group.dirty_records for group in report.groups] == [2, 2]
+
+    seen = {}
+    evaluate(SALES.iloc[:3], seen=seen)
+    _, _, rule_rows = evaluate(SALES.iloc[3:], seen=seen)
+    assert rule_rows["sale_id_unique"] == [True, False, False]
+
+
+@pytest.mark.parametrize(
+    ("rule", "message"),
+    [
+        ({"kind": "range", "column": "sale_price", "min": 1}, "needs a name"),
+        ({"name": "r", "kind": "range", "column": "sale_price"}, "needs min, max, or both"),
+        ({"name": "r", "kind": "regex", "column": "sale_id"}, "needs a pattern"),
+        ({"name": "r", "kind": "enum", "column": "payment_method"}, "needs values"),
+        ({"name": "r", "kind": "compare", "left": "a", "right": "b", "operator": "=~"}, "unknown operator"),
+        ({"name": "r", "kind": "range", "column": "a", "min": 1, "type": "text"}, "unknown type"),
+        ({"name": "r", "kind": "checksum", "column": "a"}, "unknown kind"),
+    ],
+)
+def test_invalid_rules_are_rejected(rule, message):
+    with pytest.raises(ValueError, match=message):
+        compile_rule_spec({"stg_sales": [rule]})
+
+
+def test_repeated_rule_names_are_rejected():
+    rule = {"name": "r", "kind": "enum", "column": "payment_method", "values": ["Cash"]}
+    with pytest.raises(ValueError, match="repeat"):
+        compile_rule_spec({"stg_sales": [rule, rule]})
+
+
+def test_shipped_rules_compile():
+    pytest.importorskip("yaml")
+    rules = load_rules(DEFAULT_RULES_PATH)
+    assert [rule.name for rule in rules["stg_sales"]] == ["sale_price_range"]
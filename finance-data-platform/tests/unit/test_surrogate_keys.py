@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import pandas as pd
+
+from phase_4_python_etl.surrogate_keys import MISSING_KEY, KeyMap
+
+
+def test_get_returns_missing_key_for_unknown_ids():
+    key_map = KeyMap(4)
+    key_map.put(["CUST1", "CUST2"], [10, 20])
+    assert key_map.get(pd.Index(["CUST2", "CUST9", "CUST1"])).tolist() == [20, MISSING_KEY, 10]
+    assert key_map.stats() == {"entries": 2, "hits": 2, "misses": 1, "evictions": 0}
+
+
+def test_put_replaces_entries_and_later_copies_win():
+    key_map = KeyMap(4)
+    key_map.put(["CUST1", "CUST2"], [10, 20])
+    key_map.put(["CUST1", "CUST3", "CUST3"], [11, 30, 31])
+    assert len(key_map) == 3
+    assert key_map.get(pd.Index(["CUST1", "CUST2", "CUST3"])).tolist() == [11, 20, 31]
+
+
+def test_put_over_capacity_evicts_least_recently_used():
+    key_map = KeyMap(3)
+    key_map.put(["CUST1", "CUST2", "CUST3"], [10, 20, 30])
+    # CUST1 and CUST3 are used after CUST2, so CUST2 is the first to go.
+    key_map.get(pd.Index(["CUST1", "CUST3"]))
+    key_map.put(["CUST4"], [40])
+    assert len(key_map) == 3
+    assert key_map.evictions == 1
+    assert key_map.get(pd.Index(["CUST1", "CUST2", "CUST3", "CUST4"])).tolist() == [10, MISSING_KEY, 30, 40]
+
+
+def test_put_larger_than_capacity_keeps_the_newest_batch():
+    key_map = KeyMap(2)
+    key_map.put(["CUST1"], [10])
+    key_map.put(["CUST2", "CUST3"], [20, 30])
+    assert sorted(key_map.natural_ids) == ["CUST2", "CUST3"]
+    assert key_map.evictions == 1
+
+
+def test_put_nothing_leaves_the_map_alone():
+    key_map = KeyMap(2)
+    key_map.put([], [])
+    assert len(key_map) == 0
+    assert key_map.clock == 0
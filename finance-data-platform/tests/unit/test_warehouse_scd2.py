@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import datetime as dt
+import os
+from pathlib import Path
+
+import pytest
+
+psycopg2 = pytest.importorskip("psycopg2")
+from psycopg2 import sql  # noqa: E402
+
+from phase_4_python_etl import warehouse_loader  # noqa: E402
+
+# A server DSN the test may create and drop a scratch database on, e.g.
+# "dbname=postgres user=postgres host=localhost".
+TEST_CONN = os.getenv("WAREHOUSE_TEST_CONN")
+SCHEMA_DIR = Path(__file__).resolve().parents[2] / "phase_1_data_warehouse_design"
+
+
+@pytest.fixture(scope="module")
+def warehouse_conn():
+    """A fresh database with the staging and warehouse schemas; yields its DSN."""
+    if not TEST_CONN:
+        pytest.skip("WAREHOUSE_TEST_CONN is not set")
+    try:
+        server = psycopg2.connect(TEST_CONN)
+    except psycopg2.OperationalError as exc:
+        pytest.skip(f"no database available: {exc}")
+    server.autocommit = True
+    database = f"etl_scd2_test_{os.getpid()}"
+    with server.cursor() as cur:
+        cur.execute(sql.SQL("DROP DATABASE IF EXISTS {}").format(sql.Identifier(database)))
+        cur.execute(sql.SQL("CREATE DATABASE {}").format(sql.Identifier(database)))
+    conn_string = psycopg2.extensions.make_dsn(TEST_CONN, dbname=database)
+    try:
+        conn = psycopg2.connect(conn_string)
+        with conn.cursor() as cur:
+            cur.execute("CREATE SCHEMA staging; SET search_path TO staging;")
+            cur.execute((SCHEMA_DIR / "staging_schema.sql").read_text())
+            cur.execute("RESET search_path;")
+            cur.execute((SCHEMA_DIR / "warehouse_schema.sql").read_text())
+        conn.commit()
+        conn.close()
+        yield conn_string
+    finally:
+        with server.cursor() as cur:
+            cur.execute(sql.SQL("DROP DATABASE IF EXISTS {} WITH (FORCE)").format(sql.Identifier(database)))
+        server.close()
+
+
+def stage_customer(conn_string: str, customer_id: str, city: str, loaded_at: str) -> None:
+    conn = psycopg2.connect(conn_string)
+    with conn, conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO staging.staging_customers
+                (customer_id, first_name, last_name, email, city, state, created_at, is_dirty, loaded_at)
+            VALUES (%s, 'Thabo', 'Mokoena', 'thabo@example.com', %s, 'Gauteng', '2026-02-01 08:00', false, %s)
+            ON CONFLICT (customer_id) DO UPDATE SET city = EXCLUDED.city, loaded_at = EXCLUDED.loaded_at
+            """,
+            (customer_id, city, loaded_at),
+        )
+    conn.close()
+
+
+def load_customers(conn_string: str) -> dict:
+    summary = warehouse_loader.load_star_schema(conn_string, workers=1, key_cache_entries=0)
+    assert summary["errors"] == []
+    return next(result for result in summary["tables"] if result["table"] == "dim_customer")
+
+
+def customer_versions(conn_string: str, customer_id: str) -> list[tuple]:
+    conn = psycopg2.connect(conn_string)
+    with conn, conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT city, effective_date::text, expiry_date::text, is_current
+            FROM warehouse.dim_customer
+            WHERE customer_id = %s
+            ORDER BY effective_date
+            """,
+            (customer_id,),
+        )
+        rows = cur.fetchall()
+    conn.close()
+    return rows
+
+
+def test_customer_history_across_days_and_within_a_day(warehouse_conn):
+    stage_customer(warehouse_conn, "CUST1", "Durban", "2026-03-01 09:00")
+    first = load_customers(warehouse_conn)
+    assert (first["rows_loaded"], first["versions_closed"]) == (1, 0)
+    # The first version starts when the customer was created.
+    assert customer_versions(warehouse_conn, "CUST1") == [("Durban", "2026-02-01", None, True)]
+
+    # A change on a later day closes the current version the day before.
+    stage_customer(warehouse_conn, "CUST1", "Cape Town", "2026-03-05 10:00")
+    moved = load_customers(warehouse_conn)
+    assert (moved["rows_loaded"], moved["versions_closed"], moved["versions_updated_in_place"]) == (1, 1, 0)
+
+    # A second change that same day would make a zero-length version, so it
+    # overwrites the version that started today instead of adding another.
+    stage_customer(warehouse_conn, "CUST1", "Pretoria", "2026-03-05 15:00")
+    corrected = load_customers(warehouse_conn)
+    assert (corrected["rows_loaded"], corrected["versions_closed"], corrected["versions_updated_in_place"]) == (0, 0, 1)
+
+    stage_customer(warehouse_conn, "CUST1", "Soweto", "2026-03-06 11:00")
+    load_customers(warehouse_conn)
+    assert customer_versions(warehouse_conn, "CUST1") == [
+        ("Durban", "2026-02-01", "2026-03-04", False),
+        ("Pretoria", "2026-03-05", "2026-03-05", False),
+        ("Soweto", "2026-03-06", None, True),
+    ]
+
+
+def test_restaged_customer_without_changes_keeps_its_version(warehouse_conn):
+    # The database is shared with the test above, so staging times stay past its load marks.
+    stage_customer(warehouse_conn, "CUST2", "Polokwane", "2026-03-10 09:00")
+    load_customers(warehouse_conn)
+    stage_customer(warehouse_conn, "CUST2", "Polokwane", "2026-03-11 09:00")
+    reloaded = load_customers(warehouse_conn)
+    assert (reloaded["rows_staged"], reloaded["rows_loaded"], reloaded["versions_closed"]) == (1, 0, 0)
+    assert customer_versions(warehouse_conn, "CUST2") == [("Polokwane", "2026-02-01", None, True)]
+
+
+def test_rows_committed_after_the_mark_within_the_lag_are_still_loaded(warehouse_conn, monkeypatch):
+    monkeypatch.setattr(warehouse_loader, "WAREHOUSE_LOAD_LAG", dt.timedelta(minutes=15))
+    # The mark is 2026-03-11 09:00 from the test above. These rows come from
+    # staging transactions that started before it but committed after it.
+    stage_customer(warehouse_conn, "CUST3", "Kimberley", "2026-03-11 08:50")
+    stage_customer(warehouse_conn, "CUST4", "Bloemfontein", "2026-03-11 08:30")
+    load_customers(warehouse_conn)
+    assert customer_versions(warehouse_conn, "CUST3") == [("Kimberley", "2026-02-01", None, True)]
+    # Older than the lag: left for a --full run.
+    assert customer_versions(warehouse_conn, "CUST4") == []